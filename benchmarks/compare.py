@@ -0,0 +1,84 @@
+"""
+Compare two benchmark result files stage by stage.
+
+    python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/new.json --fail-above 10
+
+Stages are matched by concurrency. Exits with status 1 when any matched
+stage's p95/p99 latency grew, or its throughput fell, by more than
+``--fail-above`` percent, so the command can gate CI.
+"""
+import sys
+import json
+import argparse
+from typing import Any, Dict, List, Optional
+
+# metric -> True when higher is better
+METRICS = {
+    "throughput_rps": True,
+    "wallets_per_s": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "ttfb_p50_ms": False,
+}
+# Metrics that can fail the comparison; p50 and time-to-first-byte are informational
+GATED = ("throughput_rps", "p95_ms", "p99_ms")
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def change_pct(old: float, new: float) -> Optional[float]:
+    if not old:
+        return None
+    return (new - old) / old * 100
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], fail_above: float) -> List[str]:
+    """Print a comparison table and return the regressions found."""
+    regressions = []
+    head_stages = {stage["concurrency"]: stage for stage in head["stages"]}
+    print(f"base {base.get('commit')} ({base.get('timestamp')})  vs  head {head.get('commit')} ({head.get('timestamp')})")
+    print(f"{'conc':>5} {'metric':<15} {'base':>10} {'head':>10} {'change':>9}")
+    for old in base["stages"]:
+        new = head_stages.get(old["concurrency"])
+        if new is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in old or metric not in new:
+                continue
+            pct = change_pct(old[metric], new[metric])
+            worse = pct is not None and (-pct if higher_is_better else pct) > fail_above
+            marker = " !" if worse and metric in GATED else ""
+            shown = f"{pct:+.1f}%" if pct is not None else "n/a"
+            print(f"{old['concurrency']:>5} {metric:<15} {old[metric]:>10} {new[metric]:>10} {shown:>9}{marker}")
+            if marker:
+                regressions.append(f"c={old['concurrency']} {metric} {shown}")
+        if new["errors"] > old["errors"]:
+            regressions.append(f"c={old['concurrency']} errors {old['errors']} -> {new['errors']}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--fail-above", type=float, default=10.0, help="allowed regression in percent")
+    args = parser.parse_args(argv)
+
+    base, head = load(args.base), load(args.head)
+    if base.get("target") != head.get("target"):
+        print(f"Warning: comparing different targets ({base.get('target')} vs {head.get('target')})")
+    regressions = compare(base, head, args.fail_above)
+    if regressions:
+        print(f"\nRegressions above {args.fail_above:.0f}%:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
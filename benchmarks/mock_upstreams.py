@@ -0,0 +1,244 @@
+"""
+Local stand-ins for the upstream APIs the analysis pipeline calls.
+
+One aiohttp app serves:
+
+  POST /rpc                    Helius / Solana JSON-RPC (single calls and batches)
+  GET  /token/holders          Solscan holder distribution
+  GET  /raydium/pools.json     Raydium liquidity pool dump
+  GET  /tokenlist.json         Solana token list
+
+Responses are derived deterministically from the wallet / mint, so runs are
+repeatable. Latency, jitter, error and throttle rates are configurable.
+"""
+import json
+import random
+import asyncio
+import hashlib
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+LAMPORTS_PER_SOL = 1_000_000_000
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 20.0          # base latency of every HTTP response
+    jitter_ms: float = 10.0           # uniform extra latency on top of the base
+    slow_rate: float = 0.0            # fraction of responses delayed by slow_ms (tail latency)
+    slow_ms: float = 500.0
+    error_rate: float = 0.0           # fraction of responses answered with HTTP 500
+    throttle_rate: float = 0.0        # fraction of responses answered with HTTP 429
+    retry_after: float = 0.0          # Retry-After seconds sent with 429s
+    tokens_per_wallet: int = 20
+    txs_per_wallet: int = 50
+    mint_universe: int = 2000         # distinct mints wallets draw their holdings from
+    pools: int = 5000
+    token_list_size: int = 5000
+    seed: int = 7
+
+
+def _digest(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def mint_address(index: int) -> str:
+    return f"BenchMint{index:035d}"
+
+
+class MockUpstreams:
+    """Serves every mocked upstream from one local port and counts the traffic."""
+
+    def __init__(self, config: Optional[MockConfig] = None) -> None:
+        self.config = config or MockConfig()
+        self.requests: Dict[str, int] = {}
+        self.rpc_calls: Dict[str, int] = {}
+        self._random = random.Random(self.config.seed)
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/rpc", self.rpc)
+        app.router.add_get("/token/holders", self.holders)
+        app.router.add_get("/raydium/pools.json", self.raydium)
+        app.router.add_get("/tokenlist.json", self.token_list)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def env(self) -> Dict[str, str]:
+        """Environment variables that point the application at these mocks."""
+        return {
+            "SOLANA_RPC_URLS": f"{self.base_url}/rpc",
+            "SOLSCAN_API_URL": self.base_url,
+            "RAYDIUM_API_URL": f"{self.base_url}/raydium/pools.json",
+            "TOKEN_LIST_URL": f"{self.base_url}/tokenlist.json",
+            # Keep runs offline: summaries use the template instead of a real model
+            "OLLAMA_API_URL": "",
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"requests": dict(self.requests), "rpc_calls": dict(self.rpc_calls), "config": asdict(self.config)}
+
+    # -- shared behaviour ----------------------------------------------------
+
+    async def _delay_or_fail(self, route: str) -> Optional[web.Response]:
+        self.requests[route] = self.requests.get(route, 0) + 1
+        c = self.config
+        delay = c.latency_ms + self._random.uniform(0, c.jitter_ms)
+        if c.slow_rate and self._random.random() < c.slow_rate:
+            delay += c.slow_ms
+        await asyncio.sleep(delay / 1000)
+        roll = self._random.random()
+        if roll < c.error_rate:
+            return web.Response(status=500, text="mock upstream error")
+        if roll < c.error_rate + c.throttle_rate:
+            return web.Response(status=429, headers={"Retry-After": str(c.retry_after)}, text="mock rate limit")
+        return None
+
+    def _holdings(self, wallet: str) -> List[int]:
+        rng = random.Random(_digest(wallet))
+        count = min(self.config.tokens_per_wallet, self.config.mint_universe)
+        return rng.sample(range(self.config.mint_universe), count)
+
+    # -- JSON-RPC -------------------------------------------------------------
+
+    async def rpc(self, request: web.Request) -> web.Response:
+        failure = await self._delay_or_fail("rpc")
+        if failure is not None:
+            return failure
+        body = await request.json()
+        if isinstance(body, list):
+            return web.json_response([self._rpc_call(call) for call in body])
+        return web.json_response(self._rpc_call(body))
+
+    def _rpc_call(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        method = call.get("method")
+        params = call.get("params") or []
+        self.rpc_calls[method] = self.rpc_calls.get(method, 0) + 1
+        handler = getattr(self, f"_rpc_{method}", None)
+        if handler is None:
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": -32601, "message": "Method not found"}}
+        return {"jsonrpc": "2.0", "id": call.get("id"), "result": handler(params)}
+
+    def _rpc_getTokenAccountsByOwner(self, params: List[Any]) -> Dict[str, Any]:
+        wallet = params[0]
+        value = []
+        for index in self._holdings(wallet):
+            amount = (_digest(f"{wallet}:{index}") % 10_000_000) + 1
+            value.append({
+                "pubkey": f"BenchAta{index:036d}",
+                "account": {"data": {"parsed": {"info": {
+                    "mint": mint_address(index),
+                    "owner": wallet,
+                    "tokenAmount": {"amount": str(amount), "decimals": 6, "uiAmount": amount / 1e6},
+                }}}},
+            })
+        return {"context": {"slot": 1}, "value": value}
+
+    def _rpc_getSignaturesForAddress(self, params: List[Any]) -> List[Dict[str, Any]]:
+        wallet = params[0]
+        options = params[1] if len(params) > 1 else {}
+        total = self.config.txs_per_wallet
+        limit = options.get("limit", 1000)
+        start = int(options["before"].rsplit("-", 1)[1]) + 1 if options.get("before") else 0
+        stop = int(options["until"].rsplit("-", 1)[1]) if options.get("until") else total
+        return [
+            {"signature": f"{wallet}-{i}", "slot": 300_000_000 - i, "blockTime": 1_700_000_000 - i * 60,
+             "err": None, "memo": None}
+            for i in range(start, min(stop, start + limit, total))
+        ]
+
+    def _rpc_getTransaction(self, params: List[Any]) -> Dict[str, Any]:
+        signature = params[0]
+        wallet, _, index = signature.rpartition("-")
+        outflow = (_digest(signature) % 5) / 10
+        position = int(index) if index.isdigit() else 0
+        return {
+            "slot": 300_000_000 - position,
+            "blockTime": 1_700_000_000 - position * 60,
+            "transaction": {"message": {"accountKeys": [{"pubkey": wallet}, {"pubkey": "BenchCounterparty"}]}},
+            "meta": {
+                "fee": 5000,
+                "err": None,
+                "preBalances": [100 * LAMPORTS_PER_SOL, 0],
+                "postBalances": [int((100 - outflow) * LAMPORTS_PER_SOL), int(outflow * LAMPORTS_PER_SOL)],
+                "preTokenBalances": [],
+                "postTokenBalances": [],
+            },
+        }
+
+    def _rpc_getSlot(self, params: List[Any]) -> int:
+        # Every mocked transaction (slots counting down from 300M) is finalized
+        return 300_000_100
+
+    def _rpc_getMultipleAccounts(self, params: List[Any]) -> Dict[str, Any]:
+        value = []
+        for key in params[0]:
+            authority = None if _digest(key) % 3 == 0 else "BenchMintAuthority"
+            value.append({"data": {"parsed": {"type": "mint", "info": {
+                "mintAuthority": authority, "freezeAuthority": None, "decimals": 6, "supply": "1000000000000",
+            }}}, "owner": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"})
+        return {"context": {"slot": 1}, "value": value}
+
+    def _rpc_getAccountInfo(self, params: List[Any]) -> Dict[str, Any]:
+        return {"context": {"slot": 1}, "value": self._rpc_getMultipleAccounts([[params[0]]])["value"][0]}
+
+    # -- REST upstreams -------------------------------------------------------
+
+    async def holders(self, request: web.Request) -> web.Response:
+        failure = await self._delay_or_fail("solscan")
+        if failure is not None:
+            return failure
+        mint = request.query.get("tokenAddress", "")
+        rng = random.Random(_digest(mint))
+        return web.json_response([{"amount": rng.randint(1, 1_000_000)} for _ in range(10)])
+
+    async def raydium(self, request: web.Request) -> web.Response:
+        failure = await self._delay_or_fail("raydium")
+        if failure is not None:
+            return failure
+        rng = random.Random(self.config.seed)
+        universe = self.config.mint_universe
+        pools = [
+            {
+                "id": f"BenchPool{i:035d}",
+                "baseMint": mint_address(rng.randrange(universe)),
+                "quoteMint": "So11111111111111111111111111111111111111112",
+                "lpMint": f"BenchLp{i:037d}",
+                "liquidity": rng.choice([0, 500, 5_000, 250_000]),
+            }
+            for i in range(self.config.pools)
+        ]
+        half = len(pools) // 2
+        return web.Response(
+            body=json.dumps({"official": pools[:half], "unOfficial": pools[half:]}).encode(),
+            content_type="application/json",
+        )
+
+    async def token_list(self, request: web.Request) -> web.Response:
+        failure = await self._delay_or_fail("tokenlist")
+        if failure is not None:
+            return failure
+        tokens = [
+            {"address": mint_address(i), "name": f"Bench Token {i}", "symbol": f"BT{i}", "decimals": 6, "logoURI": ""}
+            for i in range(min(self.config.token_list_size, self.config.mint_universe))
+        ]
+        return web.json_response({"name": "bench", "tokens": tokens})
@@ -0,0 +1,285 @@
+"""
+Offline load benchmark for the wallet analysis pipeline.
+
+Starts the mock upstreams, points the application at them through the
+environment, then drives one target at ramping concurrency and reports
+throughput and p50/p95/p99 latency per stage. Results are written as JSON
+(tagged with the git commit) for ``benchmarks.compare``.
+
+    python -m benchmarks.run --target coordinator --concurrency 1,4,16,64
+    python -m benchmarks.run --target api --stage-seconds 20 --latency-ms 50 --slow-rate 0.02
+    python -m benchmarks.run --target bulk --bulk-size 200
+
+Targets:
+    coordinator  call coordinator_agent() in-process
+    api          POST /api/analyze_wallet over HTTP (uvicorn in-process)
+    stream       GET /api/analyze_wallet/stream, also reports time to first event
+    bulk         POST /api/analyze_wallets with --bulk-size wallets per request
+"""
+import os
+import sys
+import json
+import time
+import logging
+import asyncio
+import argparse
+import platform
+import subprocess
+import tempfile
+from dataclasses import fields
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+
+from .mock_upstreams import MockConfig, MockUpstreams
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+TARGETS = ("coordinator", "api", "stream", "bulk")
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(concurrency: int, elapsed: float, latencies: List[float], errors: int,
+              units: int, first_byte: Optional[List[float]] = None) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    stage = {
+        "concurrency": concurrency,
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "wallets_per_s": round(units / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 1),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 1),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1) if ordered else 0.0,
+    }
+    if first_byte:
+        ordered = sorted(first_byte)
+        stage["ttfb_p50_ms"] = round(percentile(ordered, 50) * 1000, 1)
+        stage["ttfb_p95_ms"] = round(percentile(ordered, 95) * 1000, 1)
+    return stage
+
+
+def git_commit() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "--short", "HEAD") or "unknown", "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+    except OSError:
+        return {"commit": "unknown", "dirty": False}
+
+
+class Bench:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.mocks = MockUpstreams(MockConfig(**{
+            f.name: getattr(args, f.name) for f in fields(MockConfig) if getattr(args, f.name, None) is not None
+        }))
+        self._wallet_counter = 0
+        self.base_url = ""
+        self._server = None
+        self._server_task: Optional[asyncio.Task] = None
+
+    def next_wallet(self) -> str:
+        i = self._wallet_counter
+        self._wallet_counter += 1
+        if self.args.wallet_pool:
+            i %= self.args.wallet_pool
+        return f"BenchWallet{i:033d}"
+
+    async def setup(self) -> None:
+        await self.mocks.start()
+        scratch = tempfile.mkdtemp(prefix="mastra-bench-")
+        os.environ.update(self.mocks.env())
+        os.environ["MASTRA_CACHE_DIR"] = scratch
+        os.environ["WALLET_STATE_DB"] = os.path.join(scratch, "wallet_state.sqlite3")
+        os.environ.setdefault("UPSTREAM_RATE", str(self.args.upstream_rate))
+        if not self.args.result_cache:
+            os.environ["RESULT_CACHE_TTL"] = "0"
+        if self.args.no_mint_cache:
+            for feature in ("HOLDERS", "AUTHORITY", "LIQUIDITY", "LP_LOCK"):
+                os.environ[f"MINT_{feature}_TTL"] = "0"
+        if self.args.no_tx_store:
+            os.environ["TX_STORE_ENABLED"] = "0"
+        # The application reads its configuration at import time, so import only now
+        for path in (ROOT, os.path.join(ROOT, "src")):
+            if path not in sys.path:
+                sys.path.insert(0, path)
+        from mastra import main
+        self.main = main
+        logging.getLogger().setLevel(self.args.log_level)
+        await main.startup()
+        await main.get_warmup().wait()
+        if self.args.target != "coordinator":
+            await self.start_server()
+
+    async def start_server(self) -> None:
+        import uvicorn
+        config = uvicorn.Config(self.main.app, host="127.0.0.1", port=0, log_level="warning", lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._server_task = asyncio.ensure_future(self._server.serve())
+        while not self._server.started:
+            await asyncio.sleep(0.05)
+        port = self._server.servers[0].sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    async def teardown(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+            await self._server_task
+        await self.main.shutdown()
+        await self.mocks.stop()
+
+    # -- one operation per target (returns (units, time_to_first_byte)) ----
+
+    async def op_coordinator(self, session: aiohttp.ClientSession):
+        result = await self.main.coordinator_agent(self.next_wallet())
+        if not result or "trust_score" not in result:
+            raise RuntimeError("incomplete result")
+        return 1, None
+
+    async def op_api(self, session: aiohttp.ClientSession):
+        async with session.post(f"{self.base_url}/api/analyze_wallet", json={"wallet": self.next_wallet()}) as resp:
+            await resp.read()
+            if resp.status != 200:
+                raise RuntimeError(f"HTTP {resp.status}")
+        return 1, None
+
+    async def op_stream(self, session: aiohttp.ClientSession):
+        started = time.perf_counter()
+        first = None
+        async with session.get(f"{self.base_url}/api/analyze_wallet/stream", params={"wallet": self.next_wallet()}) as resp:
+            if resp.status != 200:
+                raise RuntimeError(f"HTTP {resp.status}")
+            async for line in resp.content:
+                if first is None:
+                    first = time.perf_counter() - started
+                if b'"event": "error"' in line:
+                    raise RuntimeError("stream error event")
+        return 1, first
+
+    async def op_bulk(self, session: aiohttp.ClientSession):
+        wallets = [self.next_wallet() for _ in range(self.args.bulk_size)]
+        errors = 0
+        async with session.post(f"{self.base_url}/api/analyze_wallets", json={"wallets": wallets}) as resp:
+            if resp.status != 200:
+                raise RuntimeError(f"HTTP {resp.status}")
+            async for line in resp.content:
+                errors += b'"error"' in line
+        if errors:
+            raise RuntimeError(f"{errors} wallets failed")
+        return len(wallets), None
+
+    # -- stages ---------------------------------------------------------------
+
+    async def stage(self, concurrency: int, op: Callable[[aiohttp.ClientSession], Awaitable]) -> Dict[str, Any]:
+        latencies: List[float] = []
+        first_bytes: List[float] = []
+        errors = 0
+        units = 0
+        deadline = time.perf_counter() + self.args.stage_seconds
+
+        async def worker(session: aiohttp.ClientSession) -> None:
+            nonlocal errors, units
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    done, first = await op(session)
+                except Exception:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+                units += done
+                if first is not None:
+                    first_bytes.append(first)
+
+        timeout = aiohttp.ClientTimeout(total=self.args.request_timeout)
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+        return summarize(concurrency, elapsed, latencies, errors, units, first_bytes)
+
+    async def run(self) -> Dict[str, Any]:
+        await self.setup()
+        try:
+            op = getattr(self, f"op_{self.args.target}")
+            stages = []
+            for concurrency in self.args.concurrency:
+                stage = await self.stage(concurrency, op)
+                stages.append(stage)
+                print_stage(stage)
+            upstream = self.main.get_upstream_client().stats()
+        finally:
+            await self.teardown()
+        return dict(
+            git_commit(),
+            timestamp=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            python=platform.python_version(),
+            target=self.args.target,
+            args={k: v for k, v in vars(self.args).items() if k != "out"},
+            stages=stages,
+            mock=self.mocks.stats(),
+            upstream={host: s["requests"] for host, s in upstream.get("hosts", {}).items()},
+        )
+
+
+def print_stage(stage: Dict[str, Any]) -> None:
+    line = (
+        f"c={stage['concurrency']:<4} req={stage['requests']:<6} err={stage['errors']:<4} "
+        f"rps={stage['throughput_rps']:<8} wallets/s={stage['wallets_per_s']:<8} "
+        f"p50={stage['p50_ms']}ms p95={stage['p95_ms']}ms p99={stage['p99_ms']}ms"
+    )
+    if "ttfb_p50_ms" in stage:
+        line += f" ttfb_p50={stage['ttfb_p50_ms']}ms"
+    print(line, flush=True)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=TARGETS, default="coordinator")
+    parser.add_argument("--concurrency", type=lambda s: [int(x) for x in s.split(",")], default=[1, 4, 16, 64],
+                        help="comma-separated concurrency levels, run in order")
+    parser.add_argument("--stage-seconds", type=float, default=10.0)
+    parser.add_argument("--request-timeout", type=float, default=120.0)
+    parser.add_argument("--wallet-pool", type=int, default=0,
+                        help="cycle through this many wallets (0 = every request uses a new wallet)")
+    parser.add_argument("--bulk-size", type=int, default=100)
+    parser.add_argument("--result-cache", action="store_true", help="keep the analysis result cache enabled")
+    parser.add_argument("--no-mint-cache", action="store_true", help="disable the cross-wallet per-mint forensics cache")
+    parser.add_argument("--no-tx-store", action="store_true", help="disable the local finalized-transaction store")
+    parser.add_argument("--upstream-rate", type=float, default=1e6,
+                        help="per-host request rate allowed by the limiter (default: effectively unlimited)")
+    defaults = MockConfig()
+    for f in fields(MockConfig):
+        parser.add_argument(f"--{f.name.replace('_', '-')}", type=type(getattr(defaults, f.name)), default=None,
+                            help=f"mock upstream {f.name} (default {getattr(defaults, f.name)})")
+    parser.add_argument("--log-level", default="WARNING", help="application log level during the run")
+    parser.add_argument("--out", default=RESULTS_DIR, help="directory for the results JSON ('' to skip saving)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    result = asyncio.run(Bench(args).run())
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        path = os.path.join(args.out, f"{args.target}-{stamp}-{result['commit']}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved {path}")
+
+
+if __name__ == "__main__":
+    main()
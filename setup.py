@@ -9,7 +9,8 @@ setup(
         "fastapi",
         "uvicorn",
         "aiohttp",
-        "pydantic"
+        "pydantic",
+        "numpy>=1.21,<3.0"
     ],
     python_requires=">=3.7",
 )
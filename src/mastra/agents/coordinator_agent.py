@@ -2,178 +2,374 @@ import os
 import asyncio
 import sys
 import time
-from typing import Dict, Any
+import hashlib
+from typing import Dict, Any, AsyncIterator, List, Optional
 
-# Import from mastra.tools with absolute path
-from mastra.tools.solana_data_fetcher import (
-    get_wallet_tokens,
-    get_wallet_activity,
+from ..tools.solana_data_fetcher import (
+    get_wallet_holdings,
     get_token_metadata as get_token_meta
 )
+from ..tools.tx_history import iter_wallet_history
+from ..tools.llm_client import LLMError, clean_completion, get_llm_client
+from ..tools.request_memo import current_memo, request_scope
+from ..cache.wallet_state import get_wallet_state_store, reusable_features
+from ..cache.result_cache import fingerprint, get_analysis_id_cache
+from ..metrics import track_awaitable, track_stage
 
-# Placeholder imports for specialist agents (to be implemented)
-# from .transaction_monitor import analyze_transactions
-# from .token_forensics import analyze_tokens
-# from .risk_advisor import advise_risk
+from .transaction_monitor import analyze_transaction_stream
+from .token_forensics import ForensicsMemo, iter_token_forensics, token_address
+from .risk_advisor import advise_risk
+from .scoring import get_risk_scorer
 
-# LLM call utility (mocked for now)
-async def call_llm(prompt: str) -> str:
-    # TODO: Replace with real LLM call (Ollama/OpenAI)
-    return f"[LLM OUTPUT for: {prompt[:60]}...]"
+# Max holdings analyzed per wallet
+MAX_TOKENS_PER_WALLET = int(os.getenv("MAX_TOKENS_PER_WALLET", "5"))
+# Most recent transactions replayed by the transaction monitor per analysis
+TX_MONITOR_LIMIT = int(os.getenv("TX_MONITOR_LIMIT", "100"))
 
-async def coordinator_agent(wallet_address: str) -> Dict[str, Any]:
-    """
-    Orchestrates analysis of a Solana wallet by invoking MCP tools and specialist agents.
-    Returns combined summary, per-agent detail, and trust score.
-    """
-    # Step 1: Fetch tokens and activity
-    tokens_task = asyncio.create_task(get_wallet_tokens(wallet_address))
-    activity_task = asyncio.create_task(get_wallet_activity(wallet_address))
-    tokens_result = await tokens_task
-    activity_result = await activity_task
-
-    # Step 2: For each token, fetch metadata (limit to 5 for demo)
-    tokens = tokens_result.get("tokens", [])
-    token_metas = {}
-    for t in tokens[:5]:
+# Riskiest holdings described to the LLM
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "8"))
+
+async def fetch_token_metas(tokens: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fetch metadata for every token concurrently; failures fall back to placeholders."""
+    async def fetch(addr: str):
         try:
-            addr = t.get("tokenAddress") or t.get("token_address")
-            if addr:
-                meta = await get_token_meta(addr)
-                token_metas[addr] = meta
+            return addr, await get_token_meta(addr)
         except Exception as e:
             print(f"[WARNING] Failed to fetch metadata for token {addr}: {str(e)}")
-            token_metas[addr] = {
-                "risk": 50,  # Default risk score
-                "reason": "Failed to fetch token metadata",
-                "name": "Unknown",
-                "symbol": "UNKNOWN",
-                "liquidity": "Unknown",
-                "holders": 0,
-                "is_verified": False
-            }
-
-    # Step 3: Generate dynamic analysis based on wallet address and current time
-    import time
-    import hashlib
-    
-    # Create a simple hash of the wallet address to generate deterministic but unique results
-    wallet_hash = int(hashlib.sha256(wallet_address.encode('utf-8')).hexdigest(), 16) % 1000
-    current_time = int(time.time())
-    
-    # Generate dynamic risk scores based on wallet hash and time
-    base_risk_score = (wallet_hash % 70) + 10  # 10-80 range
-    risk_variation = (current_time // 60) % 20  # Change every minute
-    dynamic_risk_score = min(100, max(0, base_risk_score + (risk_variation - 10)))
-    
-    # Determine risk level
-    if dynamic_risk_score < 30:
-        risk_level = "LOW"
-    elif dynamic_risk_score < 70:
-        risk_level = "MEDIUM"
+            return addr, {"meta": {"name": "Unknown", "symbol": "UNKNOWN"}}
+
+    addrs = list(dict.fromkeys(a for a in (token_address(t) for t in tokens) if a))
+    return dict(await asyncio.gather(*(fetch(addr) for addr in addrs)))
+
+def format_token_entry(addr: str, forensics: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape one token's forensics the way the dashboard expects."""
+    name = meta.get("name") or forensics.get("token_name") or "Unknown"
+    liquidity_usd = forensics.get("liquidity_usd")
+    return {
+        "risk_score": forensics.get("risk_score", 0),
+        "name": name,
+        "symbol": meta.get("symbol") or forensics.get("symbol") or "UNKNOWN",
+        "liquidity": f"${liquidity_usd:,.0f}" if isinstance(liquidity_usd, (int, float)) else "Unknown",
+        "holders": 0,
+        "is_verified": name not in ("Unknown", "Unknown Token"),
+        "reason": forensics.get("reason", "No issues detected"),
+        "top_holder_pct": forensics.get("top_holder_pct"),
+        "mint_authority": forensics.get("mint_authority"),
+        "is_lp_locked": forensics.get("is_lp_locked"),
+        "solscan_link": forensics.get("solscan_link", f"https://solscan.io/token/{addr}"),
+    }
+
+def format_transaction_monitor(tx_analysis: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "suspicious": tx_analysis.get("suspicious", False),
+        "summary": tx_analysis.get("summary", "No issues detected"),
+        "risk_score": 0,  # Default value, should be calculated
+        "checked_txs": tx_analysis.get("checked_txs", 0),
+        "new_txs": tx_analysis.get("new_txs", tx_analysis.get("checked_txs", 0)),
+    }
+
+def format_risk_advisor(risk_advice: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "score": risk_advice.get("risk_score", 0),
+        "advice": risk_advice.get("recommended_next_steps", "No specific advice available"),
+        "reason": risk_advice.get("risk_reason", ""),
+        "risk_level": risk_advice.get("overall_risk", "Unknown").upper(),
+    }
+
+def merge_transaction_verdict(previous: Dict[str, Any], latest: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Combine the stored verdict for older history with the analysis of new transactions.
+
+    A finding is sticky: a clean pass over new transactions keeps the earlier suspicious verdict.
+    """
+    if latest.get("suspicious") or not previous:
+        merged = dict(latest)
     else:
-        risk_level = "HIGH"
-    
-    # Generate dynamic analysis
-    suspicious = (wallet_hash % 5) == 0  # 20% chance of being suspicious
-    
-    tx_analysis = {
-        "suspicious": suspicious,
-        "summary": "Suspicious activity detected." if suspicious else "No suspicious activity detected.",
-        "risk_score": dynamic_risk_score + (40 if suspicious else 0)
+        merged = dict(previous)
+    merged.pop("complete", None)
+    merged["checked_txs"] = (previous or {}).get("checked_txs", 0) + latest.get("checked_txs", 0)
+    merged["new_txs"] = latest.get("checked_txs", 0)
+    return merged
+
+def next_cursor(cursor: Optional[str], latest: Dict[str, Any]) -> Optional[str]:
+    """
+    The signature the next incremental run streams back to.
+
+    It only moves to the newest signature seen once the pass reached the old
+    cursor, so transactions between them are never skipped. A first run
+    (no cursor) sets the baseline.
+    """
+    if cursor is not None and not latest.get("complete"):
+        return cursor
+    return latest.get("newest_signature") or cursor
+
+def summary_features(
+    wallet_address: str,
+    risk_advice: Dict[str, Any],
+    tx_analysis: Dict[str, Any],
+    token_entries: Dict[str, Dict[str, Any]],
+) -> Dict[str, Any]:
+    """The analysis facts the LLM summary is written from; unchanged facts reuse the cached summary."""
+    riskiest = sorted(token_entries.values(), key=lambda t: (-(t.get("risk_score") or 0), t.get("symbol") or ""))
+    return {
+        "wallet": wallet_address,
+        "risk_level": risk_advice.get("overall_risk", "Unknown").upper(),
+        "risk_score": risk_advice.get("risk_score", 0),
+        "tx_suspicious": bool(tx_analysis.get("suspicious")),
+        "tx_summary": tx_analysis.get("summary") if tx_analysis.get("suspicious") else None,
+        "token_count": len(token_entries),
+        "tokens": [
+            [t.get("symbol"), t.get("name"), t.get("risk_score", 0), t.get("reason")]
+            for t in riskiest[:SUMMARY_MAX_TOKENS]
+        ],
     }
-    
-    # Generate dynamic token forensics
-    token_forensics = {}
-    for i, addr in enumerate(tokens[:5]):
-        if not isinstance(addr, str):
-            addr = str(addr)
-        # Create a hash object and get the integer hash
-        addr_hash = int(hashlib.sha256(addr.encode('utf-8')).hexdigest(), 16)
-        token_hash = addr_hash % 100
-        risk = (dynamic_risk_score + token_hash) % 100
-        reasons = [
-            "Low holder concentration.",
-            "High trading volume.",
-            "New token with limited history.",
-            "High volatility detected.",
-            f"Risk score: {risk}/100"
-        ]
-        token_forensics[addr] = {
-            "risk": risk,
-            "reason": reasons[i % len(reasons)],
-            "name": f"Token-{i+1}",
-            "symbol": f"TKN{i+1}",
-            "liquidity": f"${(addr_hash % 1000000):,}",
-            "holders": (addr_hash % 10000) + 1000,
-            "is_verified": (addr_hash % 3) == 0
-        }
-    
-    # Generate dynamic risk advice
-    advice_options = [
-        ("No urgent action needed.", 0),
-        ("Monitor for unusual activity.", 1),
-        ("Consider reviewing recent transactions.", 2),
-        ("High risk detected. Proceed with caution.", 3),
-        (f"Risk level: {risk_level}. {dynamic_risk_score}/100", 4)
+
+def build_summary_prompt(features: Dict[str, Any]) -> str:
+    wallet = features["wallet"]
+    lines = [
+        "You are a Solana DeFi risk analyst. In 3-4 plain sentences, explain to a non-expert",
+        f"how risky wallet {wallet[:6]}...{wallet[-4:]} is and what they should watch out for.",
+        "Only use the facts below; do not invent numbers, tokens or events.",
+        "",
+        f"Overall risk: {features['risk_level']} ({features['risk_score']}/100)",
+        f"Tokens analyzed: {features['token_count']}",
+        f"Suspicious transactions: {features['tx_summary'] if features['tx_suspicious'] else 'none detected'}",
     ]
-    
-    risk_advice = {
-        "overall_risk": risk_level.lower(),
-        "score": dynamic_risk_score,
-        "advice": advice_options[hash(wallet_address) % len(advice_options)][0]
-    }
+    if features["tokens"]:
+        lines.append("Riskiest tokens:")
+        for symbol, name, risk_score, reason in features["tokens"]:
+            lines.append(f"- {symbol} ({name}): risk {risk_score}/100, {reason}")
+    return "\n".join(lines)
+
+def build_summary(
+    wallet_address: str,
+    risk_advice: Dict[str, Any],
+    tx_analysis: Dict[str, Any],
+    narrative: Optional[str] = None,
+) -> str:
+    """Summary for the combined report: the LLM ``narrative`` if available, else the template text."""
+    risk_level = risk_advice.get("overall_risk", "Unknown").upper()
+    risk_score = risk_advice.get("risk_score", 0)
+    wallet_hash = int(hashlib.sha256(wallet_address.encode('utf-8')).hexdigest(), 16) % 1000
+    current_time = int(time.time())
 
-    # Step 4: Generate dynamic LLM-like summary
     llm_summary = f"""Wallet Analysis Summary for {wallet_address[:6]}...{wallet_address[-4:]}
 
-Risk Assessment: {risk_level} ({dynamic_risk_score}/100)
+Risk Assessment: {risk_level} ({risk_score}/100)
 
 This wallet shows {risk_level.lower()} risk indicators based on our analysis.
 """
-    
-    if risk_level == "LOW":
+
+    if narrative:
+        llm_summary += f"\n{narrative}"
+    elif risk_level == "LOW":
         llm_summary += "No significant issues detected in the wallet's activity or token holdings."
     elif risk_level == "MEDIUM":
         llm_summary += "Some risk factors were identified that may require attention."
     else:
         llm_summary += "Multiple high-risk indicators were detected. Exercise caution when interacting with this wallet."
-    
+
+    if tx_analysis.get("suspicious") and not narrative:
+        llm_summary += f"\n\n{tx_analysis.get('summary')}"
+
     llm_summary += f"""
 
 Last Updated: {time.ctime(current_time)}
 Analysis ID: {wallet_hash}-{current_time}"""
+    return llm_summary
+
+def format_token_list(tokens: List[Dict[str, Any]], token_metas: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Holdings with their display metadata, sent before any forensics are available."""
+    entries = []
+    for token in tokens:
+        addr = token_address(token)
+        if not addr:
+            continue
+        meta = token_metas.get(addr, {}).get("meta", {})
+        entries.append({
+            "address": addr,
+            "name": meta.get("name") or "Unknown",
+            "symbol": meta.get("symbol") or "UNKNOWN",
+            "amount": token.get("amount"),
+            "ui_amount": token.get("ui_amount"),
+        })
+    return entries
+
+async def coordinator_stream(
+    wallet_address: str,
+    forensics_memo: Optional[ForensicsMemo] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Progressive variant of coordinator_agent.
+
+    Yields ``{"event": ..., "data": ...}`` dicts in this order: ``tokens``
+    (the holdings), one ``token_forensics`` per token as soon as it is
+    scored, ``transaction_monitor``, ``summary_delta`` chunks while the LLM
+    writes the summary, and finally ``result`` carrying the same payload
+    coordinator_agent returns (its ``combined_summary`` is authoritative:
+    if the LLM fails midway it falls back to the template). Closing the
+    generator early cancels any probes and history paging still in flight.
+    Identical upstream calls within the analysis run once (request_memo);
+    the result's ``upstream_calls`` reports how many were deduplicated.
+    """
+    events = _analysis_events(wallet_address, forensics_memo)
+    try:
+        with request_scope(), track_stage("total"):
+            async for event in events:
+                yield event
+    finally:
+        await events.aclose()
+
+async def _analysis_events(
+    wallet_address: str,
+    forensics_memo: Optional[ForensicsMemo] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    # Stages are timed into /api/metrics; "forensics" also includes the time
+    # the consumer spends handling the events it yields.
+
+    # Step 0: Load persisted state from the previous analysis of this wallet
+    state_store = get_wallet_state_store()
+    with track_stage("state_load"):
+        state = await state_store.load(wallet_address) or {}
+    cursor = state.get("newest_signature")
+
+    # Step 1: Fetch tokens while the transaction monitor streams history newer than the cursor.
+    # The first run checks the newest TX_MONITOR_LIMIT transactions; later runs check every
+    # transaction back to the cursor (no cap, no early stop), so advancing it never skips any.
+    if cursor is None:
+        tx_stream = analyze_transaction_stream(iter_wallet_history(wallet_address, limit=TX_MONITOR_LIMIT))
+    else:
+        tx_stream = analyze_transaction_stream(iter_wallet_history(wallet_address, until=cursor), stop_at_finding=False)
+    tx_task = asyncio.ensure_future(track_awaitable("tx_monitor", tx_stream))
+    try:
+        with track_stage("token_fetch"):
+            holdings = await get_wallet_holdings(wallet_address)
+
+        # Step 2: Fetch metadata for every analyzed holding concurrently
+        tokens = holdings.tokens(MAX_TOKENS_PER_WALLET)
+        with track_stage("metadata"):
+            token_metas = await fetch_token_metas(tokens)
+        yield {
+            "event": "tokens",
+            "data": {"wallet": wallet_address, "tokens": format_token_list(tokens, token_metas)},
+        }
+
+        # Step 3: Token forensics (bounded fan-out) alongside the transaction monitor.
+        # Holdings whose balance is unchanged since the last run reuse their stored features.
+        stored_tokens = state.get("tokens", {})
+        reused = {}
+        changed = []
+        for token in tokens:
+            addr = token_address(token)
+            features = reusable_features(stored_tokens.get(addr), token.get("amount"))
+            if features is not None:
+                reused[addr] = features
+            else:
+                changed.append(token)
+        # Stored features were scored by the config of their day; rescore them in one pass
+        for addr, risk in zip(list(reused), get_risk_scorer().rescore(list(reused.values()))):
+            if reused[addr].get("risk_score") != risk:
+                reused[addr] = dict(reused[addr], risk_score=risk)
+
+        scored = {}
+
+        def token_event(addr: str, forensics: Dict[str, Any]) -> Dict[str, Any]:
+            scored[addr] = forensics
+            entry = format_token_entry(addr, forensics, token_metas.get(addr, {}).get("meta", {}))
+            return {"event": "token_forensics", "data": dict(entry, address=addr, reused=addr in reused)}
+
+        with track_stage("forensics"):
+            for addr, forensics in reused.items():
+                yield token_event(addr, forensics)
+            forensics_stream = iter_token_forensics(changed, token_metas, memo=forensics_memo)
+            try:
+                async for addr, forensics in forensics_stream:
+                    yield token_event(addr, forensics)
+            finally:
+                await forensics_stream.aclose()
+
+        # Time the critical path spends blocked on the monitor after forensics finished
+        with track_stage("tx_wait"):
+            latest_tx = await tx_task
+        tx_analysis = merge_transaction_verdict(state.get("transaction_monitor"), latest_tx)
+        yield {"event": "transaction_monitor", "data": format_transaction_monitor(tx_analysis)}
+    finally:
+        if not tx_task.done():
+            tx_task.cancel()
+
+    # Report in wallet order rather than completion order
+    token_forensics = {
+        addr: scored[addr]
+        for addr in dict.fromkeys(token_address(t) for t in tokens)
+        if addr in scored
+    }
+    with track_stage("scoring"):
+        risk_advice = await advise_risk(token_forensics)
+
+    # Persist the cursor, balances and features for the next incremental run
+    now = time.time()
+    holdings = {}
+    for token in tokens:
+        addr = token_address(token)
+        if not addr:
+            continue
+        features = token_forensics.get(addr)
+        if features is not None and "error" in features:
+            features = None  # failed probes are retried next time
+        updated_at = stored_tokens[addr].get("updated_at") if addr in reused else now
+        holdings[addr] = {"amount": token.get("amount"), "features": features, "updated_at": updated_at}
+    with track_stage("state_save"):
+        await state_store.save(wallet_address, next_cursor(cursor, latest_tx), tx_analysis, holdings)
+
+    token_entries = {
+        addr: format_token_entry(addr, forensics, token_metas.get(addr, {}).get("meta", {}))
+        for addr, forensics in token_forensics.items()
+    }
+
+    # Step 4: Summary, streamed from the LLM (cached per unchanged analysis) with the template as fallback
+    features = summary_features(wallet_address, risk_advice, tx_analysis, token_entries)
+    parts = []
+    with track_stage("summary"):
+        try:
+            async for chunk in get_llm_client().stream(build_summary_prompt(features), features):
+                parts.append(chunk)
+                yield {"event": "summary_delta", "data": {"text": chunk}}
+        except LLMError:
+            parts = []
+    llm_summary = build_summary(wallet_address, risk_advice, tx_analysis, clean_completion("".join(parts)) or None)
 
     # Step 5: Compose output with frontend-expected structure
+    risk_score = risk_advice.get("risk_score", 0)
     result = {
         "wallet": wallet_address,
         "combined_summary": llm_summary,
         "detailed": {
-            "token_forensics": {
-                addr: {
-                    "risk_score": meta.get("risk", 0) * 10,  # Convert 0-10 to 0-100 scale
-                    "name": "Unknown",
-                    "symbol": "UNKNOWN",
-                    "liquidity": "Unknown",
-                    "holders": 0,
-                    "is_verified": False,
-                    "reason": meta.get("reason", "No issues detected")
-                } for addr, meta in token_forensics.items()
-            },
-            "transaction_monitor": {
-                "suspicious": tx_analysis.get("suspicious", False),
-                "summary": tx_analysis.get("summary", "No issues detected"),
-                "risk_score": 0  # Default value, should be calculated
-            },
-            "risk_advisor": {
-                "score": risk_advice.get("score", 0),
-                "advice": risk_advice.get("advice", "No specific advice available"),
-                "risk_level": risk_advice.get("overall_risk", "Unknown").upper()
-            }
+            "token_forensics": token_entries,
+            "transaction_monitor": format_transaction_monitor(tx_analysis),
+            "risk_advisor": format_risk_advisor(risk_advice),
         },
-        "trust_score": risk_advice.get("score", 0),
+        # The dashboard colours trust_score green above 70, so it is the inverse of the risk score
+        "trust_score": max(0, 100 - risk_score),
         "risk_rating": risk_advice.get("overall_risk", "UNKNOWN").upper()
     }
+    # Keep the result under its ID so /api/explain/batch can explain it on first lookup without a re-upload
+    result["analysis_id"] = fingerprint(result)
+    get_analysis_id_cache().put(result["analysis_id"], result)
+    memo = current_memo()
+    if memo is not None:
+        result["upstream_calls"] = memo.report()
+    yield {"event": "result", "data": result}
+
+async def coordinator_agent(wallet_address: str, forensics_memo: Optional[ForensicsMemo] = None) -> Dict[str, Any]:
+    """
+    Orchestrates analysis of a Solana wallet by invoking MCP tools and specialist agents.
+    Returns combined summary, per-agent detail, and trust score.
+    Pass a shared ``forensics_memo`` when analyzing many wallets so common mints are analyzed once.
+    """
+    result = None
+    async for event in coordinator_stream(wallet_address, forensics_memo=forensics_memo):
+        if event["event"] == "result":
+            result = event["data"]
     return result
 
 # Example FastAPI endpoint usage:
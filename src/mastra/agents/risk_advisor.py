@@ -1,25 +1,23 @@
 from typing import Dict, Any
 
+from .scoring import get_risk_scorer
+
+# Reason and recommended next steps for each wallet rating
+ADVICE = {
+    "High": ("Multiple tokens flagged as high risk.", "Consider withdrawing liquidity, monitor for rug pattern."),
+    "Medium": ("Some tokens show moderate risk features.", "Monitor wallet and avoid new deposits."),
+    "Low": ("No major risk factors detected.", "No urgent action needed."),
+}
+
 async def advise_risk(token_forensics: Dict[str, Any]) -> Dict[str, Any]:
     """
     Consumes forensic features and returns risk_score, reason, and recommended next steps.
     """
     # Aggregate risk scores
     scores = [t.get("risk_score", 0) for t in token_forensics.values()]
-    avg_score = sum(scores) / len(scores) if scores else 0
-    # Risk rating
-    if avg_score > 70:
-        rating = "High"
-        advice = "Consider withdrawing liquidity, monitor for rug pattern."
-        reason = "Multiple tokens flagged as high risk."
-    elif avg_score > 40:
-        rating = "Medium"
-        advice = "Monitor wallet and avoid new deposits."
-        reason = "Some tokens show moderate risk features."
-    else:
-        rating = "Low"
-        advice = "No urgent action needed."
-        reason = "No major risk factors detected."
+    # Risk rating (thresholds in scoring.ScoringConfig)
+    avg_score, rating = get_risk_scorer().rate(scores)
+    reason, advice = ADVICE[rating]
     return {
         "risk_score": int(avg_score),
         "risk_reason": reason,
@@ -0,0 +1,186 @@
+import os
+import json
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# JSON object (or path to a JSON file) overriding ScoringConfig fields
+RISK_SCORING_CONFIG = os.getenv("RISK_SCORING_CONFIG", "")
+
+RATINGS = ("Low", "Medium", "High")
+
+
+@dataclass(frozen=True)
+class ScoringConfig:
+    """Weights and thresholds of the token risk rules and the wallet rating."""
+
+    top_holder_pct_above: float = 40.0
+    top_holder_weight: int = 40
+    liquidity_usd_below: float = 1000.0
+    low_liquidity_weight: int = 30
+    renounced_mint_weight: int = 10
+    lp_unlocked_weight: int = 15
+    flag_weight: int = 20
+    flags: Tuple[str, ...] = ("High holder concentration", "Suspicious name")
+    max_score: int = 100
+    high_risk_above: float = 70.0
+    medium_risk_above: float = 40.0
+
+    @classmethod
+    def from_spec(cls, spec: str = RISK_SCORING_CONFIG) -> "ScoringConfig":
+        if not spec:
+            return cls()
+        if spec.lstrip().startswith("{"):
+            overrides = json.loads(spec)
+        else:
+            with open(spec, "r", encoding="utf-8") as f:
+                overrides = json.load(f)
+        known = {f.name for f in fields(cls)}
+        unknown = set(overrides) - known
+        if unknown:
+            raise ValueError(f"Unknown risk scoring settings: {', '.join(sorted(unknown))}")
+        if "flags" in overrides:
+            overrides["flags"] = tuple(overrides["flags"])
+        return cls(**overrides)
+
+
+@dataclass
+class TokenFeatures:
+    """Column arrays of the features the token rules read, one row per token position."""
+
+    top_holder_pct: np.ndarray
+    liquidity_usd: np.ndarray
+    mint_renounced: np.ndarray
+    lp_locked: np.ndarray
+    flagged: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Tuple[float, float, bool, bool, bool]]) -> "TokenFeatures":
+        table = np.array(rows, dtype=np.float64).reshape(-1, 5)
+        return cls(
+            top_holder_pct=table[:, 0],
+            liquidity_usd=table[:, 1],
+            mint_renounced=table[:, 2].astype(bool),
+            lp_locked=table[:, 3].astype(bool),
+            flagged=table[:, 4].astype(bool),
+        )
+
+    def __len__(self) -> int:
+        return len(self.top_holder_pct)
+
+
+class RiskScorer:
+    """
+    Vectorized token scoring and wallet rating.
+
+    Applies the same rules as the original per-token ``if`` chain, but to
+    whole columns at once, so scoring a batch costs a handful of NumPy
+    operations regardless of its size.
+
+    Freshly analyzed tokens (single-wallet and bulk alike) are scored one at
+    a time with ``score_row`` as their probes finish, because each score is
+    streamed out immediately and a wallet holds at most MAX_TOKENS_PER_WALLET
+    positions, too few for arrays to pay off. ``score_tokens`` serves the
+    batches: rescoring stored features and offline scoring of many rows.
+    """
+
+    def __init__(self, config: Optional[ScoringConfig] = None) -> None:
+        self.config = config or ScoringConfig()
+
+    def features(
+        self,
+        top_holder_pct: Any,
+        liquidity_usd: Any,
+        mint_authority: Any,
+        is_lp_locked: Any,
+        suspicious_flags: Iterable[str],
+    ) -> Tuple[float, float, bool, bool, bool]:
+        """One feature row from probe results."""
+        return (
+            float(top_holder_pct or 0),
+            float(liquidity_usd or 0),
+            mint_authority == "renounced",
+            bool(is_lp_locked),
+            any(flag in self.config.flags for flag in suspicious_flags or ()),
+        )
+
+    def score_row(self, row: Tuple[float, float, bool, bool, bool]) -> int:
+        """Risk score of a single feature row; same rules as score_tokens without building arrays."""
+        c = self.config
+        top_holder_pct, liquidity_usd, mint_renounced, lp_locked, flagged = row
+        risk = (
+            (top_holder_pct > c.top_holder_pct_above) * c.top_holder_weight
+            + (liquidity_usd < c.liquidity_usd_below) * c.low_liquidity_weight
+            + mint_renounced * c.renounced_mint_weight
+            + (not lp_locked) * c.lp_unlocked_weight
+            + flagged * c.flag_weight
+        )
+        return int(min(risk, c.max_score))
+
+    def score_tokens(self, features: TokenFeatures) -> np.ndarray:
+        """Risk score (0..max_score) for every row."""
+        c = self.config
+        risk = (
+            (features.top_holder_pct > c.top_holder_pct_above) * c.top_holder_weight
+            + (features.liquidity_usd < c.liquidity_usd_below) * c.low_liquidity_weight
+            + features.mint_renounced * c.renounced_mint_weight
+            + ~features.lp_locked * c.lp_unlocked_weight
+            + features.flagged * c.flag_weight
+        )
+        return np.minimum(risk, c.max_score).astype(np.int64)
+
+    def rate_wallets(
+        self,
+        scores: np.ndarray,
+        wallet_ids: np.ndarray,
+        n_wallets: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Average token score and rating index (into RATINGS) per wallet.
+
+        ``wallet_ids[i]`` is the wallet (0..n_wallets-1) holding position
+        ``i``; wallets without positions average 0 and rate Low.
+        """
+        c = self.config
+        sums = np.bincount(wallet_ids, weights=scores, minlength=n_wallets)
+        counts = np.bincount(wallet_ids, minlength=n_wallets)
+        averages = np.divide(sums, counts, out=np.zeros(n_wallets), where=counts > 0)
+        ratings = np.where(averages > c.high_risk_above, 2, np.where(averages > c.medium_risk_above, 1, 0))
+        return averages, ratings
+
+    def rate(self, scores: Sequence[float]) -> Tuple[float, str]:
+        """Average score and rating for a single wallet."""
+        scores = np.asarray(scores, dtype=np.float64)
+        averages, ratings = self.rate_wallets(scores, np.zeros(len(scores), dtype=np.int64), 1)
+        return float(averages[0]), RATINGS[int(ratings[0])]
+
+    def rescore(self, forensics: Sequence[Dict[str, Any]]) -> List[int]:
+        """Recompute ``risk_score`` for stored forensics entries (e.g. after a config change)."""
+        rows = [
+            self.features(
+                entry.get("top_holder_pct"),
+                entry.get("liquidity_usd"),
+                entry.get("mint_authority"),
+                entry.get("is_lp_locked"),
+                entry.get("suspicious_flags", _flags_from_reason(entry.get("reason"))),
+            )
+            for entry in forensics
+        ]
+        return self.score_tokens(TokenFeatures.from_rows(rows)).tolist()
+
+
+def _flags_from_reason(reason: Optional[str]) -> List[str]:
+    # Entries stored before suspicious_flags was recorded only kept the joined reason
+    return [flag.strip() for flag in (reason or "").split(",")]
+
+
+_scorer: Optional[RiskScorer] = None
+
+
+def get_risk_scorer() -> RiskScorer:
+    """Return the process-wide scorer configured from RISK_SCORING_CONFIG."""
+    global _scorer
+    if _scorer is None:
+        _scorer = RiskScorer(ScoringConfig.from_spec())
+    return _scorer
@@ -1,46 +1,187 @@
+import os
 import asyncio
-from typing import Dict, Any, List
-from src.mastra.tools.contract_scanner import analyze_contract
-from src.mastra.tools.liquidity_checker import get_liquidity, is_lp_locked
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Tuple
+from ..tools.contract_scanner import analyze_contract
+from ..tools.liquidity_checker import get_liquidity, is_lp_locked
+from .scoring import get_risk_scorer
 
-async def analyze_tokens(tokens: List[Dict[str, Any]], token_metas: Dict[str, Any]) -> Dict[str, Any]:
+# Max tokens analyzed concurrently by one pipeline run
+FORENSICS_CONCURRENCY = int(os.getenv("FORENSICS_CONCURRENCY", "16"))
+
+# Per-upstream caps shared by every pipeline run in the process
+UPSTREAM_CONCURRENCY = {
+    "contract": int(os.getenv("FORENSICS_CONTRACT_CONCURRENCY", "8")),
+    "liquidity": int(os.getenv("FORENSICS_LIQUIDITY_CONCURRENCY", "32")),
+    "lp_lock": int(os.getenv("FORENSICS_LP_LOCK_CONCURRENCY", "32")),
+}
+
+_upstream_semaphores: Dict[str, asyncio.Semaphore] = {}
+_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _semaphore(upstream: str) -> asyncio.Semaphore:
+    global _semaphore_loop
+    loop = asyncio.get_running_loop()
+    if loop is not _semaphore_loop:
+        # Semaphores bind to the loop they are first awaited on
+        _upstream_semaphores.clear()
+        _semaphore_loop = loop
+    sem = _upstream_semaphores.get(upstream)
+    if sem is None:
+        sem = _upstream_semaphores[upstream] = asyncio.Semaphore(UPSTREAM_CONCURRENCY[upstream])
+    return sem
+
+
+async def _probe(upstream: str, coro: Awaitable[Dict[str, Any]]) -> Dict[str, Any]:
+    async with _semaphore(upstream):
+        return await coro
+
+
+def token_address(token: Dict[str, Any]) -> Optional[str]:
+    """Mint address of a token entry, whichever key the producer used."""
+    return token.get("mint") or token.get("tokenAddress") or token.get("token_address")
+
+
+def score_token(
+    addr: str,
+    contract: Dict[str, Any],
+    liquidity: Dict[str, Any],
+    lp_lock: Dict[str, Any],
+    meta: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Apply the heuristic risk rules (see scoring.ScoringConfig) to one token's probe results."""
+    # Compute risk features
+    top_holder_pct = contract.get("top_holder_pct", 0)
+    liquidity_usd = liquidity.get("liquidity_usd", 0)
+    mint_authority = contract.get("mint_authority", "unknown")
+    suspicious_flags = contract.get("suspicious_flags", [])
+    token_name = meta.get("name", "")
+    # Heuristic risk score; tokens complete (and stream out) one at a time, so use the scalar path
+    # (see RiskScorer: batching a handful of positions per wallet costs more than it saves)
+    scorer = get_risk_scorer()
+    risk = scorer.score_row(scorer.features(
+        top_holder_pct, liquidity_usd, mint_authority, lp_lock.get("is_lp_locked", False), suspicious_flags
+    ))
+    return {
+        "symbol": meta.get("symbol", "?"),
+        "risk_score": risk,
+        "reason": ", ".join(suspicious_flags) or "No major flags.",
+        "suspicious_flags": list(suspicious_flags),
+        "liquidity_usd": liquidity_usd,
+        "top_holder_pct": top_holder_pct,
+        "mint_authority": mint_authority,
+        "is_lp_locked": lp_lock.get("is_lp_locked", False),
+        "token_name": token_name,
+        "solscan_link": f"https://solscan.io/token/{addr}",
+    }
+
+
+async def analyze_token(addr: str, meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Run every probe for one token concurrently and score the result."""
+    contract, liquidity, lp_lock = await asyncio.gather(
+        _probe("contract", analyze_contract(addr)),
+        _probe("liquidity", get_liquidity(addr)),
+        _probe("lp_lock", is_lp_locked(addr)),
+    )
+    return score_token(addr, contract, liquidity, lp_lock, meta)
+
+
+class ForensicsMemo:
+    """
+    Shares per-mint forensics across many wallets (e.g. one bulk request).
+
+    The first wallet holding a mint starts its analysis; every other wallet
+    awaits the same task. Finished entries are evicted oldest-first beyond
+    ``max_entries`` so memory stays bounded for very large batches.
+    """
+
+    def __init__(self, max_entries: int = 50000) -> None:
+        self.max_entries = max_entries
+        self._tasks: "OrderedDict[str, asyncio.Future]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def analyze(self, addr: str, meta: Dict[str, Any]) -> Awaitable[Dict[str, Any]]:
+        task = self._tasks.get(addr)
+        if task is not None:
+            self.hits += 1
+            self._tasks.move_to_end(addr)
+        else:
+            self.misses += 1
+            task = self._tasks[addr] = asyncio.ensure_future(analyze_token(addr, meta))
+            self._evict()
+        # Shield so one wallet being cancelled does not cancel the shared work
+        return asyncio.shield(task)
+
+    def _evict(self) -> None:
+        if len(self._tasks) <= self.max_entries:
+            return
+        for addr in list(self._tasks):
+            if len(self._tasks) <= self.max_entries:
+                break
+            if self._tasks[addr].done():
+                del self._tasks[addr]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"unique_mints": self.misses, "reused": self.hits, "cached": len(self._tasks)}
+
+
+async def iter_token_forensics(
+    tokens: List[Dict[str, Any]],
+    token_metas: Dict[str, Any],
+    concurrency: Optional[int] = None,
+    memo: Optional[ForensicsMemo] = None,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Analyze tokens concurrently and yield ``(address, result)`` as each one completes.
+
+    At most ``concurrency`` tokens are in flight; a failing token yields an
+    error entry instead of aborting the others. With a ``memo``, mints
+    already analyzed (or in flight) for another wallet are not re-analyzed.
+    """
+    limit = asyncio.Semaphore(concurrency or FORENSICS_CONCURRENCY)
+    addrs = list(dict.fromkeys(a for a in (token_address(t) for t in tokens) if a))
+
+    async def run(addr: str) -> Tuple[str, Dict[str, Any]]:
+        meta = token_metas.get(addr, {}).get("meta", {})
+        async with limit:
+            try:
+                if memo is not None:
+                    return addr, await memo.analyze(addr, meta)
+                return addr, await analyze_token(addr, meta)
+            except Exception as e:
+                return addr, {
+                    "symbol": meta.get("symbol", "?"),
+                    "risk_score": 50,
+                    "reason": "Token forensics failed.",
+                    "error": str(e),
+                    "token_name": meta.get("name", ""),
+                    "solscan_link": f"https://solscan.io/token/{addr}",
+                }
+
+    tasks = [asyncio.ensure_future(run(addr)) for addr in addrs]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def analyze_tokens(
+    tokens: List[Dict[str, Any]],
+    token_metas: Dict[str, Any],
+    concurrency: Optional[int] = None,
+    memo: Optional[ForensicsMemo] = None,
+) -> Dict[str, Any]:
     """
     For each token, uses contract_scanner and liquidity_checker to compute risk features.
-    Optionally calls LLM to interpret features.
+    Tokens and their probes run concurrently; latency follows the slowest token.
     """
     results = {}
-    for t in tokens:
-        addr = t.get("tokenAddress") or t.get("token_address")
-        if not addr:
-            continue
-        contract = await analyze_contract(addr)
-        liquidity = await get_liquidity(addr)
-        lp_lock = await is_lp_locked(addr)
-        meta = token_metas.get(addr, {}).get("meta", {})
-        # Compute risk features
-        top_holder_pct = contract.get("top_holder_pct", 0)
-        liquidity_usd = liquidity.get("liquidity_usd", 0)
-        mint_authority = contract.get("mint_authority", "unknown")
-        suspicious_flags = contract.get("suspicious_flags", [])
-        token_name = meta.get("name", "")
-        # Heuristic risk score
-        risk = 0
-        if top_holder_pct > 40: risk += 40
-        if liquidity_usd < 1000: risk += 30
-        if mint_authority == "renounced": risk += 10
-        if not lp_lock.get("is_lp_locked", False): risk += 15
-        if any(flag in suspicious_flags for flag in ["High holder concentration", "Suspicious name"]): risk += 20
-        # Clamp risk
-        risk = min(100, risk)
-        results[addr] = {
-            "symbol": meta.get("symbol", "?"),
-            "risk_score": risk,
-            "reason": ", ".join(suspicious_flags) or "No major flags.",
-            "liquidity_usd": liquidity_usd,
-            "top_holder_pct": top_holder_pct,
-            "mint_authority": mint_authority,
-            "is_lp_locked": lp_lock.get("is_lp_locked", False),
-            "token_name": token_name,
-            "solscan_link": f"https://solscan.io/token/{addr}",
-        }
-    return results
+    async for addr, result in iter_token_forensics(tokens, token_metas, concurrency, memo):
+        results[addr] = result
+    # Report in wallet order rather than completion order
+    order = [token_address(t) for t in tokens]
+    return {addr: results[addr] for addr in dict.fromkeys(order) if addr in results}
@@ -1,19 +1,30 @@
+import os
 import asyncio
-from typing import Dict, Any
+from typing import Any, AsyncIterator, Dict, Optional
+
+# Outgoing SOL transfers larger than this are flagged
+LARGE_TRANSFER_SOL = float(os.getenv("LARGE_TRANSFER_SOL", "100"))
+
+def check_transaction(tx: Dict[str, Any]) -> Optional[str]:
+    """Returns a summary if the transaction looks suspicious, otherwise None."""
+    # Example: flag large outgoing transfer
+    if (tx.get("change") or 0) < -LARGE_TRANSFER_SOL:
+        return f"Large outgoing transfer: {tx.get('change')} SOL in tx {tx.get('signature')}"
+    return None
 
 async def analyze_transactions(activity_result: Dict[str, Any]) -> Dict[str, Any]:
     """
     Analyzes wallet activity timeline for suspicious patterns.
     Emits events if suspicious tx detected.
     """
-    activity = activity_result.get("activity", [])
+    activity = activity_result.get("activity", activity_result.get("transactions", []))
     suspicious = False
     summary = "No suspicious activity detected."
     for tx in activity:
-        # Example: flag large outgoing transfer
-        if tx.get("change", 0) < -100:  # Replace with real SOL threshold
+        finding = check_transaction(tx)
+        if finding:
             suspicious = True
-            summary = f"Large outgoing transfer: {tx.get('change')} SOL in tx {tx.get('signature')}"
+            summary = finding
             # In production: emit event to alert channel
             break
     return {
@@ -21,3 +32,44 @@ async def analyze_transactions(activity_result: Dict[str, Any]) -> Dict[str, Any
         "summary": summary,
         "checked_txs": len(activity)
     }
+
+async def analyze_transaction_stream(
+    history: AsyncIterator[Dict[str, Any]],
+    stop_at_finding: bool = True,
+) -> Dict[str, Any]:
+    """
+    Streaming variant of analyze_transactions for histories of any length.
+    Consumes entries one at a time (constant memory) and, with ``stop_at_finding``,
+    stops fetching at the first finding; otherwise every entry is checked and the
+    first finding is reported. Also reports the newest signature seen and whether
+    the history was consumed to its end, so callers know when they can resume from it.
+    """
+    suspicious = False
+    summary = "No suspicious activity detected."
+    checked = 0
+    newest_signature = None
+    complete = False
+    try:
+        async for tx in history:
+            checked += 1
+            if newest_signature is None:
+                newest_signature = tx.get("signature")
+            finding = check_transaction(tx)
+            if finding and not suspicious:
+                suspicious = True
+                summary = finding
+                if stop_at_finding:
+                    break
+        else:
+            complete = True
+    finally:
+        aclose = getattr(history, "aclose", None)
+        if aclose is not None:
+            await aclose()
+    return {
+        "suspicious": suspicious,
+        "summary": summary,
+        "checked_txs": checked,
+        "newest_signature": newest_signature,
+        "complete": complete
+    }
@@ -0,0 +1,117 @@
+import os
+import json
+import asyncio
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from .agents.coordinator_agent import coordinator_agent
+from .agents.token_forensics import ForensicsMemo
+from .cache.result_cache import get_analysis_cache
+
+router = APIRouter()
+
+# Wallets analyzed at once within one bulk request
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "8"))
+BULK_MAX_WALLETS = int(os.getenv("BULK_MAX_WALLETS", "100000"))
+# Distinct mints whose forensics are kept for reuse within one bulk request
+BULK_MINT_MEMO_SIZE = int(os.getenv("BULK_MINT_MEMO_SIZE", "50000"))
+
+
+def parse_wallets(raw: bytes, content_type: str) -> List[str]:
+    """Accept ``{"wallets": [...]}``, a bare JSON list, or NDJSON (one wallet or {"wallet": ...} per line)."""
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        wallets = []
+        for line in raw.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            wallets.append(item.get("wallet") if isinstance(item, dict) else item)
+        return wallets
+    body = json.loads(raw or b"null")
+    if isinstance(body, dict):
+        body = body.get("wallets")
+    if not isinstance(body, list):
+        raise ValueError("Expected a list of wallets")
+    return body
+
+
+async def analyze_many(
+    wallets: Iterable[Any],
+    concurrency: int = BULK_CONCURRENCY,
+    max_age: Optional[float] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Analyze wallets with at most ``concurrency`` in flight, yielding each result as it finishes.
+
+    All wallets share one ForensicsMemo, so a mint held by many wallets is
+    analyzed once; the per-upstream semaphores in token_forensics schedule
+    the remaining upstream calls across the whole batch.
+    """
+    memo = ForensicsMemo(max_entries=BULK_MINT_MEMO_SIZE)
+    cache = get_analysis_cache()
+    counts = {"wallets": 0, "errors": 0}
+
+    async def analyze_one(wallet: Any) -> Dict[str, Any]:
+        if not wallet or not isinstance(wallet, str) or len(wallet) < 20:
+            return {"wallet": wallet, "error": "Invalid wallet address"}
+        try:
+            result, outcome, _ = await cache.get_or_compute(
+                wallet, lambda: coordinator_agent(wallet, forensics_memo=memo), max_age=max_age
+            )
+            return {"wallet": wallet, "cache": outcome, "result": result}
+        except Exception as e:
+            return {"wallet": wallet, "error": str(e), "type": type(e).__name__}
+
+    wallet_iter = iter(wallets)
+    pending = set()
+    exhausted = False
+    try:
+        while pending or not exhausted:
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    wallet = next(wallet_iter)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.add(asyncio.ensure_future(analyze_one(wallet)))
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                line = task.result()
+                counts["wallets"] += 1
+                counts["errors"] += "error" in line
+                yield line
+    finally:
+        for task in pending:
+            task.cancel()
+    yield {"summary": dict(counts, **memo.stats())}
+
+
+@router.post("/api/analyze_wallets")
+async def analyze_wallets(request: Request, concurrency: Optional[int] = None, max_age: Optional[float] = None):
+    """
+    Bulk wallet screening. Streams one NDJSON line per wallet as each finishes,
+    followed by a summary line.
+    """
+    try:
+        wallets = parse_wallets(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Invalid request", "details": f"Body must list wallets: {str(ve)}"}
+        )
+    if len(wallets) > BULK_MAX_WALLETS:
+        raise HTTPException(
+            status_code=413,
+            detail={"error": "Too many wallets", "details": f"At most {BULK_MAX_WALLETS} wallets per request"}
+        )
+    workers = max(1, min(concurrency or BULK_CONCURRENCY, 256))
+
+    async def lines():
+        async for item in analyze_many(wallets, concurrency=workers, max_age=max_age):
+            yield json.dumps(item) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Request
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from src.mastra.xai.explain_engine import make_trace
+from .xai.explain_engine import SPECIALTIES, explain_analysis, make_trace
+from .cache.result_cache import fingerprint, get_analysis_id_cache, get_explanation_cache
 
 router = APIRouter()
 
@@ -15,3 +18,91 @@ async def explain(request: Request):
     results = body.get("results", {})
     trace = make_trace(specialty, results)
     return {"explanation": trace}
+
+
+def parse_specialties(value: Any) -> Optional[List[str]]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = [s.strip() for s in value.split(",") if s.strip()]
+    if not isinstance(value, list):
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Invalid request", "details": "specialties must be a list or a comma-separated string"}
+        )
+    unknown = [s for s in value if s not in SPECIALTIES]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Invalid request", "details": f"Unknown specialties: {', '.join(map(str, unknown))}"}
+        )
+    return list(value)
+
+
+async def batch_explanations(
+    analysis_id: Optional[str],
+    results: Optional[Dict[str, Any]],
+    specialties: Optional[List[str]],
+) -> JSONResponse:
+    if results is not None:
+        # Key by content, so re-posting an unchanged result is a cache hit
+        key = fingerprint(results)
+    elif analysis_id:
+        key = analysis_id
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Invalid request", "details": "Provide analysis_id or results"}
+        )
+
+    async def compute():
+        analysis = results
+        if analysis is None:
+            # Explanations are derived on first lookup from the analysis stored under its ID
+            stored = get_analysis_id_cache().get(key)
+            if stored is None:
+                raise HTTPException(
+                    status_code=404,
+                    detail={"error": "Unknown analysis", "details": "analysis_id expired or unknown; post the results instead"}
+                )
+            analysis = stored[0]
+        return explain_analysis(analysis)
+
+    explanations, outcome, _ = await get_explanation_cache().get_or_compute(key, compute)
+    if specialties is not None:
+        explanations = {s: explanations[s] for s in specialties if s in explanations}
+    return JSONResponse(
+        content={"analysis_id": key, "explanations": explanations},
+        headers={"X-Cache": outcome},
+    )
+
+
+@router.post("/api/explain/batch")
+async def explain_batch(request: Request):
+    """
+    Explanations and confidences for every specialty card of one analysis in a single call.
+
+    Body: ``{"analysis_id": "..."}`` as returned by /api/analyze_wallet, or
+    ``{"results": <analysis result>}``; optionally ``"specialties": [...]``.
+    """
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Invalid request", "details": "Request body must be valid JSON"}
+        )
+    if not isinstance(body, dict) or not isinstance(body.get("results", {}), dict):
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Invalid request", "details": "results must be an analysis result object"}
+        )
+    return await batch_explanations(
+        body.get("analysis_id"), body.get("results"), parse_specialties(body.get("specialties"))
+    )
+
+
+@router.get("/api/explain/batch")
+async def explain_batch_by_id(analysis_id: str, specialties: Optional[str] = None):
+    """Cacheable GET form of the batch endpoint for clients holding an analysis_id."""
+    return await batch_explanations(analysis_id, None, parse_specialties(specialties))
@@ -0,0 +1,109 @@
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from .agents.coordinator_agent import coordinator_stream
+from .cache.result_cache import get_analysis_cache
+
+router = APIRouter()
+
+NDJSON = "application/x-ndjson"
+SSE = "text/event-stream"
+
+
+def encode_event(event: Dict[str, Any], media_type: str) -> str:
+    """Serialize one coordinator event as an NDJSON line or an SSE frame."""
+    if media_type == SSE:
+        return f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+    return json.dumps(event) + "\n"
+
+
+async def analysis_events(wallet: str, max_age: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Coordinator events for one wallet, served from the result cache when fresh.
+
+    A cache hit yields only the final ``result`` event. A fresh run stores its
+    result in the cache so the next (streaming or not) request can reuse it.
+    Errors are reported as an ``error`` event since the response has
+    already started.
+    """
+    cache = get_analysis_cache()
+    cached = cache.lookup(wallet, max_age)
+    if cached is not None:
+        yield {"event": "result", "data": cached[0], "cache": "HIT", "age": int(cached[1])}
+        return
+    stream = coordinator_stream(wallet)
+    try:
+        async for event in stream:
+            if event["event"] == "result":
+                cache.put(wallet, event["data"])
+                event = dict(event, cache="MISS", age=0)
+            yield event
+    except Exception as e:
+        print(f"[ERROR] Streaming analysis failed for {wallet}: {str(e)}")
+        yield {"event": "error", "data": {"error": "Analysis failed", "details": str(e), "type": type(e).__name__}}
+    finally:
+        await stream.aclose()
+
+
+def stream_analysis(request: Request, wallet: Any, max_age: Any, format: Optional[str]) -> StreamingResponse:
+    if not wallet or not isinstance(wallet, str) or len(wallet) < 20:  # Basic validation
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Invalid wallet address", "details": "A valid wallet address is required"}
+        )
+    try:
+        max_age = float(max_age) if max_age is not None else None
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Invalid request", "details": "max_age must be a number of seconds"}
+        )
+    if format == "sse" or (format is None and SSE in request.headers.get("accept", "")):
+        media_type = SSE
+    else:
+        media_type = NDJSON
+
+    async def body():
+        # Disconnects cancel this generator, which cancels the analysis still in flight
+        async for event in analysis_events(wallet, max_age):
+            yield encode_event(event, media_type)
+
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/api/analyze_wallet/stream")
+async def analyze_wallet_stream_get(
+    request: Request,
+    wallet: str,
+    max_age: Optional[float] = None,
+    format: Optional[str] = None,
+):
+    """
+    Progressive wallet analysis (usable from EventSource). Emits ``tokens``,
+    one ``token_forensics`` per token, ``transaction_monitor`` and ``result``.
+    ``format=sse`` or ``Accept: text/event-stream`` selects SSE, otherwise NDJSON.
+    """
+    return stream_analysis(request, wallet, max_age, format)
+
+
+@router.post("/api/analyze_wallet/stream")
+async def analyze_wallet_stream(request: Request, format: Optional[str] = None):
+    """Same as the GET variant, taking ``{"wallet": ..., "max_age": ...}`` as the body."""
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Invalid request", "details": "Request body must be valid JSON"}
+        )
+    if not isinstance(body, dict):
+        body = {}
+    return stream_analysis(
+        request, body.get("wallet"), body.get("max_age", request.query_params.get("max_age")), format
+    )
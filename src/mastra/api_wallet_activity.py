@@ -1,5 +1,9 @@
+import json
+from typing import Optional
 from fastapi import APIRouter
-from src.mastra.tools.solana_data_fetcher import get_wallet_activity
+from fastapi.responses import StreamingResponse
+from .tools.solana_data_fetcher import get_wallet_activity
+from .tools.tx_history import iter_wallet_history
 
 router = APIRouter()
 
@@ -7,3 +11,23 @@ router = APIRouter()
 async def wallet_activity(wallet: str):
     result = await get_wallet_activity(wallet)
     return result
+
+@router.get("/api/wallet_history/{wallet}")
+async def wallet_history(
+    wallet: str,
+    before: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: Optional[int] = None,
+    transactions: bool = True,
+):
+    """Stream the wallet's full history as NDJSON, one transaction per line (newest first)."""
+    async def lines():
+        try:
+            async for entry in iter_wallet_history(
+                wallet, before=before, until=until, limit=limit, with_transactions=transactions
+            ):
+                yield json.dumps(entry) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e), "type": type(e).__name__}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,5 @@
+# This file makes the cache directory a Python package
+import os
+
+# On-disk caches (SQLite stores, token-list snapshot, transaction segments) live under this directory
+CACHE_DIR = os.getenv("MASTRA_CACHE_DIR", os.path.join(".cache", "mastra"))
@@ -0,0 +1,133 @@
+import os
+import asyncio
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from . import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", os.path.join(CACHE_DIR, "llm_cache.sqlite3"))
+# Completions older than this are regenerated; 0 keeps them until the inputs change
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "0"))
+# Completions also kept in memory in front of SQLite
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "2048"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class LLMCache:
+    """
+    Persistent cache of LLM completions keyed by a hash of model, prompt and inputs.
+
+    A small in-memory LRU sits in front of a SQLite table, so completions
+    survive restarts and a wallet whose analysis did not change never costs
+    GPU time twice.
+    """
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_DB,
+        ttl: float = LLM_CACHE_TTL,
+        memory_entries: int = LLM_CACHE_MEMORY_ENTRIES,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _fresh(self, created_at: float) -> bool:
+        return not self.ttl or time.time() - created_at <= self.ttl
+
+    def _remember(self, key: str, text: str, created_at: float) -> None:
+        self._memory[key] = (text, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    # -- sync implementations (run in a worker thread) -------------------
+
+    def _load(self, key: str) -> Optional[tuple]:
+        with self._lock:
+            return self._connect().execute(
+                "SELECT text, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+
+    def _store(self, key: str, model: str, text: str, created_at: float) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO completions (key, model, text, created_at) VALUES (?, ?, ?, ?)",
+                    (key, model, text, created_at),
+                )
+
+    # -- async API -------------------------------------------------------
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached completion for ``key`` if present and fresh."""
+        entry = self._memory.get(key)
+        if entry is not None and self._fresh(entry[1]):
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return entry[0]
+        try:
+            row = await asyncio.to_thread(self._load, key)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read LLM cache: {str(e)}")
+            row = None
+        if row is None or not self._fresh(row[1]):
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        self._remember(key, row[0], row[1])
+        return row[0]
+
+    async def put(self, key: str, model: str, text: str) -> None:
+        now = time.time()
+        self._remember(key, text, now)
+        try:
+            await asyncio.to_thread(self._store, key, model, text, now)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not write LLM cache: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "ttl_seconds": self.ttl,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,199 @@
+import os
+import json
+import asyncio
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from ..metrics import Counter
+from . import CACHE_DIR
+from ..tools.raydium_pools import RAYDIUM_POOLS_TTL
+
+logger = logging.getLogger(__name__)
+
+MINT_CACHE_DB = os.getenv("MINT_CACHE_DB", os.path.join(CACHE_DIR, "mint_features.sqlite3"))
+# (mint, feature) entries kept in memory in front of SQLite
+MINT_CACHE_MEMORY_ENTRIES = int(os.getenv("MINT_CACHE_MEMORY_ENTRIES", "20000"))
+# Seconds each per-mint feature is reused across wallets before it is fetched again
+MINT_HOLDERS_TTL = float(os.getenv("MINT_HOLDERS_TTL", "300"))
+MINT_AUTHORITY_TTL = float(os.getenv("MINT_AUTHORITY_TTL", "86400"))
+MINT_LIQUIDITY_TTL = float(os.getenv("MINT_LIQUIDITY_TTL", str(RAYDIUM_POOLS_TTL)))
+MINT_LP_LOCK_TTL = float(os.getenv("MINT_LP_LOCK_TTL", "3600"))
+
+FEATURE_TTLS = {
+    "holders": MINT_HOLDERS_TTL,
+    "mint_authority": MINT_AUTHORITY_TTL,
+    "liquidity": MINT_LIQUIDITY_TTL,
+    "lp_lock": MINT_LP_LOCK_TTL,
+}
+
+MINT_CACHE_LOOKUPS = Counter(
+    "mastra_mint_cache_lookups_total", "Per-mint forensics cache lookups by feature and outcome.", ("feature", "outcome")
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mint_features (
+    mint TEXT NOT NULL,
+    feature TEXT NOT NULL,
+    value TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (mint, feature)
+) WITHOUT ROWID;
+"""
+
+
+def cacheable(value: Any) -> bool:
+    """Failed probes ("unknown", None or an ``error`` entry) are retried rather than cached."""
+    if value is None or value == "unknown":
+        return False
+    return not (isinstance(value, dict) and "error" in value)
+
+
+class MintFeatureCache:
+    """
+    Cross-wallet cache of per-mint forensics features.
+
+    Holder distribution, mint authority, liquidity and LP lock depend only
+    on the mint, so a popular token is probed once per feature TTL no
+    matter how many wallets hold it. Each feature has its own TTL; entries
+    live in a memory LRU in front of a SQLite table, so they survive
+    restarts and are shared by every worker process. Concurrent fetches of
+    the same (mint, feature) share one upstream call.
+    """
+
+    def __init__(
+        self,
+        path: str = MINT_CACHE_DB,
+        ttls: Optional[Dict[str, float]] = None,
+        memory_entries: int = MINT_CACHE_MEMORY_ENTRIES,
+    ) -> None:
+        self.path = path
+        self.ttls = dict(FEATURE_TTLS, **(ttls or {}))
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[Tuple[str, str], Tuple[Any, float]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.outcomes: Dict[str, Dict[str, int]] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def ttl(self, feature: str, value: Any) -> float:
+        # A renounced mint authority cannot be re-enabled (unless the feature's cache is switched off)
+        if feature == "mint_authority" and value == "renounced" and self.ttls.get(feature):
+            return float("inf")
+        return self.ttls.get(feature, MINT_HOLDERS_TTL)
+
+    def _count(self, feature: str, outcome: str) -> None:
+        counts = self.outcomes.setdefault(feature, {})
+        counts[outcome] = counts.get(outcome, 0) + 1
+        MINT_CACHE_LOOKUPS.labels(feature, outcome).inc()
+
+    def _remember(self, key: Tuple[str, str], value: Any, expires_at: float) -> None:
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    # -- sync implementations (run in a worker thread) -------------------
+
+    def _load(self, mint: str, feature: str) -> Optional[tuple]:
+        with self._lock:
+            return self._connect().execute(
+                "SELECT value, expires_at FROM mint_features WHERE mint = ? AND feature = ?", (mint, feature)
+            ).fetchone()
+
+    def _store(self, mint: str, feature: str, value: str, fetched_at: float, expires_at: float) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO mint_features (mint, feature, value, fetched_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (mint, feature, value, fetched_at, expires_at),
+                )
+
+    # -- async API -------------------------------------------------------
+
+    async def get_or_fetch(self, mint: str, feature: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached ``feature`` of ``mint`` if fresh, else ``await fetch()`` and cache it."""
+        key = (mint, feature)
+        entry = self._memory.get(key)
+        if entry is not None and time.time() < entry[1]:
+            self._memory.move_to_end(key)
+            self._count(feature, "hit")
+            return entry[0]
+        task = self._inflight.get(key)
+        if task is not None:
+            self._count(feature, "coalesced")
+        else:
+            task = self._inflight[key] = asyncio.ensure_future(self._fetch(key, fetch))
+        # Shield so one cancelled caller does not cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: Tuple[str, str], fetch: Callable[[], Awaitable[Any]]) -> Any:
+        mint, feature = key
+        try:
+            try:
+                row = await asyncio.to_thread(self._load, mint, feature)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not read mint cache: {str(e)}")
+                row = None
+            if row is not None and time.time() < row[1]:
+                value = json.loads(row[0])
+                self._remember(key, value, row[1])
+                self._count(feature, "disk_hit")
+                return value
+            self._count(feature, "miss")
+            value = await fetch()
+            if cacheable(value):
+                now = time.time()
+                expires_at = now + self.ttl(feature, value)
+                self._remember(key, value, expires_at)
+                try:
+                    await asyncio.to_thread(
+                        self._store, mint, feature, json.dumps(value, separators=(",", ":")), now, expires_at
+                    )
+                except (sqlite3.Error, TypeError, ValueError) as e:
+                    logger.warning(f"Could not write mint cache: {str(e)}")
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory_entries": len(self._memory),
+            "max_memory_entries": self.memory_entries,
+            "in_flight": len(self._inflight),
+            "ttl_seconds": self.ttls,
+            "outcomes": {feature: dict(counts) for feature, counts in self.outcomes.items()},
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_cache: Optional[MintFeatureCache] = None
+
+
+def get_mint_cache() -> MintFeatureCache:
+    """Return the process-wide per-mint forensics cache."""
+    global _cache
+    if _cache is None:
+        _cache = MintFeatureCache()
+    return _cache
@@ -0,0 +1,237 @@
+import os
+import json
+import asyncio
+import hashlib
+import sqlite3
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from .shared_store import SHARED_CACHE_LOCAL_ENTRIES, SharedResultStore, get_shared_results, is_busy
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "60"))  # seconds
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024"))
+# Explanations are keyed by analysis fingerprint, so they can outlive the analysis results
+EXPLAIN_CACHE_TTL = float(os.getenv("EXPLAIN_CACHE_TTL", "3600"))  # seconds
+EXPLAIN_CACHE_MAX_ENTRIES = int(os.getenv("EXPLAIN_CACHE_MAX_ENTRIES", "4096"))
+
+# Outcome labels returned by get_or_compute
+HIT = "HIT"
+MISS = "MISS"
+COALESCED = "COALESCED"
+
+
+class ResultCache:
+    """
+    In-process TTL + LRU cache with single-flight computation.
+
+    Concurrent callers asking for the same key while it is being computed
+    share the one in-flight task instead of starting their own. The task is
+    shielded, so a caller that disconnects does not cancel the work for the
+    others.
+
+    With a ``shared`` store (multi-worker serving) entries are also written
+    to it under ``namespace``, and local misses are looked up there, so a
+    result computed by any worker is reused by all of them. Single-flight
+    stays per process.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+        ttl: float = RESULT_CACHE_TTL,
+        shared: Optional[SharedResultStore] = None,
+        namespace: str = "results",
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared = shared
+        self.namespace = namespace
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.shared_hits = 0
+        self.shared_busy = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, max_age: Optional[float] = None) -> Optional[Tuple[Any, float]]:
+        """Return ``(value, age_seconds)`` if cached and younger than ``max_age`` (default: the TTL)."""
+        entry = self._entries.get(key)
+        if entry is None and self.shared is not None:
+            entry = self._load_shared(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        age = time.time() - stored_at
+        if age > self.ttl:
+            del self._entries[key]
+            return None
+        if max_age is not None and age > max_age:
+            return None
+        self._entries.move_to_end(key)
+        return value, age
+
+    def lookup(self, key: Hashable, max_age: Optional[float] = None) -> Optional[Tuple[Any, float]]:
+        """``get`` that also counts the hit or miss, for callers computing the value themselves."""
+        cached = self.get(key, max_age)
+        if cached is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return cached
+
+    def _remember(self, key: Hashable, stored_at: float, value: Any) -> None:
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _load_shared(self, key: Hashable) -> Optional[Tuple[float, Any]]:
+        try:
+            entry = self.shared.get(self.namespace, str(key))
+        except sqlite3.Error as e:
+            if is_busy(e):
+                # Another worker is writing; a miss is cheaper than blocking the event loop
+                self.shared_busy += 1
+                return None
+            logger.warning(f"Could not read shared {self.namespace} cache: {str(e)}")
+            return None
+        if entry is not None:
+            self.shared_hits += 1
+            self._remember(key, *entry)
+        return entry
+
+    def put(self, key: Hashable, value: Any) -> None:
+        stored_at = time.time()
+        self._remember(key, stored_at, value)
+        if self.shared is not None:
+            try:
+                self.shared.put(self.namespace, str(key), value, self.ttl, stored_at)
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                if isinstance(e, sqlite3.Error) and is_busy(e):
+                    # Skipped: the value stays in this worker's memory and other workers recompute it
+                    self.shared_busy += 1
+                    return
+                logger.warning(f"Could not write shared {self.namespace} cache: {str(e)}")
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+        if self.shared is not None:
+            try:
+                self.shared.delete(self.namespace, str(key))
+            except sqlite3.Error as e:
+                logger.warning(f"Could not invalidate shared {self.namespace} cache: {str(e)}")
+
+    async def _compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await compute()
+            self.put(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[Any]],
+        max_age: Optional[float] = None,
+    ) -> Tuple[Any, str, float]:
+        """
+        Return ``(value, outcome, age_seconds)`` where outcome is HIT, MISS or COALESCED.
+
+        ``max_age`` lets a caller demand a fresher result than the cache TTL;
+        ``max_age=0`` always joins or starts a computation.
+        """
+        cached = self.get(key, max_age)
+        if cached is not None:
+            self.hits += 1
+            return cached[0], HIT, cached[1]
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task), COALESCED, 0.0
+        self.misses += 1
+        task = self._inflight[key] = asyncio.ensure_future(self._compute(key, compute))
+        return await asyncio.shield(task), MISS, 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "shared": self.shared is not None,
+            "shared_hits": self.shared_hits,
+            "shared_busy": self.shared_busy,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+        }
+
+
+def fingerprint(value: Any, exclude: Tuple[str, ...] = ("analysis_id", "upstream_calls")) -> str:
+    """Content hash of a JSON-like dict (top-level ``exclude`` keys ignored), stable across key order."""
+    if isinstance(value, dict) and exclude:
+        value = {k: v for k, v in value.items() if k not in exclude}
+    payload = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+_analysis_cache: Optional[ResultCache] = None
+
+
+def get_analysis_cache() -> ResultCache:
+    """Return the process-wide cache of wallet analysis results."""
+    global _analysis_cache
+    if _analysis_cache is None:
+        shared = get_shared_results()
+        if shared is None:
+            _analysis_cache = ResultCache()
+        else:
+            _analysis_cache = ResultCache(
+                max_entries=min(RESULT_CACHE_MAX_ENTRIES, SHARED_CACHE_LOCAL_ENTRIES), shared=shared, namespace="analysis"
+            )
+    return _analysis_cache
+
+
+_analysis_id_cache: Optional[ResultCache] = None
+
+
+def get_analysis_id_cache() -> ResultCache:
+    """Return the process-wide cache of analysis results keyed by analysis ID, kept as long as explanations."""
+    global _analysis_id_cache
+    if _analysis_id_cache is None:
+        shared = get_shared_results()
+        _analysis_id_cache = ResultCache(
+            max_entries=EXPLAIN_CACHE_MAX_ENTRIES if shared is None else min(EXPLAIN_CACHE_MAX_ENTRIES, SHARED_CACHE_LOCAL_ENTRIES),
+            ttl=EXPLAIN_CACHE_TTL,
+            shared=shared,
+            namespace="analysis_ids",
+        )
+    return _analysis_id_cache
+
+
+_explanation_cache: Optional[ResultCache] = None
+
+
+def get_explanation_cache() -> ResultCache:
+    """Return the process-wide cache of explanations, keyed by analysis ID (the result fingerprint)."""
+    global _explanation_cache
+    if _explanation_cache is None:
+        shared = get_shared_results()
+        _explanation_cache = ResultCache(
+            max_entries=EXPLAIN_CACHE_MAX_ENTRIES if shared is None else min(EXPLAIN_CACHE_MAX_ENTRIES, SHARED_CACHE_LOCAL_ENTRIES),
+            ttl=EXPLAIN_CACHE_TTL,
+            shared=shared,
+            namespace="explanations",
+        )
+    return _explanation_cache
@@ -0,0 +1,286 @@
+import os
+import json
+import sqlite3
+import threading
+import time
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process leader election, every worker refreshes
+    fcntl = None
+
+from . import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Share analysis results and the token/pool indexes between worker processes (serve.py sets it for WEB_CONCURRENCY > 1)
+MASTRA_SHARED_CACHE = os.getenv("MASTRA_SHARED_CACHE", "0").lower() in ("1", "true", "yes")
+SHARED_RESULTS_DB = os.getenv("SHARED_RESULTS_DB", os.path.join(CACHE_DIR, "shared_results.sqlite3"))
+SHARED_INDEX_DB = os.getenv("SHARED_INDEX_DB", os.path.join(CACHE_DIR, "shared_index.sqlite3"))
+# Results each worker also keeps in its own memory in front of the shared store
+SHARED_CACHE_LOCAL_ENTRIES = int(os.getenv("SHARED_CACHE_LOCAL_ENTRIES", "128"))
+# How often non-leader workers check for a newer index (and try to take over refreshing)
+SHARED_INDEX_POLL = float(os.getenv("SHARED_INDEX_POLL", "5"))
+# Bytes of each database read through mmap; the pages are shared by every worker via the OS page cache
+SHARED_CACHE_MMAP_MB = int(os.getenv("SHARED_CACHE_MMAP_MB", "256"))
+# Result-store calls run on the event loop, so they wait at most this long for another worker's write lock
+SHARED_CACHE_BUSY_MS = int(os.getenv("SHARED_CACHE_BUSY_MS", "50"))
+
+RESULTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at);
+"""
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    mint TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    logo TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS pools (
+    mint TEXT PRIMARY KEY,
+    liquidity REAL NOT NULL,
+    pools TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS datasets (
+    name TEXT PRIMARY KEY,
+    built_at REAL NOT NULL,
+    entries INTEGER NOT NULL
+);
+"""
+
+# Expired result rows are deleted every this many writes
+PURGE_EVERY = 1000
+
+
+class _SQLiteStore:
+    def __init__(self, path: str, schema: str, busy_timeout: float = 30) -> None:
+        self.path = path
+        self.schema = schema
+        self.busy_timeout = busy_timeout
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=self.busy_timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={SHARED_CACHE_MMAP_MB * 1024 * 1024}")
+            conn.executescript(self.schema)
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class SharedResultStore(_SQLiteStore):
+    """
+    JSON values with a TTL in a SQLite file every worker process opens.
+
+    Backs ResultCache in multi-worker mode, so an analysis computed by one
+    worker is a hit for the others. Reads are primary-key lookups that never
+    wait on writers (WAL); calls are synchronous like the in-memory cache, so
+    the busy timeout is kept short (SHARED_CACHE_BUSY_MS) and a call that
+    hits it raises ``sqlite3.OperationalError`` (see ``is_busy``) for the
+    caller to treat as a miss rather than stalling the event loop.
+    """
+
+    def __init__(self, path: str = SHARED_RESULTS_DB) -> None:
+        super().__init__(path, RESULTS_SCHEMA, busy_timeout=SHARED_CACHE_BUSY_MS / 1000)
+        self._writes = 0
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[float, Any]]:
+        """Return ``(stored_at, value)`` for an unexpired entry."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value, stored_at FROM entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, key, time.time()),
+            ).fetchone()
+        if row is None:
+            return None
+        return row[1], json.loads(row[0])
+
+    def put(self, namespace: str, key: str, value: Any, ttl: float, stored_at: Optional[float] = None) -> None:
+        stored_at = stored_at or time.time()
+        payload = json.dumps(value, separators=(",", ":"), default=str)
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (namespace, key, value, stored_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                    (namespace, key, payload, stored_at, stored_at + ttl),
+                )
+                self._writes += 1
+                if self._writes % PURGE_EVERY == 0:
+                    conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+
+
+def is_busy(error: sqlite3.Error) -> bool:
+    """True when ``error`` means another connection held the lock past the busy timeout."""
+    return getattr(error, "sqlite_errorcode", None) in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+
+
+class SharedIndexStore(_SQLiteStore):
+    """
+    Token-list and Raydium pool indexes published by one worker, read by all.
+
+    Each dataset is replaced in a single transaction, so readers see either
+    the previous or the new index, never a mix. Lookups are synchronous
+    primary-key reads served from the OS page cache.
+    """
+
+    def __init__(self, path: str = SHARED_INDEX_DB) -> None:
+        super().__init__(path, INDEX_SCHEMA)
+
+    def dataset(self, name: str) -> Optional[Tuple[float, int]]:
+        """``(built_at, entries)`` of the last published ``name`` dataset."""
+        with self._lock:
+            return self._connect().execute(
+                "SELECT built_at, entries FROM datasets WHERE name = ?", (name,)
+            ).fetchone()
+
+    def _publish(self, name: str, table: str, sql: str, rows: Iterable[tuple], built_at: float) -> int:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(f"DELETE FROM {table}")
+                count = conn.executemany(sql, rows).rowcount
+                conn.execute(
+                    "INSERT OR REPLACE INTO datasets (name, built_at, entries) VALUES (?, ?, ?)",
+                    (name, built_at, count),
+                )
+        return count
+
+    def publish_tokens(self, rows: Iterable[Tuple[str, str, str, str]], built_at: float) -> int:
+        """Replace the token list with ``(mint, name, symbol, logo)`` rows; returns the row count."""
+        return self._publish(
+            "token_list", "tokens",
+            "INSERT OR IGNORE INTO tokens (mint, name, symbol, logo) VALUES (?, ?, ?, ?)",
+            rows, built_at,
+        )
+
+    def token(self, mint: str) -> Optional[Tuple[str, str, str, str]]:
+        with self._lock:
+            return self._connect().execute(
+                "SELECT mint, name, symbol, logo FROM tokens WHERE mint = ?", (mint,)
+            ).fetchone()
+
+    def publish_pools(self, rows: Iterable[Tuple[str, float, List[Dict[str, Any]]]], built_at: float) -> int:
+        """Replace the pool index with ``(mint, liquidity, [pool dict, ...])`` rows; returns the mint count."""
+        return self._publish(
+            "raydium_pools", "pools",
+            "INSERT OR REPLACE INTO pools (mint, liquidity, pools) VALUES (?, ?, ?)",
+            ((mint, liquidity, json.dumps(pools, separators=(",", ":"))) for mint, liquidity, pools in rows),
+            built_at,
+        )
+
+    def pools(self, mint: str) -> Optional[Tuple[float, List[Dict[str, Any]]]]:
+        """``(aggregated liquidity, [pool dict, ...])`` for ``mint``."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT liquidity, pools FROM pools WHERE mint = ?", (mint,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+
+class LeaderLock:
+    """
+    Non-blocking exclusive file lock electing the worker that refreshes shared indexes.
+
+    The OS drops the lock when its holder exits, so a surviving worker takes
+    over on its next ``acquire()``.
+    """
+
+    def __init__(self, path: str = os.path.join(CACHE_DIR, "leader.lock")) -> None:
+        self.path = path
+        self._fh = None
+
+    @property
+    def held(self) -> bool:
+        return self._fh is not None
+
+    def acquire(self) -> bool:
+        """Take the lock if it is free; True while this process holds it."""
+        if self._fh is not None:
+            return True
+        if fcntl is None:
+            self._fh = True
+            return True
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fh = open(self.path, "a")
+        try:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            return False
+        fh.truncate(0)
+        fh.write(str(os.getpid()))
+        fh.flush()
+        self._fh = fh
+        logger.info(f"Worker {os.getpid()} now refreshes the shared indexes")
+        return True
+
+    def release(self) -> None:
+        if self._fh is not None and self._fh is not True:
+            self._fh.close()
+        self._fh = None
+
+
+_results: Optional[SharedResultStore] = None
+_indexes: Optional[SharedIndexStore] = None
+_leader: Optional[LeaderLock] = None
+
+
+def get_shared_results() -> Optional[SharedResultStore]:
+    """The process's handle on the shared result store, or None unless MASTRA_SHARED_CACHE is on."""
+    global _results
+    if _results is None and MASTRA_SHARED_CACHE:
+        _results = SharedResultStore()
+    return _results
+
+
+def get_shared_indexes() -> Optional[SharedIndexStore]:
+    """The process's handle on the shared index store, or None unless MASTRA_SHARED_CACHE is on."""
+    global _indexes
+    if _indexes is None and MASTRA_SHARED_CACHE:
+        _indexes = SharedIndexStore()
+    return _indexes
+
+
+def get_leader_lock() -> LeaderLock:
+    global _leader
+    if _leader is None:
+        _leader = LeaderLock()
+    return _leader
+
+
+def close_shared_stores() -> None:
+    for store in (_results, _indexes):
+        if store is not None:
+            store.close()
+    if _leader is not None:
+        _leader.release()
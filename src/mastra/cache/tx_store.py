@@ -0,0 +1,360 @@
+import os
+import json
+import mmap
+import time
+import zlib
+import struct
+import hashlib
+import logging
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: segments are not shared between live processes
+    fcntl = None
+
+from ..metrics import Counter
+from . import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Serve finalized transactions from the local store before asking the RPC
+TX_STORE_ENABLED = os.getenv("TX_STORE_ENABLED", "1").lower() in ("1", "true", "yes")
+TX_STORE_DIR = os.getenv("TX_STORE_DIR", os.path.join(CACHE_DIR, "transactions"))
+# An active segment is sealed (indexed and made visible to other workers) at this size
+TX_STORE_SEGMENT_MB = float(os.getenv("TX_STORE_SEGMENT_MB", "64"))
+# How often the directory is checked for segments sealed by other workers
+TX_STORE_RESCAN = float(os.getenv("TX_STORE_RESCAN", "30"))
+
+TX_STORE_LOOKUPS = Counter(
+    "mastra_tx_store_lookups_total", "Finalized-transaction store lookups by outcome.", ("outcome",)
+)
+
+SEGMENT_SUFFIX = ".seg"
+INDEX_SUFFIX = ".idx"
+# Record header: signature length, payload length, CRC32 of the payload
+RECORD = struct.Struct("<HII")
+# Index header: record count; followed by the sorted u64 keys, then their u64 offsets
+INDEX_HEADER = struct.Struct("<Q")
+
+
+def signature_key(signature: str) -> int:
+    """64-bit key of a signature; collisions are resolved against the signature stored in the record."""
+    return int.from_bytes(hashlib.blake2b(signature.encode(), digest_size=8).digest(), "little")
+
+
+def is_finalized(tx: Dict[str, Any], finalized_slot: int) -> bool:
+    """A transaction at or below the cluster's finalized slot can no longer be rolled back."""
+    slot = tx.get("slot")
+    return isinstance(slot, int) and slot <= finalized_slot
+
+
+class _Segment:
+    """A sealed segment: its records and its sorted key index, both memory-mapped."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as fh:
+            self.data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(path[: -len(SEGMENT_SUFFIX)] + INDEX_SUFFIX, "rb") as fh:
+            self.index = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        (self.count,) = INDEX_HEADER.unpack_from(self.index, 0)
+        body = memoryview(self.index)[INDEX_HEADER.size:].cast("Q")
+        self.keys = body[: self.count]
+        self.offsets = body[self.count:]
+
+    def offsets_for(self, key: int) -> Iterable[int]:
+        i = bisect_left(self.keys, key)
+        while i < self.count and self.keys[i] == key:
+            yield self.offsets[i]
+            i += 1
+
+    def close(self) -> None:
+        # Exported views must be released before the maps can be closed
+        for view in (self.keys, self.offsets):
+            view.release()
+        self.data.close()
+        self.index.close()
+
+
+def _read_record(buf: Any, offset: int, signature: str) -> Optional[bytes]:
+    if offset + RECORD.size > len(buf):
+        return None
+    sig_len, payload_len, crc = RECORD.unpack_from(buf, offset)
+    start = offset + RECORD.size
+    end = start + sig_len + payload_len
+    if end > len(buf) or buf[start:start + sig_len] != signature.encode():
+        return None
+    payload = buf[start + sig_len:end]
+    return payload if zlib.crc32(payload) == crc else None
+
+
+def _scan(path: str) -> Tuple[Dict[int, List[int]], int]:
+    """Keys and offsets of the intact records of a segment, and the length they span."""
+    entries: Dict[int, List[int]] = {}
+    offset = 0
+    with open(path, "rb") as fh:
+        data = fh.read()
+    while offset + RECORD.size <= len(data):
+        sig_len, payload_len, crc = RECORD.unpack_from(data, offset)
+        start = offset + RECORD.size
+        end = start + sig_len + payload_len
+        if end > len(data) or zlib.crc32(data[start + sig_len:end]) != crc:
+            break  # torn tail of an interrupted append
+        entries.setdefault(signature_key(data[start:start + sig_len].decode()), []).append(offset)
+        offset = end
+    return entries, offset
+
+
+def _write_index(path: str, entries: Dict[int, List[int]]) -> int:
+    pairs = sorted((key, offset) for key, offsets in entries.items() for offset in offsets)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(INDEX_HEADER.pack(len(pairs)))
+        array("Q", (key for key, _ in pairs)).tofile(fh)
+        array("Q", (offset for _, offset in pairs)).tofile(fh)
+    os.replace(tmp, path)
+    return len(pairs)
+
+
+class TransactionStore:
+    """
+    Immutable local store of finalized parsed transactions, keyed by signature.
+
+    A finalized transaction never changes, so once fetched it is appended
+    (compressed JSON, CRC-checked) to this process's active segment file and
+    never fetched again; only transactions whose slot is at or below the
+    finalized slot the caller passes in are stored. When the active segment reaches
+    TX_STORE_SEGMENT_MB it is sealed: a sorted index of 64-bit signature
+    hashes and record offsets (16 bytes per transaction) is written next to
+    it, and both files are read through mmap from then on, so every worker
+    shares the same pages through the OS page cache. Segments are only ever
+    appended to or sealed, never rewritten.
+
+    Each worker appends to a segment of its own (held with an exclusive
+    ``flock``); the others pick it up once it is sealed. Shutting down leaves
+    the active segment unsealed, and the next process to start reopens it
+    (torn tail dropped) and keeps appending, so restarts do not leave a trail
+    of small segments behind. Further unsealed segments whose writer is gone
+    are sealed as they are.
+    """
+
+    def __init__(self, directory: str = TX_STORE_DIR, segment_bytes: int = int(TX_STORE_SEGMENT_MB * 1024 * 1024)) -> None:
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self._sealed: Dict[str, _Segment] = {}
+        self._active_path: Optional[str] = None
+        self._active_fh = None
+        self._active_size = 0
+        self._active_entries: Dict[int, List[int]] = {}
+        self._active_map: Optional[mmap.mmap] = None
+        self._scanned_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.outcomes: Dict[str, int] = {}
+
+    def _count(self, outcome: str, n: int = 1) -> None:
+        if n:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + n
+            TX_STORE_LOOKUPS.labels(outcome).inc(n)
+
+    # -- segments --------------------------------------------------------
+
+    def _rescan(self) -> None:
+        """Map segments sealed since the last scan and recover ones abandoned by dead processes."""
+        self._scanned_at = time.monotonic()
+        try:
+            # Newest first, so the most recent unsealed segment is the one reopened
+            names = sorted(os.listdir(self.directory), reverse=True)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if not name.endswith(SEGMENT_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            if path in self._sealed or path == self._active_path:
+                continue
+            try:
+                if not os.path.exists(path[: -len(SEGMENT_SUFFIX)] + INDEX_SUFFIX):
+                    if not self._recover(path):
+                        continue
+                self._sealed[path] = _Segment(path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not open transaction segment {name}: {str(e)}")
+
+    def _recover(self, path: str) -> bool:
+        """
+        Take over an unindexed segment whose writer is gone.
+
+        The first one found becomes this process's active segment again if
+        it has room left; others are sealed. Returns True when ``path`` is
+        sealed (and can be mapped), False if a live worker still appends to
+        it or it was reopened.
+        """
+        fh = open(path, "a+b")
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return False
+            index_path = path[: -len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+            if os.path.exists(index_path):
+                return True  # sealed by its writer while we waited for the lock
+            entries, length = _scan(path)
+            fh.truncate(length)  # drop the torn tail of an interrupted append
+            if self._active_path is None and length < self.segment_bytes:
+                self._active_path, self._active_fh, self._active_size = path, fh, length
+                self._active_entries = entries
+                fh = None
+                logger.info(f"Reopened transaction segment {os.path.basename(path)} ({len(entries)} signatures)")
+                return False
+            if not entries:
+                os.remove(path)
+                return False
+            _write_index(index_path, entries)
+        finally:
+            if fh is not None:
+                fh.close()
+        logger.info(f"Recovered transaction segment {os.path.basename(path)} ({len(entries)} signatures)")
+        return True
+
+    def _open_active(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{time.time_ns():016x}-{os.getpid()}{SEGMENT_SUFFIX}")
+        fh = open(path, "a+b")
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._active_path, self._active_fh, self._active_size = path, fh, 0
+
+    def _seal_active(self) -> None:
+        path, fh = self._active_path, self._active_fh
+        if path is None:
+            return
+        if self._active_map is not None:
+            self._active_map.close()
+        entries = self._active_entries
+        self._active_path, self._active_fh, self._active_map = None, None, None
+        self._active_entries, self._active_size = {}, 0
+        try:
+            fh.flush()
+            if entries:
+                # Written before the lock is released, so other workers never recover it themselves
+                _write_index(path[: -len(SEGMENT_SUFFIX)] + INDEX_SUFFIX, entries)
+        finally:
+            fh.close()
+        if entries:
+            self._sealed[path] = _Segment(path)
+        else:
+            os.remove(path)
+
+    def _active_view(self, end: int) -> Optional[mmap.mmap]:
+        if self._active_map is None or len(self._active_map) < end:
+            if self._active_map is not None:
+                self._active_map.close()
+            self._active_fh.flush()
+            self._active_map = mmap.mmap(self._active_fh.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._active_map
+
+    # -- sync implementations (run in a worker thread) -------------------
+
+    def _get(self, signature: str) -> Optional[bytes]:
+        key = signature_key(signature)
+        for offset in self._active_entries.get(key, ()):
+            payload = _read_record(self._active_view(self._active_size), offset, signature)
+            if payload is not None:
+                return payload
+        for segment in self._sealed.values():
+            for offset in segment.offsets_for(key):
+                payload = _read_record(segment.data, offset, signature)
+                if payload is not None:
+                    return payload
+        return None
+
+    def get_many(self, signatures: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored transactions among ``signatures``, by signature."""
+        found: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            if self._scanned_at is None or time.monotonic() - self._scanned_at >= TX_STORE_RESCAN:
+                self._rescan()
+            for signature in signatures:
+                if signature in found:
+                    continue
+                payload = self._get(signature)
+                if payload is not None:
+                    found[signature] = json.loads(zlib.decompress(payload))
+        self._count("hit", len(found))
+        self._count("miss", len(set(signatures)) - len(found))
+        return found
+
+    def put_many(self, transactions: Dict[str, Dict[str, Any]], finalized_slot: int) -> int:
+        """Append the ones among ``{signature: tx}`` finalized as of ``finalized_slot``; returns how many were stored."""
+        stored = 0
+        with self._lock:
+            if self._scanned_at is None:
+                self._rescan()  # reopen the previous run's segment before starting a new one
+            for signature, tx in transactions.items():
+                if not is_finalized(tx, finalized_slot):
+                    self._count("not_finalized")
+                    continue
+                key = signature_key(signature)
+                if self._get(signature) is not None:
+                    continue
+                if self._active_fh is None:
+                    self._open_active()
+                sig = signature.encode()
+                payload = zlib.compress(json.dumps(tx, separators=(",", ":")).encode(), 1)
+                self._active_fh.write(RECORD.pack(len(sig), len(payload), zlib.crc32(payload)) + sig + payload)
+                self._active_entries.setdefault(key, []).append(self._active_size)
+                self._active_size += RECORD.size + len(sig) + len(payload)
+                stored += 1
+                if self._active_size >= self.segment_bytes:
+                    self._seal_active()
+            if self._active_fh is not None:
+                self._active_fh.flush()
+        self._count("stored", stored)
+        return stored
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sealed = list(self._sealed.values())
+            return {
+                "enabled": TX_STORE_ENABLED,
+                "directory": self.directory,
+                "sealed_segments": len(sealed),
+                "sealed_transactions": sum(segment.count for segment in sealed),
+                "active_transactions": sum(len(offsets) for offsets in self._active_entries.values()),
+                "bytes": sum(len(segment.data) for segment in sealed) + self._active_size,
+                "segment_bytes": self.segment_bytes,
+                "outcomes": dict(self.outcomes),
+            }
+
+    def close(self) -> None:
+        """Flush and release the active segment (left unsealed for the next start to reopen) and unmap everything."""
+        with self._lock:
+            if self._active_map is not None:
+                self._active_map.close()
+            if self._active_fh is not None:
+                try:
+                    self._active_fh.close()
+                except OSError as e:
+                    logger.warning(f"Could not flush transaction segment: {str(e)}")
+            self._active_path, self._active_fh, self._active_map = None, None, None
+            self._active_entries, self._active_size = {}, 0
+            for segment in self._sealed.values():
+                segment.close()
+            self._sealed.clear()
+            self._scanned_at = None
+
+
+_store: Optional[TransactionStore] = None
+
+
+def get_tx_store() -> Optional[TransactionStore]:
+    """Return the process-wide finalized-transaction store, or None when TX_STORE_ENABLED is off."""
+    global _store
+    if _store is None and TX_STORE_ENABLED:
+        _store = TransactionStore()
+    return _store
@@ -0,0 +1,226 @@
+import os
+import json
+import asyncio
+import sqlite3
+import threading
+import time
+import logging
+from typing import Any, Dict, List, Optional
+
+from . import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+WALLET_STATE_DB = os.getenv("WALLET_STATE_DB", os.path.join(CACHE_DIR, "wallet_state.sqlite3"))
+# Stored forensics older than this are recomputed even if the balance is unchanged
+WALLET_FEATURES_MAX_AGE = float(os.getenv("WALLET_FEATURES_MAX_AGE", "3600"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS wallets (
+    wallet TEXT PRIMARY KEY,
+    newest_signature TEXT,
+    tx_suspicious INTEGER NOT NULL DEFAULT 0,
+    tx_summary TEXT,
+    tx_checked INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS wallet_tokens (
+    wallet TEXT NOT NULL,
+    mint TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    features TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (wallet, mint)
+);
+CREATE TABLE IF NOT EXISTS watched_wallets (
+    wallet TEXT PRIMARY KEY,
+    added_at REAL NOT NULL
+);
+"""
+
+
+class WalletStateStore:
+    """
+    SQLite store of per-wallet analysis state.
+
+    Keeps the newest signature seen, the transaction monitor verdict, and
+    each holding's balance plus its last forensics features, so a repeat
+    analysis only fetches newer transactions and re-scans changed tokens.
+    """
+
+    def __init__(self, path: str = WALLET_STATE_DB) -> None:
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    # -- sync implementations (run in a worker thread) -------------------
+
+    def _load(self, wallet: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT newest_signature, tx_suspicious, tx_summary, tx_checked, updated_at FROM wallets WHERE wallet = ?",
+                (wallet,),
+            ).fetchone()
+            if row is None:
+                return None
+            tokens = {}
+            for mint, amount, features, updated_at in conn.execute(
+                "SELECT mint, amount, features, updated_at FROM wallet_tokens WHERE wallet = ?", (wallet,)
+            ):
+                tokens[mint] = {
+                    "amount": amount,
+                    "features": json.loads(features) if features else None,
+                    "updated_at": updated_at,
+                }
+        return {
+            "newest_signature": row[0],
+            "transaction_monitor": {
+                "suspicious": bool(row[1]),
+                "summary": row[2],
+                "checked_txs": row[3],
+            },
+            "updated_at": row[4],
+            "tokens": tokens,
+        }
+
+    def _save(
+        self,
+        wallet: str,
+        newest_signature: Optional[str],
+        tx_analysis: Dict[str, Any],
+        tokens: Dict[str, Dict[str, Any]],
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO wallets (wallet, newest_signature, tx_suspicious, tx_summary, tx_checked, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        wallet,
+                        newest_signature,
+                        int(bool(tx_analysis.get("suspicious"))),
+                        tx_analysis.get("summary"),
+                        int(tx_analysis.get("checked_txs") or 0),
+                        now,
+                    ),
+                )
+                conn.execute("DELETE FROM wallet_tokens WHERE wallet = ?", (wallet,))
+                conn.executemany(
+                    "INSERT INTO wallet_tokens (wallet, mint, amount, features, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (
+                            wallet,
+                            mint,
+                            str(entry.get("amount")),
+                            json.dumps(entry["features"]) if entry.get("features") is not None else None,
+                            entry.get("updated_at") or now,
+                        )
+                        for mint, entry in tokens.items()
+                    ],
+                )
+
+    def _watched(self) -> List[str]:
+        with self._lock:
+            conn = self._connect()
+            return [row[0] for row in conn.execute("SELECT wallet FROM watched_wallets ORDER BY added_at")]
+
+    def _set_watched(self, wallets: List[str], watched: bool) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                if watched:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO watched_wallets (wallet, added_at) VALUES (?, ?)",
+                        [(wallet, now) for wallet in wallets],
+                    )
+                else:
+                    conn.executemany("DELETE FROM watched_wallets WHERE wallet = ?", [(wallet,) for wallet in wallets])
+
+    # -- async API -------------------------------------------------------
+
+    async def load(self, wallet: str) -> Optional[Dict[str, Any]]:
+        """Return the stored state for a wallet, or None if it was never analyzed."""
+        try:
+            return await asyncio.to_thread(self._load, wallet)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not load wallet state for {wallet}: {str(e)}")
+            return None
+
+    async def save(
+        self,
+        wallet: str,
+        newest_signature: Optional[str],
+        tx_analysis: Dict[str, Any],
+        tokens: Dict[str, Dict[str, Any]],
+    ) -> None:
+        """
+        Persist a wallet's cursor, monitor verdict and holdings.
+
+        ``tokens`` maps mint -> {"amount", "features", "updated_at"}; holdings
+        not present are removed.
+        """
+        try:
+            await asyncio.to_thread(self._save, wallet, newest_signature, tx_analysis, tokens)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not save wallet state for {wallet}: {str(e)}")
+
+    async def watched_wallets(self) -> List[str]:
+        """Wallets registered for real-time monitoring, oldest first."""
+        try:
+            return await asyncio.to_thread(self._watched)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not load watched wallets: {str(e)}")
+            return []
+
+    async def set_watched(self, wallets: List[str], watched: bool = True) -> None:
+        """Add (or with ``watched=False`` remove) wallets from the real-time watch list."""
+        try:
+            await asyncio.to_thread(self._set_watched, list(wallets), watched)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not update watched wallets: {str(e)}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def reusable_features(
+    stored: Optional[Dict[str, Any]],
+    amount: Any,
+    max_age: float = WALLET_FEATURES_MAX_AGE,
+) -> Optional[Dict[str, Any]]:
+    """Stored forensics for a holding if its balance is unchanged and the features are fresh."""
+    if not stored or stored.get("features") is None:
+        return None
+    if stored.get("amount") != str(amount):
+        return None
+    if time.time() - (stored.get("updated_at") or 0) > max_age:
+        return None
+    return stored["features"]
+
+
+_store: Optional[WalletStateStore] = None
+
+
+def get_wallet_state_store() -> WalletStateStore:
+    """Return the process-wide wallet state store."""
+    global _store
+    if _store is None:
+        _store = WalletStateStore()
+    return _store
@@ -1,5 +1,9 @@
+import time
+PROCESS_STARTED = time.monotonic()  # before the heavy imports below, for cold-start reporting
+
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 import uvicorn
 import asyncio
@@ -8,17 +12,36 @@ import sys
 import json
 import traceback
 
-# Add the src directory to the Python path
-current_dir = os.path.dirname(os.path.abspath(__file__))
-src_dir = os.path.dirname(current_dir)
-if src_dir not in sys.path:
-    sys.path.append(src_dir)
+# Package-relative imports load every module exactly once, whether the app is
+# served as src.mastra.main (Docker) or mastra.main. Run as a script, register
+# the package first (PEP 366).
+if not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import mastra  # noqa: F401
+    __package__ = "mastra"
 
-# Import local modules using absolute imports
-from mastra.agents.coordinator_agent import coordinator_agent
-from mastra.api_wallet_activity import router as wallet_activity_router
-from mastra.api_explain import router as explain_router
-from mastra.ws_alerts import router as ws_alerts_router
+from .agents.coordinator_agent import coordinator_agent
+from .api_wallet_activity import router as wallet_activity_router
+from .api_explain import router as explain_router
+from .ws_alerts import router as ws_alerts_router, get_alert_hub
+from .api_bulk import router as bulk_router
+from .api_stream import router as stream_router
+from .wallet_watcher import router as watcher_router, get_wallet_watcher
+from .warmup import router as warmup_router, get_warmup
+from .tools.http_client import (
+    get_upstream_client,
+    start_upstream_client,
+    close_upstream_client,
+)
+from .tools.rpc_client import rpc_stats
+from .tools.llm_client import get_llm_client
+from .tools.token_list import get_token_list_store
+from .tools.raydium_pools import get_pool_index
+from .cache.result_cache import get_analysis_cache
+from .cache.shared_store import close_shared_stores
+from .cache.mint_cache import get_mint_cache
+from .cache.tx_store import get_tx_store
+from .metrics import REGISTRY, router as metrics_router
 
 app = FastAPI()
 
@@ -31,6 +54,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def startup():
+    # Open the shared upstream connection pool once for the whole process
+    await start_upstream_client()
+    # Load the token-list snapshot and keep it fresh in the background
+    await get_token_list_store().start()
+    # Build the Raydium pool index in the background
+    await get_pool_index().start()
+    # Resume real-time monitoring of previously watched wallets
+    await get_wallet_watcher().start()
+    # Pre-open upstream connections and wait for the indexes (bounded); gates /api/ready
+    get_warmup().start(PROCESS_STARTED)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await get_warmup().stop()
+    await get_wallet_watcher().stop()
+    await get_alert_hub().close()
+    await get_token_list_store().stop()
+    await get_pool_index().stop()
+    await get_llm_client().close()
+    await close_upstream_client()
+    get_mint_cache().close()
+    if get_tx_store() is not None:
+        get_tx_store().close()
+    close_shared_stores()
+
 class AnalyzeWalletRequest(BaseModel):
     wallet: str
 
@@ -42,6 +92,40 @@ async def root():
 async def health_check():
     return {"status": "ok", "message": "Service is running"}
 
+@app.get("/api/upstream/stats")
+async def upstream_stats():
+    """Connection pool saturation and reuse statistics for upstream APIs."""
+    return dict(get_upstream_client().stats(), rpc=rpc_stats())
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit/miss/coalesce counters for the analysis result cache."""
+    return get_analysis_cache().stats()
+
+@app.get("/api/cache/mints")
+async def mint_cache_stats():
+    """Per-feature hit/miss counters and TTLs of the cross-wallet per-mint forensics cache."""
+    return get_mint_cache().stats()
+
+@app.get("/api/cache/transactions")
+async def tx_store_stats():
+    """Segments, size and hit/miss counters of the local finalized-transaction store."""
+    store = get_tx_store()
+    return store.stats() if store is not None else {"enabled": False}
+
+@app.get("/api/llm/stats")
+async def llm_stats():
+    """Outcome counters (hit/miss/coalesced/timeout...) and cache usage of the LLM summaries."""
+    return get_llm_client().stats()
+
+@app.get("/api/indexes")
+async def index_stats():
+    """Age and size of the token-list and Raydium pool indexes (in memory, or shared between workers)."""
+    return {
+        "token_list": get_token_list_store().stats(),
+        "raydium_pools": get_pool_index().stats(),
+    }
+
 @app.post("/api/analyze_wallet")
 async def analyze_wallet(request: Request):
     try:
@@ -49,12 +133,20 @@ async def analyze_wallet(request: Request):
         try:
             body = await request.json()
             wallet = body.get('wallet')
+            # Callers may trade speed for freshness: only accept cached results younger than max_age seconds
+            max_age = body.get('max_age', request.query_params.get('max_age'))
+            max_age = float(max_age) if max_age is not None else None
         except json.JSONDecodeError as je:
             print(f"[ERROR] Invalid JSON in request: {str(je)}")
             raise HTTPException(
                 status_code=400,
                 detail={"error": "Invalid request", "details": "Request body must be valid JSON"}
             )
+        except (TypeError, ValueError) as ve:
+            raise HTTPException(
+                status_code=400,
+                detail={"error": "Invalid request", "details": "max_age must be a number of seconds"}
+            )
         
         if not wallet or not isinstance(wallet, str) or len(wallet) < 20:  # Basic validation
             raise HTTPException(
@@ -65,7 +157,9 @@ async def analyze_wallet(request: Request):
         print(f"[DEBUG] Received request to analyze wallet: {wallet}")
         
         try:
-            result = await coordinator_agent(wallet)
+            result, cache_outcome, age = await get_analysis_cache().get_or_compute(
+                wallet, lambda: coordinator_agent(wallet), max_age=max_age
+            )
             # Ensure we have all required fields in the response
             if not all(key in result for key in ["wallet", "combined_summary", "detailed"]):
                 raise ValueError("Incomplete analysis result from coordinator_agent")
@@ -84,7 +178,10 @@ async def analyze_wallet(request: Request):
                             "reason": "Error processing token data"
                         }
             
-            return result
+            return JSONResponse(
+                content=result,
+                headers={"X-Cache": cache_outcome, "Age": str(int(age))}
+            )
             
         except Exception as e:
             print(f"[ERROR] Error in coordinator_agent: {str(e)}")
@@ -118,7 +215,46 @@ async def analyze_wallet(request: Request):
 app.include_router(wallet_activity_router)
 app.include_router(explain_router)
 app.include_router(ws_alerts_router)
+app.include_router(bulk_router)
+app.include_router(stream_router)
+app.include_router(watcher_router)
+app.include_router(metrics_router)
+app.include_router(warmup_router)
+
+def stats_metrics():
+    """Expose the existing cache and rate-limiter counters on /api/metrics."""
+    cache = get_analysis_cache().stats()
+    yield (
+        "mastra_analysis_cache_lookups_total", "counter", "Analysis result cache lookups by outcome.",
+        [({"outcome": outcome}, cache[outcome]) for outcome in ("hits", "misses", "coalesced")],
+    )
+    yield ("mastra_analysis_cache_entries", "gauge", "Analyses held in the result cache.", [({}, cache["entries"])])
+    yield (
+        "mastra_analysis_cache_shared_busy_total", "counter",
+        "Shared result store calls skipped because another worker held the write lock.", [({}, cache["shared_busy"])],
+    )
+    # Each scrape is answered by whichever worker accepted it; the pid says which one
+    yield ("mastra_worker_info", "gauge", "Process that served this scrape.", [({"pid": str(os.getpid())}, 1)])
+    limits = get_upstream_client().limiters.stats()
+    yield (
+        "mastra_upstream_throttled_total", "counter", "429/503 responses seen per upstream host.",
+        [({"host": host}, s["throttled"]) for host, s in limits.items()],
+    )
+    warmup = get_warmup().stats()
+    yield ("mastra_ready", "gauge", "1 once startup warm-up has finished.", [({}, int(warmup["ready"]))])
+    if warmup["cold_start_seconds"] is not None:
+        yield (
+            "mastra_cold_start_seconds", "gauge", "Seconds from process import to ready.",
+            [({}, warmup["cold_start_seconds"])],
+        )
+    yield (
+        "mastra_upstream_rate_limit", "gauge", "Current adaptive request rate per upstream host.",
+        [({"host": host}, s["rate"]) for host, s in limits.items()],
+    )
+
+REGISTRY.register_collector(stats_metrics)
 
 if __name__ == "__main__":
+    # Development server; reload needs an import string. Production: python -m src.mastra.serve
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port, reload=True)
+    uvicorn.run(f"{__package__}.main:app", host="0.0.0.0", port=port, reload=True)
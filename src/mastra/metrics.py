@@ -0,0 +1,265 @@
+import os
+import time
+import bisect
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+router = APIRouter()
+
+# Also emit an OpenTelemetry span per stage / upstream call (needs opentelemetry-api plus a configured SDK)
+MASTRA_OTEL_SPANS = os.getenv("MASTRA_OTEL_SPANS", "0").lower() in ("1", "true", "yes")
+
+CONTENT_TYPE = "text/plain; version=0.0.4"  # Starlette appends the charset
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_tracer = None
+if MASTRA_OTEL_SPANS:
+    try:
+        from opentelemetry import trace
+        _tracer = trace.get_tracer("mastra")
+    except ImportError:
+        print("[WARNING] MASTRA_OTEL_SPANS is set but opentelemetry-api is not installed; spans disabled")
+
+Sample = Tuple[Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    """
+    Base for a labelled metric family.
+
+    ``labels(*values)`` returns the child for one label combination; children
+    are cached, so hot paths can keep a reference and only do an attribute
+    update per observation.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        REGISTRY.register(self)
+
+    def labels(self, *values: Any) -> Any:
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            child = self._children[key] = self._child()
+        return child
+
+    def _child(self) -> Any:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in list(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key: Tuple[str, ...], child: Any) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(child.value)}"]
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _child(self) -> _Value:
+        return _Value()
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _child(self) -> _Value:
+        return _Value()
+
+
+class _Buckets:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _child(self) -> _Buckets:
+        return _Buckets(self.buckets)
+
+    def _render_child(self, key: Tuple[str, ...], child: _Buckets) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            le = f'le="{_number(bound)}"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+        labels = _labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_number(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class Registry:
+    """Metric families plus collectors that read existing stats at scrape time."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]] = []
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]) -> None:
+        """``collector()`` yields ``(name, type, help, [(labels, value), ...])`` per family."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                print(f"[WARNING] Metrics collector {getattr(collector, '__name__', collector)} failed: {str(e)}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(list(labels), list(labels.values()))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = Histogram(
+    "mastra_analysis_stage_seconds", "Duration of each wallet analysis stage.", ("stage",)
+)
+STAGE_IN_FLIGHT = Gauge(
+    "mastra_analysis_stage_in_flight", "Wallet analysis stages currently running.", ("stage",)
+)
+STAGE_ERRORS = Counter(
+    "mastra_analysis_stage_errors_total", "Wallet analysis stages that raised.", ("stage",)
+)
+
+
+def start_span(name: str, **attributes: Any) -> Optional[Any]:
+    """
+    An OpenTelemetry span when MASTRA_OTEL_SPANS is enabled, else None.
+
+    The span is not made current: stages run inside async generators where
+    attaching and detaching context across ``yield`` is unsafe.
+    """
+    if _tracer is None:
+        return None
+    return _tracer.start_span(name, attributes=attributes)
+
+
+def end_span(span: Optional[Any], error: Optional[BaseException] = None, **attributes: Any) -> None:
+    if span is None:
+        return
+    for key, value in attributes.items():
+        span.set_attribute(key, value)
+    if error is not None:
+        span.record_exception(error)
+    span.end()
+
+
+@contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    """Time one analysis stage into the stage histogram / in-flight gauge (and a span if enabled)."""
+    in_flight = STAGE_IN_FLIGHT.labels(stage)
+    in_flight.inc()
+    span = start_span(f"analysis.{stage}")
+    error = None
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        # GeneratorExit / CancelledError mean the client went away, not that the stage failed
+        if isinstance(e, Exception):
+            error = e
+            STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - started)
+        in_flight.dec()
+        end_span(span, error)
+
+
+async def track_awaitable(stage: str, awaitable: Any) -> Any:
+    """Await ``awaitable`` as one tracked stage (for work running as a separate task)."""
+    with track_stage(stage):
+        return await awaitable
+
+
+@router.get("/api/metrics")
+async def metrics():
+    """
+    Prometheus text exposition of stage timings, upstream calls and cache counters.
+
+    Counters are per process: behind ``serve.py`` with several workers a scrape
+    reports only the worker that accepted it (``mastra_worker_info{pid}``).
+    """
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,45 @@
+"""
+Production entry point: ``python -m src.mastra.serve``.
+
+Starts WEB_CONCURRENCY uvicorn worker processes (default: one per CPU) on
+one port. With more than one worker, MASTRA_SHARED_CACHE is switched on so
+analysis results, token metadata and the Raydium pool index are kept once in
+SQLite files under MASTRA_CACHE_DIR (read through the shared OS page cache)
+instead of once per worker, and only one worker refreshes the indexes.
+"""
+import os
+import sys
+
+import uvicorn
+
+# Run as a script, register the package first (PEP 366), as main.py does
+if not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = "mastra"
+
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+TIMEOUT_KEEP_ALIVE = int(os.getenv("TIMEOUT_KEEP_ALIVE", "5"))
+
+
+def main() -> None:
+    workers = max(1, WEB_CONCURRENCY)
+    if workers > 1:
+        # Read by the workers at import time; set before uvicorn spawns them
+        os.environ.setdefault("MASTRA_SHARED_CACHE", "1")
+    print(f"[INFO] Serving on {HOST}:{PORT} with {workers} worker(s)")
+    uvicorn.run(
+        f"{__package__}.main:app",
+        host=HOST,
+        port=PORT,
+        workers=workers,
+        log_level=LOG_LEVEL,
+        timeout_keep_alive=TIMEOUT_KEEP_ALIVE,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
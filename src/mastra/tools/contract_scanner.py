@@ -1,33 +1,69 @@
 import os
-import aiohttp
-from typing import Any, Dict, List
+import asyncio
+from typing import Any, Dict, List, Optional
 
-SOLSCAN_API_URL = "https://api.solscan.io"
+from .http_client import get_upstream_client
+from .solana_data_fetcher import get_mint_info
+from ..cache.mint_cache import get_mint_cache
+from .request_memo import memoized
 
-async def analyze_contract(token_address: str) -> Dict[str, Any]:
+SOLSCAN_API_URL = os.getenv("SOLSCAN_API_URL", "https://api.solscan.io")
+
+async def get_top_holder_pct(token_address: str) -> float:
     """
-    Gathers token holder distribution, mint authority, and suspicious flags from Solscan.
-    Returns structured data for risk analysis.
+    Share of the top-10 holder supply owned by the largest holder, from Solscan.
+    Returns 0 when the distribution is unavailable.
     """
+    return await fetch_top_holder_pct(token_address) or 0
+
+async def fetch_top_holder_pct(token_address: str) -> Optional[float]:
+    """Like get_top_holder_pct, but None when Solscan could not be read (so the miss is not cached)."""
+    return await memoized(
+        SOLSCAN_API_URL, "solscan:token/holders", [token_address], lambda: _request_top_holder_pct(token_address)
+    )
+
+async def _request_top_holder_pct(token_address: str) -> Optional[float]:
     headers = {"accept": "application/json"}
     url = f"{SOLSCAN_API_URL}/token/holders?tokenAddress={token_address}&offset=0&limit=10"
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url, headers=headers, timeout=10) as resp:
-                if resp.status == 200:
-                    holders = await resp.json()
-                    if isinstance(holders, list):
-                        total = sum(h.get("amount", 0) for h in holders)
-                        top_holder_pct = holders[0]["amount"] / total * 100 if total > 0 else 0
-                    else:
-                        top_holder_pct = 0
-                else:
-                    top_holder_pct = 0
-        except Exception as e:
-            top_holder_pct = 0
-    # Mint authority and suspicious flags (mocked for now)
-    # TODO: Replace with real Solscan/Metaplex queries
-    mint_authority = "renounced" if token_address.endswith("A") else "active"
+    client = get_upstream_client()
+    try:
+        async with client.get(url, headers=headers, timeout=10) as resp:
+            if resp.status == 200:
+                holders = await resp.json()
+                if isinstance(holders, list):
+                    total = sum(h.get("amount", 0) for h in holders)
+                    return holders[0]["amount"] / total * 100 if total > 0 else 0
+    except Exception as e:
+        pass
+    return None
+
+async def get_mint_authority(token_address: str) -> str:
+    """
+    Reads the on-chain mint account and reports "active", "renounced" or "unknown".
+    Concurrent lookups for different tokens share one getMultipleAccounts call.
+    """
+    try:
+        mint_info = await get_mint_info(token_address)
+    except Exception as e:
+        return "unknown"
+    if mint_info is None:
+        return "unknown"
+    return "active" if mint_info.get("mintAuthority") else "renounced"
+
+async def analyze_contract(token_address: str) -> Dict[str, Any]:
+    """
+    Gathers token holder distribution, mint authority, and suspicious flags.
+    Returns structured data for risk analysis.
+    
+    Both features come from the cross-wallet per-mint cache, each with its own TTL.
+    """
+    cache = get_mint_cache()
+    top_holder_pct, mint_authority = await asyncio.gather(
+        cache.get_or_fetch(token_address, "holders", lambda: fetch_top_holder_pct(token_address)),
+        cache.get_or_fetch(token_address, "mint_authority", lambda: get_mint_authority(token_address)),
+    )
+    top_holder_pct = top_holder_pct or 0
+    # Suspicious flags (heuristic for now)
     suspicious_flags = []
     if top_holder_pct > 50:
         suspicious_flags.append("High holder concentration")
@@ -37,5 +73,5 @@ async def analyze_contract(token_address: str) -> Dict[str, Any]:
         "top_holder_pct": top_holder_pct,
         "mint_authority": mint_authority,
         "suspicious_flags": suspicious_flags,
-        "note": "Contract analysis partially mocked. Replace with full logic."
+        "note": "Suspicious-name check is heuristic. Replace with full logic."
     }
@@ -0,0 +1,83 @@
+from array import array
+from typing import Any, Dict, Iterator, List, Optional
+
+# u64 token amounts and u8 decimals, as stored on chain
+AMOUNT_TYPECODE = "Q"
+DECIMALS_TYPECODE = "B"
+
+
+class Holdings:
+    """
+    Non-zero token balances of one wallet, stored as column arrays.
+
+    Mints are kept in a list and amounts/decimals in typed arrays, so a
+    wallet with thousands of token accounts costs a few dozen bytes per
+    holding instead of a dict per account. Dicts are only built on demand
+    for the holdings an analysis actually looks at (see :meth:`tokens`).
+    """
+
+    __slots__ = ("owner", "mints", "amounts", "decimals", "skipped")
+
+    def __init__(self, owner: str) -> None:
+        self.owner = owner
+        self.mints: List[str] = []
+        self.amounts = array(AMOUNT_TYPECODE)
+        self.decimals = array(DECIMALS_TYPECODE)
+        self.skipped = 0  # zero-balance or malformed accounts dropped while parsing
+
+    def __len__(self) -> int:
+        return len(self.mints)
+
+    def add(self, mint: str, amount: int, decimals: int) -> bool:
+        """Append one holding; zero balances and out-of-range values are skipped."""
+        if not mint or amount <= 0:
+            self.skipped += 1
+            return False
+        try:
+            self.amounts.append(amount)
+            self.decimals.append(decimals)
+        except OverflowError:
+            if len(self.amounts) > len(self.decimals):
+                self.amounts.pop()
+            self.skipped += 1
+            return False
+        self.mints.append(mint)
+        return True
+
+    def add_account(self, item: Any) -> bool:
+        """Append a ``jsonParsed`` token account from ``getTokenAccountsByOwner``."""
+        if not isinstance(item, dict):
+            self.skipped += 1
+            return False
+        info = item.get("account", {}).get("data", {}).get("parsed", {}).get("info", {})
+        token_amount = info.get("tokenAmount", {})
+        amount = token_amount.get("amount")
+        if amount == "0" or amount is None:
+            self.skipped += 1  # Skip tokens with zero balance
+            return False
+        try:
+            return self.add(info.get("mint"), int(amount), int(token_amount.get("decimals", 9)))
+        except (TypeError, ValueError):
+            self.skipped += 1
+            return False
+
+    def ui_amount(self, index: int) -> float:
+        return self.amounts[index] / 10 ** self.decimals[index]
+
+    def token(self, index: int) -> Dict[str, Any]:
+        """Holding ``index`` in the TokenInfo shape the agents consume."""
+        return {
+            "mint": self.mints[index],
+            "owner": self.owner,
+            "amount": self.amounts[index],
+            "decimals": self.decimals[index],
+            "ui_amount": self.ui_amount(index),
+        }
+
+    def tokens(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """The first ``limit`` holdings (all by default) as dicts."""
+        count = len(self.mints) if limit is None else min(limit, len(self.mints))
+        return [self.token(i) for i in range(count)]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (self.token(i) for i in range(len(self.mints)))
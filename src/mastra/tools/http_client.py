@@ -0,0 +1,363 @@
+import os
+import asyncio
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Union
+
+import aiohttp
+from yarl import URL
+
+from ..metrics import Counter, Gauge, Histogram, end_span, start_span
+from .rate_limiter import (
+    UPSTREAM_RETRIES,
+    UPSTREAM_RETRY_BASE,
+    RateLimiterRegistry,
+    parse_retry_after,
+)
+
+logger = logging.getLogger(__name__)
+
+# Pool configuration (overridable through the environment)
+POOL_LIMIT = int(os.getenv("UPSTREAM_POOL_LIMIT", "100"))
+POOL_LIMIT_PER_HOST = int(os.getenv("UPSTREAM_POOL_LIMIT_PER_HOST", "20"))
+DNS_CACHE_TTL = int(os.getenv("UPSTREAM_DNS_CACHE_TTL", "300"))  # seconds
+KEEPALIVE_TIMEOUT = float(os.getenv("UPSTREAM_KEEPALIVE_TIMEOUT", "30"))  # seconds
+DEFAULT_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "30"))  # seconds
+
+USER_AGENT = "Nosana/1.0"
+
+# Statuses meaning "not processed, try again later"; retried after backing off
+THROTTLE_STATUSES = (429, 503)
+
+UPSTREAM_REQUESTS = Counter(
+    "mastra_upstream_requests_total", "Outbound HTTP requests by host, method and status.", ("host", "method", "status")
+)
+UPSTREAM_SECONDS = Histogram(
+    "mastra_upstream_request_seconds", "Outbound request duration, including reading the body.", ("host",)
+)
+UPSTREAM_IN_FLIGHT = Gauge("mastra_upstream_in_flight", "Outbound requests currently open.", ("host",))
+UPSTREAM_BYTES = Counter(
+    "mastra_upstream_bytes_total", "Request/response body bytes exchanged with upstream hosts.", ("host", "direction")
+)
+
+
+class HostStats:
+    """Counters for a single upstream host."""
+
+    __slots__ = (
+        "requests", "errors", "in_flight", "connections_created",
+        "connections_reused", "queued", "queue_wait_total", "dns_hits", "dns_misses",
+    )
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.queued = 0
+        self.queue_wait_total = 0.0
+        self.dns_hits = 0
+        self.dns_misses = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        acquired = self.connections_created + self.connections_reused
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "reuse_ratio": round(self.connections_reused / acquired, 3) if acquired else 0.0,
+            "queued_for_connection": self.queued,
+            "queue_wait_seconds": round(self.queue_wait_total, 3),
+            "dns_cache_hits": self.dns_hits,
+            "dns_cache_misses": self.dns_misses,
+        }
+
+
+class UpstreamClient:
+    """
+    Long-lived aiohttp session shared by every outbound call of the Mastra tools.
+
+    One TCPConnector provides per-host connection pools with keep-alive and a
+    DNS cache, so repeated calls to Helius, Solscan, Raydium and GitHub reuse
+    warm TLS connections instead of handshaking for every request. Every
+    request also passes through the host's adaptive rate limiter.
+    """
+
+    def __init__(
+        self,
+        limit: int = POOL_LIMIT,
+        limit_per_host: int = POOL_LIMIT_PER_HOST,
+        dns_cache_ttl: int = DNS_CACHE_TTL,
+        keepalive_timeout: float = KEEPALIVE_TIMEOUT,
+        timeout: float = DEFAULT_TIMEOUT,
+        retries: int = UPSTREAM_RETRIES,
+    ) -> None:
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.retries = retries
+        self.limiters = RateLimiterRegistry()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._hosts: Dict[str, HostStats] = {}
+        self._started_at: Optional[float] = None
+
+    # -- lifecycle -----------------------------------------------------
+
+    async def start(self) -> aiohttp.ClientSession:
+        """Create the pooled session (idempotent)."""
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed and self._loop is loop:
+            return self._session
+        if self._session is not None and not self._session.closed:
+            # Session belongs to a different (finished) event loop; drop it.
+            logger.debug("Discarding upstream session bound to a stale event loop")
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": USER_AGENT},
+            trace_configs=[self._trace_config()],
+        )
+        self._loop = loop
+        self._started_at = time.time()
+        logger.info(
+            "Upstream HTTP pool started (limit=%s, per_host=%s, dns_ttl=%ss)",
+            self.limit, self.limit_per_host, self.dns_cache_ttl,
+        )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the pooled session and all keep-alive connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+    async def session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it lazily if needed."""
+        return await self.start()
+
+    # -- requests ------------------------------------------------------
+
+    @asynccontextmanager
+    async def request(
+        self,
+        method: str,
+        url: str,
+        timeout: Optional[Union[float, aiohttp.ClientTimeout]] = None,
+        cost: float = 1.0,
+        retries: Optional[int] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """
+        Issue a request over the shared pool.
+
+        Usage mirrors ``session.request``::
+
+            async with client.request("GET", url, timeout=10) as resp:
+                data = await resp.json()
+
+        The request waits for a slot from the host's rate limiter (``cost``
+        tokens, e.g. the number of calls in a JSON-RPC batch). Throttled
+        responses (429/503) are retried with jittered backoff, honoring
+        Retry-After; the last one is returned to the caller unchanged.
+        Pass ``retries=0`` when the caller has its own fallback.
+        """
+        session = await self.session()
+        if timeout is not None and not isinstance(timeout, aiohttp.ClientTimeout):
+            timeout = aiohttp.ClientTimeout(total=float(timeout))
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        host = URL(url).host or "unknown"
+        limiter = self.limiters.get(host)
+        in_flight = UPSTREAM_IN_FLIGHT.labels(host)
+        retries = self.retries if retries is None else retries
+        attempt = 0
+        while True:
+            async with limiter.slot(cost):
+                status = "error"
+                span = start_span(f"upstream {method}", host=host)
+                in_flight.inc()
+                started = time.perf_counter()
+                try:
+                    async with session.request(method, url, **kwargs) as resp:
+                        status = str(resp.status)
+                        if resp.status not in THROTTLE_STATUSES:
+                            limiter.on_success()
+                            yield resp
+                            return
+                        retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                        limiter.on_throttle(retry_after)
+                        delay = self._backoff(attempt, retry_after)
+                        if attempt >= retries or delay > limiter.max_wait:
+                            yield resp
+                            return
+                finally:
+                    UPSTREAM_SECONDS.labels(host).observe(time.perf_counter() - started)
+                    UPSTREAM_REQUESTS.labels(host, method, status).inc()
+                    in_flight.dec()
+                    end_span(span, status=status, attempt=attempt)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return retry_after + random.uniform(0, UPSTREAM_RETRY_BASE)
+        return UPSTREAM_RETRY_BASE * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    async def prewarm(self, urls: Iterable[str], per_host: int = 1, timeout: float = 5.0) -> int:
+        """
+        Open keep-alive connections (DNS + TCP + TLS) to the given upstreams
+        ahead of the first real request. Returns how many probes succeeded;
+        any HTTP status counts, since only the pooled connection matters.
+        """
+        origins = list(dict.fromkeys(str(URL(url).origin()) for url in urls if url))
+
+        async def probe(origin: str) -> bool:
+            try:
+                async with self.request("HEAD", origin, timeout=timeout, retries=0) as resp:
+                    await resp.read()
+                return True
+            except Exception as e:
+                logger.debug(f"Could not prewarm {origin}: {str(e)}")
+                return False
+
+        results = await asyncio.gather(*(probe(origin) for origin in origins for _ in range(per_host)))
+        return sum(results)
+
+    def get(self, url: str, **kwargs: Any):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any):
+        return self.request("POST", url, **kwargs)
+
+    # -- statistics ----------------------------------------------------
+
+    def _host(self, host: Optional[str]) -> HostStats:
+        key = host or "unknown"
+        stats = self._hosts.get(key)
+        if stats is None:
+            stats = self._hosts[key] = HostStats()
+        return stats
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx: SimpleNamespace, params) -> None:
+            ctx.host = params.url.host
+            stats = self._host(ctx.host)
+            stats.requests += 1
+            stats.in_flight += 1
+
+        async def on_request_end(session, ctx, params) -> None:
+            self._host(ctx.host).in_flight -= 1
+
+        async def on_request_exception(session, ctx, params) -> None:
+            stats = self._host(ctx.host)
+            stats.in_flight -= 1
+            stats.errors += 1
+
+        async def on_connection_queued_start(session, ctx, params) -> None:
+            ctx.queued_at = time.perf_counter()
+            self._host(ctx.host).queued += 1
+
+        async def on_connection_queued_end(session, ctx, params) -> None:
+            stats = self._host(ctx.host)
+            stats.queued -= 1
+            stats.queue_wait_total += time.perf_counter() - getattr(ctx, "queued_at", time.perf_counter())
+
+        async def on_connection_create_end(session, ctx, params) -> None:
+            self._host(ctx.host).connections_created += 1
+
+        async def on_connection_reuseconn(session, ctx, params) -> None:
+            self._host(ctx.host).connections_reused += 1
+
+        async def on_request_chunk_sent(session, ctx, params) -> None:
+            UPSTREAM_BYTES.labels(ctx.host or "unknown", "sent").inc(len(params.chunk))
+
+        async def on_response_chunk_received(session, ctx, params) -> None:
+            UPSTREAM_BYTES.labels(ctx.host or "unknown", "received").inc(len(params.chunk))
+
+        async def on_dns_cache_hit(session, ctx, params) -> None:
+            self._host(params.host).dns_hits += 1
+
+        async def on_dns_cache_miss(session, ctx, params) -> None:
+            self._host(params.host).dns_misses += 1
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_request_end.append(on_request_end)
+        trace.on_request_exception.append(on_request_exception)
+        trace.on_connection_queued_start.append(on_connection_queued_start)
+        trace.on_connection_queued_end.append(on_connection_queued_end)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace.on_request_chunk_sent.append(on_request_chunk_sent)
+        trace.on_response_chunk_received.append(on_response_chunk_received)
+        trace.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool saturation and connection-reuse statistics."""
+        in_flight = sum(s.in_flight for s in self._hosts.values())
+        return {
+            "started": self._session is not None and not self._session.closed,
+            "uptime_seconds": round(time.time() - self._started_at, 1) if self._started_at else 0,
+            "limits": {
+                "total": self.limit,
+                "per_host": self.limit_per_host,
+                "dns_cache_ttl": self.dns_cache_ttl,
+                "keepalive_timeout": self.keepalive_timeout,
+            },
+            "in_flight": in_flight,
+            "saturation": round(in_flight / self.limit, 3) if self.limit else 0.0,
+            "hosts": {
+                host: dict(
+                    stats.as_dict(),
+                    saturation=round(stats.in_flight / self.limit_per_host, 3) if self.limit_per_host else 0.0,
+                )
+                for host, stats in self._hosts.items()
+            },
+            "rate_limits": self.limiters.stats(),
+        }
+
+
+# Process-wide client shared by all tools
+_client: Optional[UpstreamClient] = None
+
+
+def get_upstream_client() -> UpstreamClient:
+    """Return the process-wide upstream client."""
+    global _client
+    if _client is None:
+        _client = UpstreamClient()
+    return _client
+
+
+async def start_upstream_client() -> UpstreamClient:
+    """Open the shared connection pool (called from the app startup hook)."""
+    client = get_upstream_client()
+    await client.start()
+    return client
+
+
+async def close_upstream_client() -> None:
+    """Close the shared connection pool (called from the app shutdown hook)."""
+    if _client is not None:
+        await _client.close()
@@ -1,36 +1,45 @@
 import os
-import aiohttp
 from typing import Any, Dict, Optional
 
-RAYDIUM_API_URL = "https://api.raydium.io/v2/sdk/liquidity/mainnet.json"
+from .raydium_pools import RAYDIUM_API_URL, get_pool_index
+from ..cache.mint_cache import get_mint_cache
 
 async def get_liquidity(token_address: str) -> Dict[str, Any]:
     """
-    Queries Raydium API for pool sizes and LP ratio for a given token.
-    Returns liquidity in USD and pool data if available.
+    Looks up Raydium pools for a given token in the background-refreshed pool index.
+    Returns aggregated liquidity in USD across all pools and the deepest pool if available.
+    Results are shared across wallets through the per-mint cache (MINT_LIQUIDITY_TTL).
     """
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(RAYDIUM_API_URL, timeout=10) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    # Find pools containing the token
-                    pools = [p for p in data.get("official", []) if token_address in (p.get("baseMint"), p.get("quoteMint"))]
-                    if pools:
-                        pool = pools[0]
-                        liquidity = pool.get("liquidity", 0)
-                        return {"liquidity_usd": liquidity, "pool": pool}
-                    return {"liquidity_usd": 0, "pool": None, "note": "No pool found"}
-                else:
-                    return {"liquidity_usd": 0, "error": f"Raydium error {resp.status}"}
-        except Exception as e:
-            return {"liquidity_usd": 0, "error": str(e)}
+    return await get_mint_cache().get_or_fetch(token_address, "liquidity", lambda: _lookup_liquidity(token_address))
+
+async def _lookup_liquidity(token_address: str) -> Dict[str, Any]:
+    try:
+        index = get_pool_index()
+        if not index.loaded:
+            # Cold start: make sure the background build is running, but answer now (error entries are not cached)
+            await index.start()
+            return {"liquidity_usd": 0, "error": f"Raydium pool index unavailable: {index.last_error or 'loading'}"}
+        pools = index.pools_for(token_address)
+        if pools:
+            pool = max(pools, key=lambda p: p.liquidity)
+            return {
+                "liquidity_usd": index.liquidity_for(token_address),
+                "pool": pool.as_dict(),
+                "pool_count": len(pools),
+                "official_pool_count": sum(1 for p in pools if p.official),
+            }
+        return {"liquidity_usd": 0, "pool": None, "note": "No pool found"}
+    except Exception as e:
+        return {"liquidity_usd": 0, "error": str(e)}
 
 async def is_lp_locked(token_address: str) -> Dict[str, Any]:
     """
     Heuristic check for LP lock by inspecting pool metadata and common lock patterns.
-    Returns True/False and supporting info.
+    Returns True/False and supporting info, cached per mint for MINT_LP_LOCK_TTL.
     """
+    return await get_mint_cache().get_or_fetch(token_address, "lp_lock", lambda: _check_lp_lock(token_address))
+
+async def _check_lp_lock(token_address: str) -> Dict[str, Any]:
     # TODO: Implement real LP lock detection (mock for now)
     # In production, check for known lock contracts or token metadata flags
     # For demo, randomly assign lock status
@@ -0,0 +1,254 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from ..cache.llm_cache import LLMCache
+from ..metrics import Counter, Histogram
+from .http_client import get_upstream_client
+
+logger = logging.getLogger(__name__)
+
+# Ollama base URL including the /api suffix (same variable the agent container uses); empty disables the LLM
+OLLAMA_API_URL = os.getenv("OLLAMA_API_URL", "").rstrip("/")
+MODEL_NAME_AT_ENDPOINT = os.getenv("MODEL_NAME_AT_ENDPOINT", "qwen3:8b")
+# Whole-generation budget (queueing for the GPU included) before falling back to the template
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "20"))
+# Generations sent to the model at once; further prompts queue within LLM_TIMEOUT
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "256"))
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.2"))
+# After a failed generation, skip the model (template summaries only) for this long
+LLM_RETRY_AFTER = float(os.getenv("LLM_RETRY_AFTER", "30"))
+
+LLM_REQUESTS = Counter("mastra_llm_requests_total", "LLM completions requested, by outcome.", ("outcome",))
+LLM_SECONDS = Histogram("mastra_llm_generation_seconds", "Duration of LLM generations sent to the model.")
+LLM_TOKENS = Counter("mastra_llm_generated_tokens_total", "Tokens generated by the model.")
+
+THINK_BLOCK = re.compile(r"<think>.*?</think>", re.DOTALL)
+
+
+class LLMError(Exception):
+    """The model could not produce a completion (disabled, unreachable, timed out or errored)."""
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so formatting-only differences share a cache entry."""
+    return " ".join(prompt.split())
+
+
+def cache_key(model: str, prompt: str, features: Optional[Dict[str, Any]] = None) -> str:
+    payload = json.dumps(
+        {"model": model, "prompt": normalize_prompt(prompt), "features": features},
+        sort_keys=True, separators=(",", ":"), default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def clean_completion(text: str) -> str:
+    """Drop reasoning blocks some models (e.g. qwen3) emit ahead of the answer."""
+    return THINK_BLOCK.sub("", text).strip()
+
+
+class Generation:
+    """One in-flight completion; any number of callers replay and follow its chunks."""
+
+    __slots__ = ("chunks", "done", "error", "_changed")
+
+    def __init__(self) -> None:
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+
+    def push(self, chunk: str) -> None:
+        self.chunks.append(chunk)
+        self._changed.set()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.done = True
+        self.error = error
+        self._changed.set()
+
+    async def follow(self) -> AsyncIterator[str]:
+        sent = 0
+        while True:
+            while sent < len(self.chunks):
+                yield self.chunks[sent]
+                sent += 1
+            if self.done:
+                break
+            self._changed.clear()
+            await self._changed.wait()
+        if self.error is not None:
+            raise LLMError(str(self.error) or type(self.error).__name__) from self.error
+
+
+class OllamaClient:
+    """
+    Async client for the Ollama ``/api/generate`` endpoint.
+
+    Requests go over the shared upstream pool and are streamed token by
+    token. Completions are cached (memory + SQLite) under a hash of the
+    model, the normalized prompt and the analysis features, and identical
+    prompts in flight at the same time share one generation. Generations run
+    as their own tasks, so a caller that disconnects does not waste the GPU
+    time already spent: the result still lands in the cache.
+    """
+
+    def __init__(
+        self,
+        base_url: str = OLLAMA_API_URL,
+        model: str = MODEL_NAME_AT_ENDPOINT,
+        timeout: float = LLM_TIMEOUT,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        cache: Optional[LLMCache] = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self.cache = cache or LLMCache()
+        self._slots = asyncio.Semaphore(max(1, max_concurrency))
+        self._inflight: Dict[str, Generation] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._down_until = 0.0
+        self.outcomes: Dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.base_url)
+
+    def _count(self, outcome: str) -> None:
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        LLM_REQUESTS.labels(outcome).inc()
+
+    async def stream(
+        self,
+        prompt: str,
+        features: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Yield the completion for ``prompt`` chunk by chunk.
+
+        A cached completion is yielded as a single chunk. Raises LLMError when
+        no completion can be produced; chunks already yielded are then partial.
+        """
+        key = cache_key(self.model, prompt, features)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            self._count("hit")
+            yield cached
+            return
+        generation = self._inflight.get(key)
+        if generation is not None:
+            self._count("coalesced")
+        else:
+            if not self.enabled:
+                self._count("disabled")
+                raise LLMError("No OLLAMA_API_URL configured")
+            if time.monotonic() < self._down_until:
+                self._count("skipped")
+                raise LLMError("LLM endpoint recently failed")
+            self._count("miss")
+            generation = self._inflight[key] = Generation()
+            self._tasks[key] = asyncio.ensure_future(
+                self._generate(key, prompt, generation, self.timeout if timeout is None else timeout)
+            )
+        async for chunk in generation.follow():
+            yield chunk
+
+    async def generate(
+        self,
+        prompt: str,
+        features: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Optional[str]:
+        """The full completion, or None when the model is unavailable (callers use their template)."""
+        parts = []
+        try:
+            async for chunk in self.stream(prompt, features, timeout):
+                parts.append(chunk)
+        except LLMError:
+            return None
+        return clean_completion("".join(parts)) or None
+
+    async def _generate(self, key: str, prompt: str, generation: Generation, timeout: float) -> None:
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._run(prompt, generation, started + timeout), timeout)
+            text = clean_completion("".join(generation.chunks))
+            if not text:
+                raise LLMError("Empty completion")
+            await self.cache.put(key, self.model, text)
+            generation.finish()
+        except Exception as e:
+            self._count("timeout" if isinstance(e, asyncio.TimeoutError) else "error")
+            self._down_until = time.monotonic() + LLM_RETRY_AFTER
+            logger.warning(f"LLM generation failed ({type(e).__name__}: {str(e)}); using template summaries for {LLM_RETRY_AFTER:.0f}s")
+            generation.finish(e)
+        finally:
+            self._inflight.pop(key, None)
+            self._tasks.pop(key, None)
+
+    async def _run(self, prompt: str, generation: Generation, deadline: float) -> None:
+        async with self._slots:
+            started = time.monotonic()
+            body = {
+                "model": self.model,
+                "prompt": prompt,
+                "stream": True,
+                "think": False,
+                "options": {"temperature": LLM_TEMPERATURE, "num_predict": LLM_MAX_TOKENS},
+            }
+            async with get_upstream_client().post(
+                f"{self.base_url}/generate",
+                json=body,
+                timeout=max(0.1, deadline - time.monotonic()),
+                retries=0,
+            ) as resp:
+                if resp.status != 200:
+                    raise LLMError(f"Ollama HTTP {resp.status}: {(await resp.text())[:200]}")
+                async for line in resp.content:
+                    if not line.strip():
+                        continue
+                    message = json.loads(line)
+                    if message.get("error"):
+                        raise LLMError(message["error"])
+                    if message.get("response"):
+                        generation.push(message["response"])
+                    if message.get("done"):
+                        LLM_TOKENS.labels().inc(message.get("eval_count") or 0)
+                        break
+            LLM_SECONDS.labels().observe(time.monotonic() - started)
+
+    async def close(self) -> None:
+        """Wait out generations still running (so they are cached), then close the cache."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self.cache.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "model": self.model,
+            "in_flight": len(self._inflight),
+            "outcomes": dict(self.outcomes),
+            "backoff_seconds": round(max(0.0, self._down_until - time.monotonic()), 1),
+            "cache": self.cache.stats(),
+        }
+
+
+_client: Optional[OllamaClient] = None
+
+
+def get_llm_client() -> OllamaClient:
+    """Return the process-wide Ollama client."""
+    global _client
+    if _client is None:
+        _client = OllamaClient()
+    return _client
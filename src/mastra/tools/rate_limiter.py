@@ -0,0 +1,217 @@
+import os
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Default per-host quota (requests per second, burst size) and concurrency ceiling
+UPSTREAM_RATE = float(os.getenv("UPSTREAM_RATE", "50"))
+UPSTREAM_BURST = float(os.getenv("UPSTREAM_BURST", "0")) or UPSTREAM_RATE
+UPSTREAM_MAX_CONCURRENCY = int(os.getenv("UPSTREAM_MAX_CONCURRENCY", os.getenv("UPSTREAM_POOL_LIMIT_PER_HOST", "20")))
+# Per-host overrides, e.g. "mainnet.helius-rpc.com=10,public-api.solscan.io=5"
+UPSTREAM_RATE_LIMITS = os.getenv("UPSTREAM_RATE_LIMITS", "")
+# Callers queue for at most this long before the request fails as rate limited
+UPSTREAM_MAX_QUEUE_WAIT = float(os.getenv("UPSTREAM_MAX_QUEUE_WAIT", "30"))
+# Throttled (429/503) requests are retried this many times with jittered backoff
+UPSTREAM_RETRIES = int(os.getenv("UPSTREAM_RETRIES", "3"))
+UPSTREAM_RETRY_BASE = float(os.getenv("UPSTREAM_RETRY_BASE", "0.5"))
+
+# Throttling signals trigger at most one multiplicative decrease per this window
+DECREASE_WINDOW = 1.0
+MIN_RATE = 0.5
+
+
+class RateLimitExceeded(aiohttp.ClientError):
+    """Raised when a request could not get an upstream slot within the queue wait budget."""
+
+    def __init__(self, host: str, retry_after: float) -> None:
+        super().__init__(f"Rate limit for {host} exceeded; retry after {retry_after:.0f} seconds")
+        self.host = host
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def parse_rate_overrides(spec: str) -> Dict[str, float]:
+    overrides = {}
+    for item in spec.split(","):
+        host, _, rate = item.strip().partition("=")
+        if host and rate:
+            try:
+                overrides[host.strip()] = float(rate)
+            except ValueError:
+                logger.warning(f"Ignoring invalid UPSTREAM_RATE_LIMITS entry: {item}")
+    return overrides
+
+
+class HostLimiter:
+    """
+    Token bucket plus an AIMD concurrency window for one upstream host.
+
+    Every request takes ``cost`` tokens (refilled at ``rate`` per second)
+    and one concurrency slot. Successes grow the rate and window additively;
+    a 429/503 halves both (at most once per DECREASE_WINDOW) and a
+    Retry-After pauses the whole host. Waiters queue instead of failing
+    until ``max_wait`` runs out.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        rate: float = UPSTREAM_RATE,
+        burst: Optional[float] = None,
+        max_concurrency: int = UPSTREAM_MAX_CONCURRENCY,
+        max_wait: float = UPSTREAM_MAX_QUEUE_WAIT,
+    ) -> None:
+        self.host = host
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst or max(rate, 1.0)
+        self.tokens = self.burst
+        self.max_concurrency = max(1, max_concurrency)
+        self.concurrency = float(self.max_concurrency)
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.waiting = 0
+        self.paused_until = 0.0
+        self._refilled_at = time.monotonic()
+        self._decreased_at = 0.0
+        self._cond: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.throttled = 0
+        self.rejected = 0
+        self.queue_wait_total = 0.0
+
+    def _condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._cond is None or self._loop is not loop:
+            self._cond = asyncio.Condition()
+            self._loop = loop
+        return self._cond
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    async def acquire(self, cost: float = 1.0, max_wait: Optional[float] = None) -> None:
+        cost = min(cost, self.burst)
+        max_wait = self.max_wait if max_wait is None else max_wait
+        cond = self._condition()
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            async with cond:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if now < self.paused_until:
+                        delay = self.paused_until - now
+                    elif self.in_flight >= int(self.concurrency):
+                        delay = None  # woken by release()
+                    elif self.tokens < cost:
+                        delay = (cost - self.tokens) / self.rate
+                    else:
+                        self.tokens -= cost
+                        self.in_flight += 1
+                        self.queue_wait_total += now - started
+                        return
+                    remaining = max_wait - (now - started)
+                    if remaining <= 0 or (delay is not None and delay > remaining):
+                        self.rejected += 1
+                        raise RateLimitExceeded(self.host, max(delay or 0.0, 1.0))
+                    try:
+                        await asyncio.wait_for(cond.wait(), min(delay, remaining) if delay is not None else remaining)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            self.waiting -= 1
+
+    async def release(self) -> None:
+        self.in_flight -= 1
+        cond = self._condition()
+        async with cond:
+            cond.notify()
+
+    @asynccontextmanager
+    async def slot(self, cost: float = 1.0) -> AsyncIterator[None]:
+        await self.acquire(cost)
+        try:
+            yield
+        finally:
+            await self.release()
+
+    def on_success(self) -> None:
+        """Additive increase: about +1 req/s and +1 slot per window's worth of successes."""
+        self.rate = min(self.max_rate, self.rate + 1.0 / self.rate)
+        self.concurrency = min(float(self.max_concurrency), self.concurrency + 1.0 / self.concurrency)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """Multiplicative decrease, plus a host-wide pause when the provider sent Retry-After."""
+        self.throttled += 1
+        now = time.monotonic()
+        if retry_after:
+            self.paused_until = max(self.paused_until, now + retry_after)
+        if now - self._decreased_at >= DECREASE_WINDOW:
+            self._decreased_at = now
+            self.rate = max(MIN_RATE, self.rate / 2)
+            self.concurrency = max(1.0, self.concurrency / 2)
+            self.tokens = min(self.tokens, 0.0)
+            logger.warning(
+                f"Upstream {self.host} throttled; rate={self.rate:.1f}/s concurrency={int(self.concurrency)}"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate": round(self.rate, 2),
+            "max_rate": self.max_rate,
+            "concurrency": int(self.concurrency),
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "paused_for": round(max(0.0, self.paused_until - time.monotonic()), 2),
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+            "queue_wait_seconds": round(self.queue_wait_total, 3),
+        }
+
+
+class RateLimiterRegistry:
+    """One HostLimiter per upstream host, created on first use."""
+
+    def __init__(self, overrides: Optional[Dict[str, float]] = None) -> None:
+        self.overrides = parse_rate_overrides(UPSTREAM_RATE_LIMITS) if overrides is None else overrides
+        self._limiters: Dict[str, HostLimiter] = {}
+
+    def get(self, host: Optional[str]) -> HostLimiter:
+        key = host or "unknown"
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            rate = self.overrides.get(key, UPSTREAM_RATE)
+            burst = UPSTREAM_BURST if key not in self.overrides else rate
+            limiter = self._limiters[key] = HostLimiter(key, rate=rate, burst=burst)
+        return limiter
+
+    def stats(self) -> Dict[str, Any]:
+        return {host: limiter.stats() for host, limiter in self._limiters.items()}
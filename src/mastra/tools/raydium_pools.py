@@ -0,0 +1,339 @@
+import os
+import json
+import codecs
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .http_client import get_upstream_client
+from ..cache.shared_store import SHARED_INDEX_POLL, SharedIndexStore, get_leader_lock, get_shared_indexes
+
+logger = logging.getLogger(__name__)
+
+RAYDIUM_API_URL = os.getenv("RAYDIUM_API_URL", "https://api.raydium.io/v2/sdk/liquidity/mainnet.json")
+RAYDIUM_POOLS_TTL = int(os.getenv("RAYDIUM_POOLS_TTL", "600"))  # seconds between background refreshes
+POOL_LIST_KEYS = ("official", "unOfficial")
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+class StreamingJSONError(ValueError):
+    """Raised when a streamed JSON document (e.g. the pool dump) is not the expected shape."""
+    pass
+
+
+async def iter_array_items(
+    chunks: AsyncIterator[bytes],
+    keys: Tuple[str, ...] = POOL_LIST_KEYS,
+    path: Tuple[str, ...] = (),
+    capture: Tuple[str, ...] = (),
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Incrementally parse ``{"key": [item, ...], ...}`` and yield ``(key, item)``.
+
+    Only one array item (plus one network chunk) is held in memory at a
+    time, so peak memory does not grow with the size of the dump. Values
+    under other keys are decoded and discarded. ``path`` names the nested
+    objects to descend into first (``("result",)`` for ``{"result": {"value":
+    [...]}}``); top-level keys in ``capture`` yield their whole value once.
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    eof = False
+
+    async def fill() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        try:
+            chunk = await chunks.__anext__()
+        except StopAsyncIteration:
+            eof = True
+            buf = buf[pos:] + utf8.decode(b"", final=True)
+            pos = 0
+            return False
+        buf = buf[pos:] + utf8.decode(chunk)
+        pos = 0
+        return True
+
+    async def skip_ws() -> Optional[str]:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not await fill():
+                return None
+
+    async def decode_value() -> Any:
+        nonlocal pos
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buf, pos)
+                # A value ending exactly at the buffer edge may be truncated (e.g. a split number)
+                if end < len(buf) or eof:
+                    pos = end
+                    return value
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            if not await fill():
+                value, end = _decoder.raw_decode(buf, pos)
+                pos = end
+                return value
+
+    async def members(depth: int) -> AsyncIterator[Tuple[str, Any]]:
+        # Called with pos on the opening brace of an object
+        nonlocal pos
+        pos += 1
+        while True:
+            ch = await skip_ws()
+            if ch == "}":
+                pos += 1
+                return
+            if ch == ",":
+                pos += 1
+                continue
+            if ch != '"':
+                raise StreamingJSONError(f"Unexpected character {ch!r} in object")
+            key = await decode_value()
+            if await skip_ws() != ":":
+                raise StreamingJSONError("Expected ':' after object key")
+            pos += 1
+            ch = await skip_ws()
+            if depth < len(path) and key == path[depth] and ch == "{":
+                async for item in members(depth + 1):
+                    yield item
+            elif depth == len(path) and key in keys and ch == "[":
+                pos += 1
+                while True:
+                    ch = await skip_ws()
+                    if ch == "]":
+                        pos += 1
+                        break
+                    if ch == ",":
+                        pos += 1
+                        continue
+                    if ch is None:
+                        raise StreamingJSONError("Unexpected end of JSON stream")
+                    yield key, await decode_value()
+            elif depth == 0 and key in capture:
+                yield key, await decode_value()
+            else:
+                await decode_value()
+
+    if await skip_ws() != "{":
+        raise StreamingJSONError("Expected a JSON object at the top level")
+    async for item in members(0):
+        yield item
+
+
+class PoolRecord:
+    """Compact view of one Raydium AMM pool."""
+
+    __slots__ = ("id", "base_mint", "quote_mint", "lp_mint", "liquidity", "official")
+
+    def __init__(self, pool: Dict[str, Any], official: bool) -> None:
+        self.id = pool.get("id")
+        self.base_mint = pool.get("baseMint")
+        self.quote_mint = pool.get("quoteMint")
+        self.lp_mint = pool.get("lpMint")
+        try:
+            self.liquidity = float(pool.get("liquidity", 0) or 0)
+        except (TypeError, ValueError):
+            self.liquidity = 0.0
+        self.official = official
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "baseMint": self.base_mint,
+            "quoteMint": self.quote_mint,
+            "lpMint": self.lp_mint,
+            "liquidity": self.liquidity,
+            "official": self.official,
+        }
+
+
+class RaydiumPoolIndex:
+    """
+    Background-refreshed index of Raydium pools keyed by base and quote mint.
+
+    The full ``mainnet.json`` dump is streamed and parsed item by item on
+    each refresh; lookups are plain dict reads.
+
+    With a ``shared`` index store (multi-worker serving) only the worker
+    holding the leader lock builds the index, publishes it per mint to
+    SQLite and drops its dicts; every worker looks mints up there.
+    """
+
+    def __init__(
+        self,
+        url: str = RAYDIUM_API_URL,
+        ttl: int = RAYDIUM_POOLS_TTL,
+        shared: Optional[SharedIndexStore] = None,
+    ) -> None:
+        self.url = url
+        self.ttl = ttl
+        self.shared = shared
+        self._shared_mints = 0
+        self._by_mint: Dict[str, List[PoolRecord]] = {}
+        self._liquidity: Dict[str, float] = {}
+        self._pool_count = 0
+        self._built_at: float = 0.0
+        self._loaded: Optional[asyncio.Event] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._built_at > 0
+
+    # -- lookups ---------------------------------------------------------
+
+    def pools_for(self, mint: str) -> List[PoolRecord]:
+        if self.shared is not None:
+            entry = self.shared.pools(mint)
+            return [PoolRecord(pool, pool.get("official", False)) for pool in entry[1]] if entry else []
+        return self._by_mint.get(mint, [])
+
+    def liquidity_for(self, mint: str) -> float:
+        """Aggregated liquidity across every pool the mint trades in."""
+        if self.shared is not None:
+            entry = self.shared.pools(mint)
+            return entry[0] if entry else 0.0
+        return self._liquidity.get(mint, 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "pools": self._pool_count,
+            "mints": self._shared_mints if self.shared is not None else len(self._by_mint),
+            "refreshes": self.shared is None or get_leader_lock().held,
+            "age_seconds": round(time.time() - self._built_at, 1) if self._built_at else None,
+            "last_error": self.last_error,
+        }
+
+    # -- refresh -------------------------------------------------------
+
+    async def build(self, chunks: AsyncIterator[bytes]) -> int:
+        """Build a fresh index from a byte stream and swap it in. Returns the pool count."""
+        by_mint: Dict[str, List[PoolRecord]] = {}
+        liquidity: Dict[str, float] = {}
+        count = 0
+        async for key, pool in iter_array_items(chunks):
+            if not isinstance(pool, dict):
+                continue
+            record = PoolRecord(pool, official=(key == "official"))
+            for mint in {record.base_mint, record.quote_mint}:
+                if not mint:
+                    continue
+                by_mint.setdefault(mint, []).append(record)
+                liquidity[mint] = liquidity.get(mint, 0.0) + record.liquidity
+            count += 1
+            if count % 5000 == 0:
+                # Parsing is CPU-bound; let other requests run between batches
+                await asyncio.sleep(0)
+        built_at = time.time()
+        if self.shared is not None:
+            rows = [(mint, liquidity[mint], [record.as_dict() for record in records]) for mint, records in by_mint.items()]
+            self._shared_mints = await asyncio.to_thread(self.shared.publish_pools, rows, built_at)
+            by_mint, liquidity = {}, {}
+        self._by_mint, self._liquidity, self._pool_count = by_mint, liquidity, count
+        self._built_at = built_at
+        return count
+
+    def sync_shared(self) -> bool:
+        """Pick up the index last published to the shared store. Returns True once one exists."""
+        dataset = self.shared.dataset("raydium_pools")
+        if dataset is None:
+            return False
+        self._built_at, self._shared_mints = dataset
+        if self._loaded is not None:
+            self._loaded.set()
+        return True
+
+    async def refresh(self) -> bool:
+        """Stream the Raydium pool dump and rebuild the index."""
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            try:
+                started = time.perf_counter()
+                client = get_upstream_client()
+                async with client.get(self.url, timeout=300) as resp:
+                    if resp.status != 200:
+                        raise RuntimeError(f"Raydium error {resp.status}")
+                    count = await self.build(resp.content.iter_chunked(CHUNK_SIZE).__aiter__())
+                self.last_error = None
+                logger.info(f"Indexed {count} Raydium pools in {time.perf_counter() - started:.1f}s")
+                return True
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning(f"Raydium pool index refresh failed: {str(e)}")
+                return False
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            if self.shared is not None:
+                try:
+                    self.sync_shared()
+                except Exception as e:
+                    logger.warning(f"Could not read shared Raydium pool index: {str(e)}")
+                if not get_leader_lock().acquire():
+                    # Another worker refreshes; follow its publications (closely until the first one)
+                    await asyncio.sleep(SHARED_INDEX_POLL if self.loaded else min(SHARED_INDEX_POLL, 0.25))
+                    continue
+                age = time.time() - self._built_at
+                if self._built_at and age < self.ttl:
+                    # Published recently (e.g. by a previous leader); refresh when it expires
+                    await asyncio.sleep(self.ttl - age)
+            ok = await self.refresh()
+            if self._loaded is not None:
+                self._loaded.set()
+            await asyncio.sleep(self.ttl if ok else min(self.ttl, 60))
+
+    async def start(self) -> None:
+        """Start the background refresher (idempotent)."""
+        if self._loaded is None:
+            self._loaded = asyncio.Event()
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def ensure_loaded(self, timeout: float) -> bool:
+        """Start the index if needed and wait (bounded) for the first build."""
+        if self._refresh_task is None or self._refresh_task.done():
+            await self.start()
+        if self.loaded:
+            return True
+        try:
+            await asyncio.wait_for(self._loaded.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.loaded
+
+
+_index: Optional[RaydiumPoolIndex] = None
+
+
+def get_pool_index() -> RaydiumPoolIndex:
+    """Return the process-wide Raydium pool index."""
+    global _index
+    if _index is None:
+        _index = RaydiumPoolIndex(shared=get_shared_indexes())
+    return _index
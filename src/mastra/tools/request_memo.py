@@ -0,0 +1,87 @@
+import json
+import asyncio
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+from ..metrics import Counter
+
+REQUEST_UPSTREAM_CALLS = Counter(
+    "mastra_request_upstream_calls_total",
+    "Upstream calls made inside analyses, and duplicates served from the request memo.",
+    ("method", "outcome"),
+)
+
+MemoKey = Tuple[str, str, str]
+
+
+class RequestMemo:
+    """
+    Upstream calls made while serving one analysis, keyed by (endpoint, method, params).
+
+    Each distinct call runs at most once per analysis: a repeat, or a call
+    identical to one still in flight, awaits the first one's result (or
+    exception). Results are shared, so callers must not mutate them.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[MemoKey, asyncio.Future] = {}
+        self.by_method: Dict[str, Dict[str, int]] = {}
+
+    async def run(self, endpoint: str, method: str, params: Any, call: Callable[[], Awaitable[Any]]) -> Any:
+        key = (endpoint, method, json.dumps(params, sort_keys=True, separators=(",", ":"), default=str))
+        counts = self.by_method.setdefault(method, {"calls": 0, "deduplicated": 0})
+        counts["calls"] += 1
+        task = self._calls.get(key)
+        if task is not None:
+            counts["deduplicated"] += 1
+            REQUEST_UPSTREAM_CALLS.labels(method, "deduplicated").inc()
+        else:
+            REQUEST_UPSTREAM_CALLS.labels(method, "called").inc()
+            task = self._calls[key] = asyncio.ensure_future(call())
+        # Shield so one cancelled caller does not cancel the call for the others
+        return await asyncio.shield(task)
+
+    def report(self) -> Dict[str, Any]:
+        calls = sum(c["calls"] for c in self.by_method.values())
+        deduplicated = sum(c["deduplicated"] for c in self.by_method.values())
+        return {
+            "calls": calls,
+            "unique": calls - deduplicated,
+            "deduplicated": deduplicated,
+            "by_method": {method: dict(counts) for method, counts in sorted(self.by_method.items())},
+        }
+
+
+_current: contextvars.ContextVar[Optional[RequestMemo]] = contextvars.ContextVar("mastra_request_memo", default=None)
+
+
+def current_memo() -> Optional[RequestMemo]:
+    return _current.get()
+
+
+@contextmanager
+def request_scope() -> Iterator[RequestMemo]:
+    """
+    Attach a fresh RequestMemo to the current context for the duration of the block.
+
+    Tasks started inside the block inherit it. The previous value is
+    restored by assignment rather than a reset token, so leaving the block
+    from another context (an async generator closed elsewhere) is safe.
+    """
+    previous = _current.get()
+    memo = RequestMemo()
+    _current.set(memo)
+    try:
+        yield memo
+    finally:
+        _current.set(previous)
+
+
+async def memoized(endpoint: str, method: str, params: Any, call: Callable[[], Awaitable[Any]]) -> Any:
+    """Run ``call`` through the current request's memo, or directly outside of a request."""
+    memo = _current.get()
+    if memo is None:
+        return await call()
+    return await memo.run(endpoint, method, params, call)
+
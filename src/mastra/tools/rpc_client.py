@@ -0,0 +1,230 @@
+import os
+import json
+import asyncio
+import itertools
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .rpc_router import RpcError, RpcHTTPError, RpcRouter, display_endpoint
+from .request_memo import memoized
+
+logger = logging.getLogger(__name__)
+
+RPC_BATCH_WINDOW = float(os.getenv("RPC_BATCH_WINDOW_MS", "2")) / 1000.0  # collect calls for this long
+RPC_MAX_BATCH = int(os.getenv("RPC_MAX_BATCH", "100"))  # max calls per JSON-RPC batch array
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "30"))  # seconds
+MAX_MULTIPLE_ACCOUNTS = 100  # getMultipleAccounts hard limit
+
+
+class SolanaRpcClient:
+    """
+    JSON-RPC client that coalesces concurrent calls into batch requests.
+
+    Calls made within ``batch_window`` seconds of each other are sent as a
+    single JSON-RPC batch array (up to ``max_batch`` entries) and the replies
+    are routed back to each caller by id. Batches go through an RpcRouter,
+    so with several endpoints the fastest healthy one serves each batch. Single-account lookups issued via
+    :meth:`load_account` are additionally merged into ``getMultipleAccounts``
+    calls of up to 100 keys. Inside an analysis (see request_memo) identical
+    calls are made only once.
+    """
+
+    def __init__(
+        self,
+        endpoints: Union[str, Sequence[str]],
+        batch_window: float = RPC_BATCH_WINDOW,
+        max_batch: int = RPC_MAX_BATCH,
+        timeout: float = RPC_TIMEOUT,
+    ) -> None:
+        self.router = RpcRouter([endpoints] if isinstance(endpoints, str) else endpoints)
+        self.memo_endpoint = ",".join(self.router.endpoints)
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._account_pending: Dict[Tuple[str, str], Dict[str, List[asyncio.Future]]] = {}
+        self._account_handles: Dict[Tuple[str, str], asyncio.TimerHandle] = {}
+        self.stats = {"calls": 0, "http_requests": 0, "accounts_requested": 0, "account_batches": 0}
+
+    # -- generic calls ---------------------------------------------------
+
+    async def call(self, method: str, params: Optional[Sequence[Any]] = None) -> Any:
+        """Queue a JSON-RPC call and return its ``result`` once the batch completes."""
+        return await memoized(self.memo_endpoint, method, params, lambda: self._call(method, params))
+
+    async def _call(self, method: str, params: Optional[Sequence[Any]] = None) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        request = {"jsonrpc": "2.0", "id": next(self._ids), "method": method}
+        if params is not None:
+            request["params"] = list(params)
+        self._pending.append((request, future))
+        self.stats["calls"] += 1
+        if len(self._pending) >= self.max_batch:
+            self._flush_now()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush_now)
+        return await future
+
+    async def call_streamed(
+        self,
+        method: str,
+        params: Optional[Sequence[Any]],
+        decode: Callable[[Any], Awaitable[Any]],
+    ) -> Any:
+        """
+        Send one call as its own request and return ``await decode(resp)``.
+
+        For replies too large to materialize as a JSON tree (e.g. every token
+        account of a whale wallet): ``decode`` reads the body incrementally
+        and keeps only what it needs. It must raise RpcError for error replies.
+        """
+        return await memoized(
+            self.memo_endpoint, method, params, lambda: self._call_streamed(method, params, decode)
+        )
+
+    async def _call_streamed(
+        self,
+        method: str,
+        params: Optional[Sequence[Any]],
+        decode: Callable[[Any], Awaitable[Any]],
+    ) -> Any:
+        request = {"jsonrpc": "2.0", "id": next(self._ids), "method": method}
+        if params is not None:
+            request["params"] = list(params)
+        self.stats["calls"] += 1
+        self.stats["http_requests"] += 1
+        return await self.router.send(request, timeout=self.timeout, methods=[method], decode=decode)
+
+    def _flush_now(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        while self._pending:
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            asyncio.ensure_future(self._send(batch))
+
+    async def _send(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        by_id = {request["id"]: future for request, future in batch}
+        payload = [request for request, _ in batch]
+        self.stats["http_requests"] += 1
+        try:
+            replies = await self.router.send(
+                payload,
+                timeout=self.timeout,
+                methods=[request["method"] for request in payload],
+                cost=len(payload),  # providers meter each call in a batch
+            )
+        except Exception as e:
+            for future in by_id.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if isinstance(replies, dict):
+            # Some providers answer a malformed/rejected batch with a single error object
+            error = replies.get("error") or {}
+            exc = RpcError(error.get("message", "Invalid batch response"), error.get("code"))
+            for future in by_id.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for reply in replies or []:
+            future = by_id.pop(reply.get("id"), None)
+            if future is None or future.done():
+                continue
+            if reply.get("error"):
+                error = reply["error"]
+                future.set_exception(RpcError(error.get("message", "RPC error"), error.get("code"), error.get("data")))
+            else:
+                future.set_result(reply.get("result"))
+        for future in by_id.values():
+            if not future.done():
+                future.set_exception(RpcError("Missing reply in JSON-RPC batch response"))
+
+    # -- multi-key account loading ---------------------------------------
+
+    async def _get_multiple_accounts(
+        self,
+        pubkeys: Sequence[str],
+        options: Dict[str, Any],
+        call: Callable[[str, Sequence[Any]], Awaitable[Any]],
+    ) -> List[Optional[Dict[str, Any]]]:
+        chunks = [list(pubkeys[i:i + MAX_MULTIPLE_ACCOUNTS]) for i in range(0, len(pubkeys), MAX_MULTIPLE_ACCOUNTS)]
+        results = await asyncio.gather(*(call("getMultipleAccounts", [chunk, options]) for chunk in chunks))
+        accounts: List[Optional[Dict[str, Any]]] = []
+        for chunk, result in zip(chunks, results):
+            value = (result or {}).get("value") or []
+            value = list(value) + [None] * (len(chunk) - len(value))
+            accounts.extend(value)
+        return accounts
+
+    async def load_account(self, pubkey: str, encoding: str = "jsonParsed", **config: Any) -> Optional[Dict[str, Any]]:
+        """
+        Load one account; concurrent loads are merged into ``getMultipleAccounts``.
+        """
+        return await memoized(
+            self.memo_endpoint, "getAccountInfo", [pubkey, dict(config, encoding=encoding)],
+            lambda: self._load_account(pubkey, encoding, config),
+        )
+
+    async def _load_account(self, pubkey: str, encoding: str, config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        key = (encoding, json.dumps(config, sort_keys=True))
+        future = loop.create_future()
+        waiting = self._account_pending.setdefault(key, {})
+        waiting.setdefault(pubkey, []).append(future)
+        self.stats["accounts_requested"] += 1
+        if len(waiting) >= MAX_MULTIPLE_ACCOUNTS:
+            self._flush_accounts(key)
+        elif key not in self._account_handles:
+            self._account_handles[key] = loop.call_later(self.batch_window, self._flush_accounts, key)
+        return await future
+
+    def _flush_accounts(self, key: Tuple[str, str]) -> None:
+        handle = self._account_handles.pop(key, None)
+        if handle is not None:
+            handle.cancel()
+        waiting = self._account_pending.pop(key, None)
+        if waiting:
+            asyncio.ensure_future(self._resolve_accounts(key, waiting))
+
+    async def _resolve_accounts(self, key: Tuple[str, str], waiting: Dict[str, List[asyncio.Future]]) -> None:
+        encoding, config = key
+        pubkeys = list(waiting)
+        self.stats["account_batches"] += 1
+        try:
+            # Already deduplicated per account by load_account; bypass the request memo
+            accounts = await self._get_multiple_accounts(pubkeys, dict(json.loads(config), encoding=encoding), self._call)
+        except Exception as e:
+            for futures in waiting.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for pubkey, account in zip(pubkeys, accounts):
+            for future in waiting[pubkey]:
+                if not future.done():
+                    future.set_result(account)
+
+
+_clients: Dict[Tuple[str, ...], SolanaRpcClient] = {}
+
+
+def get_rpc_client(endpoints: Union[str, Sequence[str]]) -> SolanaRpcClient:
+    """Return the process-wide batching client for an RPC endpoint (or list of endpoints)."""
+    key = (endpoints,) if isinstance(endpoints, str) else tuple(endpoints)
+    client = _clients.get(key)
+    if client is None:
+        client = _clients[key] = SolanaRpcClient(key)
+    return client
+
+def rpc_stats() -> Dict[str, Any]:
+    """Batching and routing statistics of every RPC client."""
+    return {
+        ", ".join(display_endpoint(e) for e in key): dict(client.stats, routing=client.router.stats())
+        for key, client in _clients.items()
+    }
@@ -0,0 +1,263 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence
+
+import aiohttp
+from yarl import URL
+
+from .http_client import get_upstream_client
+
+logger = logging.getLogger(__name__)
+
+# Smoothing factor for the per-endpoint latency / error-rate averages
+RPC_EWMA_ALPHA = float(os.getenv("RPC_EWMA_ALPHA", "0.2"))
+# A read batch still pending after its endpoint's p95 latency is duplicated to the next endpoint
+RPC_HEDGE_QUANTILE = float(os.getenv("RPC_HEDGE_QUANTILE", "0.95"))
+RPC_HEDGE_MIN_MS = float(os.getenv("RPC_HEDGE_MIN_MS", "50"))
+RPC_HEDGE_DEFAULT_MS = float(os.getenv("RPC_HEDGE_DEFAULT_MS", "1000"))  # until enough samples exist
+# Hedges are capped at this fraction of requests so a slow provider cannot double our load
+RPC_HEDGE_MAX_RATIO = float(os.getenv("RPC_HEDGE_MAX_RATIO", "0.1"))
+# Consecutive failures that take an endpoint out of rotation, and for how long
+RPC_FAILURE_THRESHOLD = int(os.getenv("RPC_FAILURE_THRESHOLD", "3"))
+RPC_COOLDOWN = float(os.getenv("RPC_COOLDOWN", "30"))
+
+LATENCY_WINDOW = 200
+MIN_SAMPLES_FOR_QUANTILE = 20
+# Methods that change state are never hedged or failed over
+WRITE_METHODS = frozenset({"sendTransaction", "requestAirdrop"})
+
+
+class RpcError(Exception):
+    """JSON-RPC level error returned for a single call."""
+
+    def __init__(self, message: str, code: Optional[int] = None, data: Any = None) -> None:
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+
+class RpcHTTPError(RpcError):
+    """The whole batch failed at the HTTP layer (rate limit, auth, 5xx...)."""
+
+    def __init__(self, status: int, reason: str = "", retry_after: Optional[str] = None, body: str = "") -> None:
+        super().__init__(f"RPC HTTP error: {status} {reason}".strip(), code=status)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+        self.body = body
+
+
+def display_endpoint(endpoint: str) -> str:
+    """Endpoint without its query string, so API keys never reach logs or stats."""
+    url = URL(endpoint)
+    return str(url.with_query(None)) if url.query_string else endpoint
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Failures another provider may not share: throttling, auth, 5xx and transport errors."""
+    if isinstance(error, RpcHTTPError):
+        return error.status in (401, 403, 429) or error.status >= 500
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientError))
+
+
+class EndpointHealth:
+    """Latency and error statistics for one RPC endpoint."""
+
+    __slots__ = (
+        "endpoint", "latency_ewma", "error_ewma", "latencies", "requests",
+        "failures", "consecutive_failures", "cooldown_until",
+    )
+
+    def __init__(self, endpoint: str) -> None:
+        self.endpoint = endpoint
+        self.latency_ewma = 0.0
+        self.error_ewma = 0.0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    def observe(self, latency: float, ok: Optional[bool]) -> None:
+        """Record one request; ``ok=None`` records only its latency (e.g. a cancelled hedge)."""
+        self.requests += 1
+        self.latencies.append(latency)
+        if self.latency_ewma == 0.0:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma += RPC_EWMA_ALPHA * (latency - self.latency_ewma)
+        if ok is None:
+            return
+        self.error_ewma += RPC_EWMA_ALPHA * ((0.0 if ok else 1.0) - self.error_ewma)
+        if ok:
+            self.consecutive_failures = 0
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= RPC_FAILURE_THRESHOLD:
+                self.cooldown_until = time.monotonic() + RPC_COOLDOWN
+                logger.warning(f"RPC endpoint {display_endpoint(self.endpoint)} cooling down for {RPC_COOLDOWN:.0f}s")
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.cooldown_until
+
+    def score(self) -> float:
+        """Expected cost of a request: average latency inflated by the recent error rate."""
+        return self.latency_ewma * (1.0 + 4.0 * self.error_ewma)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self.latencies) < MIN_SAMPLES_FOR_QUANTILE:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def as_dict(self) -> Dict[str, Any]:
+        p95 = self.quantile(0.95)
+        return {
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 1),
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "error_rate": round(self.error_ewma, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+            "healthy": self.healthy,
+        }
+
+
+class RpcRouter:
+    """
+    Sends JSON-RPC payloads to the fastest healthy endpoint of a list.
+
+    Endpoints are ranked by EWMA latency weighted by error rate; endpoints
+    that fail repeatedly sit out a cooldown. A read-only payload still
+    pending after the chosen endpoint's p95 latency is hedged to the next
+    endpoint and the first answer wins. Retryable failures fail over to the
+    next endpoint immediately.
+    """
+
+    def __init__(self, endpoints: Sequence[str]) -> None:
+        if not endpoints:
+            raise ValueError("RpcRouter needs at least one endpoint")
+        self.endpoints = list(dict.fromkeys(endpoints))
+        self.health = {endpoint: EndpointHealth(endpoint) for endpoint in self.endpoints}
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    def ranked(self) -> List[EndpointHealth]:
+        """Healthy endpoints fastest first (configuration order breaks ties), then cooling ones."""
+        return sorted(self.health.values(), key=lambda h: (not h.healthy, h.score()))
+
+    def hedge_delay(self, health: EndpointHealth) -> float:
+        quantile = health.quantile(RPC_HEDGE_QUANTILE)
+        if quantile is None:
+            return RPC_HEDGE_DEFAULT_MS / 1000
+        return max(RPC_HEDGE_MIN_MS / 1000, quantile)
+
+    async def _post(
+        self,
+        health: EndpointHealth,
+        payload: Any,
+        timeout: float,
+        cost: float,
+        decode: Optional[Callable[[Any], Awaitable[Any]]] = None,
+    ) -> Any:
+        started = time.monotonic()
+        try:
+            async with get_upstream_client().post(
+                health.endpoint,
+                json=payload,
+                headers={"Content-Type": "application/json"},
+                timeout=timeout,
+                cost=cost,
+                # With alternatives, fail over instead of waiting out a throttled endpoint
+                retries=0 if len(self.endpoints) > 1 else None,
+            ) as resp:
+                if resp.status != 200:
+                    body = await resp.text()
+                    raise RpcHTTPError(resp.status, resp.reason or "", resp.headers.get("Retry-After"), body[:500])
+                replies = await (decode(resp) if decode is not None else resp.json(content_type=None))
+        except asyncio.CancelledError:
+            # Lost a hedge race: the elapsed time is still a (lower-bound) latency sample
+            health.observe(time.monotonic() - started, ok=None)
+            raise
+        except RpcError as e:
+            # An error reply found by a streaming decoder still means the endpoint answered
+            health.observe(time.monotonic() - started, ok=not isinstance(e, RpcHTTPError))
+            raise
+        except Exception:
+            health.observe(time.monotonic() - started, ok=False)
+            raise
+        health.observe(time.monotonic() - started, ok=True)
+        return replies
+
+    async def send(
+        self,
+        payload: Any,
+        timeout: float,
+        methods: Sequence[str] = (),
+        cost: float = 1.0,
+        decode: Optional[Callable[[Any], Awaitable[Any]]] = None,
+    ) -> Any:
+        """
+        POST ``payload`` and return the decoded JSON reply from whichever endpoint answers first.
+
+        ``decode`` replaces the default ``resp.json()`` and may consume the body as a stream.
+        """
+        self.requests += 1
+        candidates = self.ranked()
+        primary = candidates[0]
+        read_only = not WRITE_METHODS.intersection(methods)
+        spare = candidates[1:] if read_only else []
+        tasks: Dict[asyncio.Future, EndpointHealth] = {
+            asyncio.ensure_future(self._post(primary, payload, timeout, cost, decode)): primary
+        }
+        hedge_at = self.hedge_delay(primary) if spare and self.hedges < RPC_HEDGE_MAX_RATIO * self.requests else None
+        hedge: Optional[asyncio.Future] = None
+        last_error: Optional[BaseException] = None
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_at, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedge_at = None
+                    if not spare:
+                        continue  # a failover already took the last spare endpoint
+                    self.hedges += 1
+                    backup = spare.pop(0)
+                    hedge = asyncio.ensure_future(self._post(backup, payload, timeout, cost, decode))
+                    tasks[hedge] = backup
+                    continue
+                for task in done:
+                    health = tasks.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        last_error = e
+                        if not is_retryable(e):
+                            raise
+                        if spare and not tasks:
+                            self.failovers += 1
+                            hedge_at = None  # the failover replaces the hedge
+                            backup = spare.pop(0)
+                            tasks[asyncio.ensure_future(self._post(backup, payload, timeout, cost, decode))] = backup
+                        continue
+                    if task is hedge:
+                        self.hedge_wins += 1
+                    return result
+            raise last_error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "endpoints": {display_endpoint(h.endpoint): h.as_dict() for h in self.ranked()},
+        }
@@ -1,11 +1,18 @@
 import os
 import json
+import asyncio
 import aiohttp
 import logging
 from typing import Any, Dict, List, Optional, TypedDict, Union
 from dataclasses import dataclass
 from enum import Enum
 
+from .token_list import get_token_list_store
+from .holdings import Holdings
+from .raydium_pools import CHUNK_SIZE, iter_array_items
+from .rpc_client import RpcError, RpcHTTPError, get_rpc_client
+from .rate_limiter import RateLimitExceeded
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,12 +22,42 @@ HELIUS_API_URL = "https://mainnet.helius-rpc.com"
 DEFAULT_RPC_URL = "https://api.mainnet-beta.solana.com"
 REQUEST_TIMEOUT = 30  # seconds
 
-# Helius API Key
-HELIUS_API_KEY = "c5ff6d8a-44c0-4a0b-8e81-3cd87e03bd41"
+# Helius API Key (without one, only SOLANA_RPC_URL is used)
+HELIUS_API_KEY = os.getenv("HELIUS_API_KEY", "")
 SOLANA_RPC_URL = os.getenv("SOLANA_RPC_URL", DEFAULT_RPC_URL)
 
 # Helius API Endpoints
-HELIUS_TOKEN_BALANCE_ENDPOINT = f"{HELIUS_API_URL}/?api-key={HELIUS_API_KEY}"
+HELIUS_TOKEN_BALANCE_ENDPOINT = f"{HELIUS_API_URL}/?api-key={HELIUS_API_KEY}" if HELIUS_API_KEY else ""
+
+# RPC endpoints the router balances across (SOLANA_RPC_URLS is a comma-separated override)
+RPC_ENDPOINTS = [url.strip() for url in os.getenv("SOLANA_RPC_URLS", "").split(",") if url.strip()] or list(
+    dict.fromkeys(url for url in (HELIUS_TOKEN_BALANCE_ENDPOINT, SOLANA_RPC_URL) if url)
+)
+
+# Known token metadata for common tokens
+KNOWN_TOKENS = {
+    "So11111111111111111111111111111111111111112": {
+        "meta": {
+            "name": "Wrapped SOL",
+            "symbol": "SOL",
+            "logo": "https://raw.githubusercontent.com/solana-labs/token-list/main/assets/mainnet/So11111111111111111111111111111111111111112/logo.png"
+        }
+    },
+    "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v": {
+        "meta": {
+            "name": "USD Coin",
+            "symbol": "USDC",
+            "logo": "https://raw.githubusercontent.com/solana-labs/token-list/main/assets/mainnet/EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v/logo.png"
+        }
+    },
+    "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB": {
+        "meta": {
+            "name": "Tether USD",
+            "symbol": "USDT",
+            "logo": "https://raw.githubusercontent.com/solana-labs/token-list/main/assets/mainnet/Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB/logo.svg"
+        }
+    }
+}
 
 # Custom exceptions
 class SolanaDataFetcherError(Exception):
@@ -72,135 +109,142 @@ def get_env(key: str, fallback: Optional[str] = None) -> str:
         return fallback
     raise ValidationError(f"Missing required environment variable: {key}")
 
-async def get_wallet_tokens(wallet_address: str) -> Dict[str, Any]:
+def _raise_for_rpc_failure(e: Exception) -> None:
+    """Translate a transport or JSON-RPC failure into an APIError."""
+    if isinstance(e, RateLimitExceeded):  # Still throttled after queueing and retries
+        error_msg = f"Rate limited. Please try again after {e.retry_after:.0f} seconds."
+        logger.warning(error_msg)
+    elif isinstance(e, RpcHTTPError):
+        if e.status == 429:  # Rate limited
+            retry_after = e.retry_after or '60'
+            error_msg = f"Rate limited. Please try again after {retry_after} seconds."
+            logger.warning(error_msg)
+        elif e.status == 401:  # Unauthorized
+            error_msg = "Invalid or expired Helius API key."
+            logger.error(error_msg)
+        else:
+            error_msg = f"Helius API error: {e.status} {e.reason}"
+            logger.error(f"{error_msg}\nResponse: {e.body[:500]}")
+    elif isinstance(e, RpcError):
+        error_msg = f"Helius RPC error: {str(e)}"
+        logger.error(error_msg)
+    elif isinstance(e, asyncio.TimeoutError):
+        error_msg = f"Request to Helius API timed out after {REQUEST_TIMEOUT} seconds"
+        logger.error(error_msg)
+    elif isinstance(e, aiohttp.ClientError):
+        error_msg = f"Network error while connecting to Helius API: {str(e)}"
+        logger.error(error_msg)
+    elif isinstance(e, (json.JSONDecodeError, ValueError)):
+        error_msg = f"Failed to parse Helius response: {str(e)}"
+        logger.error(error_msg)
+    else:
+        return
+    raise APIError(error_msg) from e
+
+async def helius_rpc(method: str, params: List[Any]) -> Any:
     """
-    Fetch token holdings and balances for a Solana wallet using Helius API.
+    Run a Helius JSON-RPC call through the shared batching client.
+    
+    Concurrent calls (from this or other analyses) are sent together as a
+    single JSON-RPC batch request, routed to the fastest of RPC_ENDPOINTS.
+    
+    Args:
+        method: JSON-RPC method name
+        params: JSON-RPC params list
+        
+    Returns:
+        The ``result`` field of the reply
+        
+    Raises:
+        APIError: If the request or the call fails
+    """
+    try:
+        return await get_rpc_client(RPC_ENDPOINTS).call(method, params)
+    except Exception as e:
+        _raise_for_rpc_failure(e)
+        raise
+
+async def get_wallet_holdings(wallet_address: str) -> Holdings:
+    """
+    Fetch the non-zero token balances of a Solana wallet as compact columns.
+    
+    The ``getTokenAccountsByOwner`` reply is decoded one account at a time
+    as it streams in; zero balances are dropped immediately and every other
+    account is reduced to (mint, amount, decimals), so even wallets with
+    thousands of token accounts never hold the full JSON tree.
     
     Args:
         wallet_address: The wallet address to fetch tokens for
         
     Returns:
-        Dict containing token information
+        Holdings for the wallet, in RPC order
     """
     if not wallet_address or not isinstance(wallet_address, str):
         raise ValidationError("Invalid wallet address provided")
     
-    headers = {
-        "Content-Type": "application/json",
-        "User-Agent": "Nosana/1.0"
-    }
+    # Helius RPC params for token accounts
+    params = [
+        wallet_address,
+        {
+            "programId": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+        },
+        {
+            "encoding": "jsonParsed"
+        }
+    ]
     
-    # Helius RPC request payload for token accounts
-    payload = {
-        "jsonrpc": "2.0",
-        "id": 1,
-        "method": "getTokenAccountsByOwner",
-        "params": [
-            wallet_address,
-            {
-                "programId": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
-            },
-            {
-                "encoding": "jsonParsed"
-            }
-        ]
-    }
+    async def decode(resp) -> Holdings:
+        holdings = Holdings(wallet_address)
+        items = iter_array_items(
+            resp.content.iter_chunked(CHUNK_SIZE).__aiter__(),
+            keys=("value",), path=("result",), capture=("error",),
+        )
+        async for key, item in items:
+            if key == "error":
+                error = item if isinstance(item, dict) else {}
+                raise RpcError(error.get("message", "RPC error"), error.get("code"), error.get("data"))
+            holdings.add_account(item)
+        return holdings
     
     try:
-        async with aiohttp.ClientSession() as session:
-            logger.info(f"Fetching tokens for wallet: {wallet_address}")
-            
-            async with session.post(
-                HELIUS_TOKEN_BALANCE_ENDPOINT,
-                headers=headers,
-                json=payload,
-                timeout=REQUEST_TIMEOUT
-            ) as resp:
-                response_text = await resp.text()
-                
-                # Log the response status and headers for debugging
-                logger.debug(f"Response status: {resp.status}")
-                logger.debug(f"Response headers: {dict(resp.headers)}")
-                
-                if resp.status == 200:
-                    try:
-                        data = await resp.json()
-                        
-                        if "result" not in data:
-                            error_msg = f"Unexpected response format from Helius API: {response_text[:500]}"
-                            logger.error(error_msg)
-                            raise APIError("Invalid response format from Helius API")
-                        
-                        tokens = []
-                        for item in data.get("result", {}).get("value", []):
-                            token_info = item.get("account", {}).get("data", {}).get("parsed", {}).get("info", {})
-                            token_amount = token_info.get("tokenAmount", {})
-                            
-                            if token_amount.get("amount") == "0":
-                                continue  # Skip tokens with zero balance
-                                
-                            token_data = {
-                                "mint": token_info.get("mint"),
-                                "owner": wallet_address,
-                                "amount": int(token_amount.get("amount", 0)),
-                                "decimals": token_amount.get("decimals", 9),
-                                "ui_amount": float(token_amount.get("uiAmount", 0)),
-                                "symbol": "",  # Will be filled by get_token_metadata
-                                "name": ""      # Will be filled by get_token_metadata
-                            }
-                            tokens.append(token_data)
-                        
-                        # Get token metadata for each token
-                        tokens_with_metadata = []
-                        for token in tokens:
-                            try:
-                                metadata = await get_token_metadata(token["mint"])
-                                token.update(metadata.get("meta", {}))
-                                tokens_with_metadata.append(token)
-                            except Exception as e:
-                                logger.warning(f"Failed to fetch metadata for token {token['mint']}: {str(e)}")
-                                tokens_with_metadata.append(token)
-                        
-                        return {
-                            "tokens": tokens_with_metadata,
-                            "total_tokens": len(tokens_with_metadata),
-                            "source": "helius"
-                        }
-                        
-                    except (json.JSONDecodeError, ValueError, KeyError) as e:
-                        error_msg = f"Failed to parse Helius response: {str(e)}"
-                        logger.error(f"{error_msg}\nResponse: {response_text[:500]}")
-                        raise APIError(error_msg)
-                        
-                elif resp.status == 429:  # Rate limited
-                    retry_after = resp.headers.get('Retry-After', '60')
-                    error_msg = f"Rate limited. Please try again after {retry_after} seconds."
-                    logger.warning(error_msg)
-                    raise APIError(error_msg)
-                    
-                elif resp.status == 401:  # Unauthorized
-                    error_msg = "Invalid or expired Helius API key."
-                    logger.error(error_msg)
-                    raise APIError(error_msg)
-                    
-                else:
-                    error_msg = f"Helius API error: {resp.status} {resp.reason}"
-                    logger.error(f"{error_msg}\nResponse: {response_text[:500]}")
-                    raise APIError(error_msg)
-                    
-    except asyncio.TimeoutError:
-        error_msg = f"Request to Helius API timed out after {REQUEST_TIMEOUT} seconds"
-        logger.error(error_msg)
-        raise APIError(error_msg)
+        logger.info(f"Fetching tokens for wallet: {wallet_address}")
+        return await get_rpc_client(RPC_ENDPOINTS).call_streamed("getTokenAccountsByOwner", params, decode)
         
-    except aiohttp.ClientError as ce:
-        error_msg = f"Network error while connecting to Helius API: {str(ce)}"
-        logger.error(error_msg)
-        raise APIError(error_msg)
+    except SolanaDataFetcherError:
+        raise
         
     except Exception as e:
-        logger.error(f"Unexpected error in get_wallet_tokens: {str(e)}", exc_info=True)
-        raise APIError("Unexpected error in get_wallet_tokens") from e
+        _raise_for_rpc_failure(e)
+        logger.error(f"Unexpected error in get_wallet_holdings: {str(e)}", exc_info=True)
+        raise APIError("Unexpected error in get_wallet_holdings") from e
+
+async def get_wallet_tokens(wallet_address: str, limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Fetch token holdings and balances for a Solana wallet using Helius API.
+    
+    Args:
+        wallet_address: The wallet address to fetch tokens for
+        limit: Only build entries (and look up metadata) for the first ``limit`` holdings
+        
+    Returns:
+        Dict containing token information
+    """
+    holdings = await get_wallet_holdings(wallet_address)
+    tokens = holdings.tokens(limit)
+    
+    # Get token metadata for each token
+    for token in tokens:
+        try:
+            metadata = await get_token_metadata(token["mint"])
+            token.update(metadata.get("meta", {}))
+        except Exception as e:
+            logger.warning(f"Failed to fetch metadata for token {token['mint']}: {str(e)}")
+    
+    return {
+        "tokens": tokens,
+        "total_tokens": len(holdings),
+        "source": "helius"
+    }
 
 async def get_wallet_activity(wallet_address: str, limit: int = 50) -> Dict[str, Any]:
     """Fetch transaction history for a Solana wallet using Helius API.
@@ -217,103 +261,66 @@ async def get_wallet_activity(wallet_address: str, limit: int = 50) -> Dict[str,
     
     limit = max(1, min(100, int(limit)))  # Ensure limit is between 1 and 100
     
-    headers = {
-        "Content-Type": "application/json",
-        "User-Agent": "Nosana/1.0"
-    }
-    
-    # Helius RPC request payload for transaction history
-    payload = {
-        "jsonrpc": "2.0",
-        "id": 1,
-        "method": "getSignaturesForAddress",
-        "params": [
-            wallet_address,
-            {
-                "limit": limit
-            }
-        ]
-    }
-    
     try:
-        async with aiohttp.ClientSession() as session:
-            logger.info(f"Fetching transaction history for wallet: {wallet_address}")
-            
-            async with session.post(
-                HELIUS_TOKEN_BALANCE_ENDPOINT,  # Reusing the same endpoint
-                headers=headers,
-                json=payload,
-                timeout=REQUEST_TIMEOUT
-            ) as resp:
-                response_text = await resp.text()
-                
-                if resp.status == 200:
-                    data = await resp.json()
-                    
-                    if "result" not in data:
-                        error_msg = "Unexpected response format from Helius API"
-                        logger.error(f"{error_msg}: {response_text[:500]}")
-                        raise APIError(error_msg)
-                    
-                    # Process transaction signatures
-                    signatures = [tx["signature"] for tx in data.get("result", [])]
-                    
-                    # Return basic transaction info (can be enhanced to fetch full transaction details)
-                    return {
-                        "transactions": [
-                            {
-                                "signature": tx["signature"],
-                                "slot": tx.get("slot"),
-                                "blockTime": tx.get("blockTime"),
-                                "memo": tx.get("memo"),
-                                "err": tx.get("err")
-                            }
-                            for tx in data.get("result", [])
-                        ],
-                        "total": len(signatures),
-                        "source": "helius"
-                    }
-                
-                elif resp.status == 429:  # Rate limited
-                    retry_after = resp.headers.get('Retry-After', '60')
-                    error_msg = f"Rate limited. Please try again after {retry_after} seconds."
-                    logger.warning(error_msg)
-                    raise APIError(error_msg)
-                    
-                elif resp.status == 401:  # Unauthorized
-                    error_msg = "Invalid or expired Helius API key."
-                    logger.error(error_msg)
-                    raise APIError(error_msg)
-                    
-                else:
-                    error_msg = f"Helius API error: {resp.status} {resp.reason}"
-                    logger.error(f"{error_msg}\nResponse: {response_text[:500]}")
-                    raise APIError(error_msg)
-                    
-    except asyncio.TimeoutError:
-        error_msg = f"Request to Helius API timed out after {REQUEST_TIMEOUT} seconds"
-        logger.error(error_msg)
-        raise APIError(error_msg)
+        logger.info(f"Fetching transaction history for wallet: {wallet_address}")
+        result = await helius_rpc("getSignaturesForAddress", [wallet_address, {"limit": limit}])
         
-    except aiohttp.ClientError as ce:
-        error_msg = f"Network error while connecting to Helius API: {str(ce)}"
-        logger.error(error_msg)
-        raise APIError(error_msg)
+        if not isinstance(result, list):
+            error_msg = "Unexpected response format from Helius API"
+            logger.error(f"{error_msg}: {str(result)[:500]}")
+            raise APIError(error_msg)
+        
+        # Return basic transaction info (can be enhanced to fetch full transaction details)
+        return {
+            "transactions": [
+                {
+                    "signature": tx["signature"],
+                    "slot": tx.get("slot"),
+                    "blockTime": tx.get("blockTime"),
+                    "memo": tx.get("memo"),
+                    "err": tx.get("err")
+                }
+                for tx in result
+            ],
+            "total": len(result),
+            "source": "helius"
+        }
+        
+    except SolanaDataFetcherError:
+        raise
         
     except Exception as e:
+        _raise_for_rpc_failure(e)
         logger.error(f"Unexpected error in get_wallet_activity: {str(e)}", exc_info=True)
         raise APIError("Failed to fetch wallet activity") from e
-                
+
+async def get_mint_info(mint: str) -> Optional[Dict[str, Any]]:
+    """
+    Fetch one parsed SPL mint account.
+    
+    Concurrent calls are merged into a single ``getMultipleAccounts``
+    request, so per-token callers do not cost one round trip each.
+    """
+    if not mint or not isinstance(mint, str):
+        raise ValidationError("Invalid token address provided")
+    try:
+        account = await get_rpc_client(RPC_ENDPOINTS).load_account(mint)
     except Exception as e:
-        if not isinstance(e, (APIError, ValidationError)):
-            error_msg = f"Unexpected error in get_wallet_activity: {str(e)}"
-            logger.exception(error_msg)
-            raise APIError(error_msg) from e
+        _raise_for_rpc_failure(e)
         raise
+    return _parsed_mint_info(account)
+
+def _parsed_mint_info(account: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not account:
+        return None
+    data = account.get("data")
+    if isinstance(data, dict):
+        return data.get("parsed", {}).get("info")
+    return None
 
 async def get_token_metadata(token_address: str) -> Dict[str, Any]:
     """
-    Fetch metadata for a specific token using Helius API.
+    Fetch metadata for a specific token from the local token-list index.
     
     Args:
         token_address: The token mint address
@@ -324,54 +331,23 @@ async def get_token_metadata(token_address: str) -> Dict[str, Any]:
     if not token_address or not isinstance(token_address, str):
         raise ValidationError("Invalid token address provided")
     
-    # Known token metadata for common tokens
-    known_tokens = {
-        "So11111111111111111111111111111111111111112": {
-            "meta": {
-                "name": "Wrapped SOL",
-                "symbol": "SOL",
-                "logo": "https://raw.githubusercontent.com/solana-labs/token-list/main/assets/mainnet/So11111111111111111111111111111111111111112/logo.png"
-            }
-        },
-        "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v": {
-            "meta": {
-                "name": "USD Coin",
-                "symbol": "USDC",
-                "logo": "https://raw.githubusercontent.com/solana-labs/token-list/main/assets/mainnet/EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v/logo.png"
-            }
-        },
-        "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB": {
-            "meta": {
-                "name": "Tether USD",
-                "symbol": "USDT",
-                "logo": "https://raw.githubusercontent.com/solana-labs/token-list/main/assets/mainnet/Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB/logo.svg"
-            }
-        }
-    }
-    
     # Return known token metadata if available
-    if token_address in known_tokens:
-        return known_tokens[token_address]
+    if token_address in KNOWN_TOKENS:
+        return KNOWN_TOKENS[token_address]
     
-    # For other tokens, try to fetch metadata from token-list
+    # For other tokens, look the mint up in the locally indexed token list
     try:
-        token_list_url = f"https://raw.githubusercontent.com/solana-labs/token-list/main/src/tokens/solana.tokenlist.json"
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(token_list_url, timeout=REQUEST_TIMEOUT) as resp:
-                if resp.status == 200:
-                    token_list = await resp.json()
-                    for token in token_list.get("tokens", []):
-                        if token.get("address") == token_address:
-                            return {
-                                "meta": {
-                                    "name": token.get("name", "Unknown Token"),
-                                    "symbol": token.get("symbol", "UNKNOWN"),
-                                    "logo": token.get("logoURI", "")
-                                }
-                            }
+        store = get_token_list_store()
+        meta = store.lookup(token_address)
+        if meta is None and not store.loaded:
+            # Cold start: make sure the snapshot is read and the background download is running,
+            # but answer now instead of holding the request until the list arrives
+            await store.start()
+            meta = store.lookup(token_address)
+        if meta is not None:
+            return {"meta": meta}
     except Exception as e:
-        logger.warning(f"Error fetching token list: {str(e)}")
+        logger.warning(f"Error reading token list: {str(e)}")
     
     # Fallback to minimal metadata
     return {"meta": {"name": "Unknown Token", "symbol": "UNKNOWN"}}
@@ -0,0 +1,303 @@
+import os
+import json
+import mmap
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .http_client import get_upstream_client
+from ..cache import CACHE_DIR
+from ..cache.shared_store import SHARED_INDEX_POLL, SharedIndexStore, get_leader_lock, get_shared_indexes
+
+logger = logging.getLogger(__name__)
+
+TOKEN_LIST_URL = os.getenv(
+    "TOKEN_LIST_URL",
+    "https://raw.githubusercontent.com/solana-labs/token-list/main/src/tokens/solana.tokenlist.json",
+)
+TOKEN_LIST_TTL = int(os.getenv("TOKEN_LIST_TTL", "21600"))  # seconds between background refreshes
+SNAPSHOT_PATH = os.path.join(CACHE_DIR, "tokenlist.tsv")
+
+# Most logos live at this canonical location; storing them as an empty field keeps the snapshot small.
+DEFAULT_LOGO_TEMPLATE = "https://raw.githubusercontent.com/solana-labs/token-list/main/assets/mainnet/{mint}/logo.png"
+
+SNAPSHOT_HEADER = b"#mastra-tokenlist v1 "
+
+
+def _clean(value: Any) -> str:
+    return str(value or "").replace("\t", " ").replace("\n", " ").replace("\r", " ")
+
+
+def snapshot_rows(tokens: Iterable[Dict[str, Any]]) -> Iterable[Tuple[str, str, str, str]]:
+    """Unique ``(mint, name, symbol, logo)`` records; canonical logo URLs are stored as empty fields."""
+    seen = set()
+    for token in tokens:
+        mint = _clean(token.get("address"))
+        if not mint or mint in seen:
+            continue
+        seen.add(mint)
+        logo = _clean(token.get("logoURI"))
+        if logo == DEFAULT_LOGO_TEMPLATE.format(mint=mint):
+            logo = ""
+        yield mint, _clean(token.get("name")), _clean(token.get("symbol")), logo
+
+
+def write_snapshot(path: str, tokens: Iterable[Dict[str, Any]], fetched_at: float) -> int:
+    """
+    Write a compact ``mint\\tname\\tsymbol\\tlogo`` snapshot atomically.
+
+    Returns the number of records written.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    count = 0
+    with open(tmp_path, "wb") as fh:
+        fh.write(SNAPSHOT_HEADER + str(int(fetched_at)).encode() + b"\n")
+        for record in snapshot_rows(tokens):
+            fh.write("\t".join(record).encode("utf-8") + b"\n")
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+
+class TokenListStore:
+    """
+    In-memory mint index over a memory-mapped token-list snapshot.
+
+    The index maps each mint to the offset of its record in the snapshot
+    file, so lookups are a dict hit plus a slice of the mapped file. The
+    full GitHub token list is only downloaded by the background refresher,
+    never on the request path.
+
+    With a ``shared`` index store (multi-worker serving) the records live in
+    SQLite instead: only the worker holding the leader lock downloads and
+    publishes the list, and every worker looks mints up there without
+    keeping a per-process index.
+    """
+
+    def __init__(
+        self,
+        url: str = TOKEN_LIST_URL,
+        snapshot_path: str = SNAPSHOT_PATH,
+        ttl: int = TOKEN_LIST_TTL,
+        shared: Optional[SharedIndexStore] = None,
+    ) -> None:
+        self.url = url
+        self.snapshot_path = snapshot_path
+        self.ttl = ttl
+        self.shared = shared
+        self._shared_count = 0
+        self._index: Dict[str, int] = {}
+        self._mm: Optional[mmap.mmap] = None
+        self._fh = None
+        self._fetched_at: float = 0.0
+        self._loaded: Optional[asyncio.Event] = None  # created inside the running loop
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self.last_error: Optional[str] = None
+
+    # -- snapshot handling ---------------------------------------------
+
+    def load_snapshot(self) -> bool:
+        """Map the on-disk snapshot and rebuild the mint index. Returns True on success."""
+        if not os.path.exists(self.snapshot_path):
+            return False
+        fh = open(self.snapshot_path, "rb")
+        try:
+            if os.fstat(fh.fileno()).st_size == 0:
+                fh.close()
+                return False
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            fh.close()
+            raise
+        header_end = mm.find(b"\n")
+        if not mm[:header_end].startswith(SNAPSHOT_HEADER):
+            mm.close()
+            fh.close()
+            logger.warning(f"Ignoring token-list snapshot with unknown format: {self.snapshot_path}")
+            return False
+        fetched_at = float(mm[len(SNAPSHOT_HEADER):header_end] or 0)
+
+        index: Dict[str, int] = {}
+        pos = header_end + 1
+        size = len(mm)
+        while pos < size:
+            tab = mm.find(b"\t", pos)
+            end = mm.find(b"\n", pos)
+            if end == -1:
+                end = size
+            if 0 <= tab < end:
+                index[mm[pos:tab].decode("ascii", "replace")] = pos
+            pos = end + 1
+
+        old_mm, old_fh = self._mm, self._fh
+        self._index, self._mm, self._fh, self._fetched_at = index, mm, fh, fetched_at
+        if old_mm is not None:
+            old_mm.close()
+        if old_fh is not None:
+            old_fh.close()
+        logger.info(f"Loaded token-list snapshot with {len(index)} mints from {self.snapshot_path}")
+        return True
+
+    def _record(self, offset: int) -> Tuple[str, str, str, str]:
+        end = self._mm.find(b"\n", offset)
+        if end == -1:
+            end = len(self._mm)
+        fields = self._mm[offset:end].decode("utf-8", "replace").split("\t")
+        fields += [""] * (4 - len(fields))
+        return fields[0], fields[1], fields[2], fields[3]
+
+    # -- lookups ---------------------------------------------------------
+
+    @property
+    def loaded(self) -> bool:
+        if self.shared is not None:
+            return self._fetched_at > 0
+        return self._mm is not None
+
+    def lookup(self, mint: str) -> Optional[Dict[str, str]]:
+        """O(1) metadata lookup; returns None for unknown mints."""
+        if self.shared is not None:
+            record = self.shared.token(mint)
+            if record is None:
+                return None
+            address, name, symbol, logo = record
+        else:
+            offset = self._index.get(mint)
+            if offset is None or self._mm is None:
+                return None
+            address, name, symbol, logo = self._record(offset)
+        return {
+            "name": name or "Unknown Token",
+            "symbol": symbol or "UNKNOWN",
+            "logo": logo or DEFAULT_LOGO_TEMPLATE.format(mint=address),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "mints": self._shared_count if self.shared is not None else len(self._index),
+            "age_seconds": round(time.time() - self._fetched_at, 1) if self._fetched_at else None,
+            "snapshot_path": self.snapshot_path if self.shared is None else self.shared.path,
+            "refreshes": self.shared is None or get_leader_lock().held,
+            "last_error": self.last_error,
+        }
+
+    # -- refresh -------------------------------------------------------
+
+    async def refresh(self) -> bool:
+        """Download the token list, rewrite the snapshot and swap the index in."""
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            try:
+                client = get_upstream_client()
+                async with client.get(self.url, timeout=120) as resp:
+                    if resp.status != 200:
+                        raise RuntimeError(f"token list HTTP {resp.status}")
+                    raw = await resp.read()
+                fetched_at = time.time()
+
+                def _parse_and_write() -> int:
+                    tokens: List[Dict[str, Any]] = json.loads(raw).get("tokens", [])
+                    if self.shared is not None:
+                        return self.shared.publish_tokens(snapshot_rows(tokens), fetched_at)
+                    return write_snapshot(self.snapshot_path, tokens, fetched_at)
+
+                count = await asyncio.to_thread(_parse_and_write)
+                if self.shared is not None:
+                    self.sync_shared()
+                else:
+                    self.load_snapshot()
+                self.last_error = None
+                logger.info(f"Refreshed token list: {count} mints")
+                return True
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning(f"Token list refresh failed: {str(e)}")
+                return False
+
+    def sync_shared(self) -> bool:
+        """Pick up the list last published to the shared store. Returns True once one exists."""
+        dataset = self.shared.dataset("token_list")
+        if dataset is None:
+            return False
+        self._fetched_at, self._shared_count = dataset
+        if self._loaded is not None:
+            self._loaded.set()
+        return True
+
+    def _is_stale(self) -> bool:
+        return not self.loaded or (time.time() - self._fetched_at) >= self.ttl
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            if self.shared is not None:
+                try:
+                    self.sync_shared()
+                except Exception as e:
+                    logger.warning(f"Could not read shared token list: {str(e)}")
+                if not get_leader_lock().acquire():
+                    # Another worker refreshes; follow its publications (closely until the first one)
+                    await asyncio.sleep(SHARED_INDEX_POLL if self.loaded else min(SHARED_INDEX_POLL, 0.25))
+                    continue
+            if self._is_stale():
+                ok = await self.refresh()
+                if self._loaded is not None:
+                    self._loaded.set()
+                # Retry sooner after a failure
+                delay = self.ttl if ok else min(self.ttl, 300)
+            else:
+                delay = max(1.0, self.ttl - (time.time() - self._fetched_at))
+            await asyncio.sleep(delay)
+
+    async def start(self) -> None:
+        """Load the local snapshot and start the background refresher (idempotent)."""
+        if self._loaded is None:
+            self._loaded = asyncio.Event()
+        if not self.loaded:
+            try:
+                if self.shared is not None:
+                    self.sync_shared()
+                else:
+                    self.load_snapshot()
+            except Exception as e:
+                logger.warning(f"Could not load token-list snapshot: {str(e)}")
+        if self.loaded:
+            self._loaded.set()
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def ensure_loaded(self, timeout: float) -> bool:
+        """Start the store if needed and wait (bounded) for the first index to be available."""
+        if self._refresh_task is None or self._refresh_task.done():
+            await self.start()
+        if self.loaded:
+            return True
+        try:
+            await asyncio.wait_for(self._loaded.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.loaded
+
+
+_store: Optional[TokenListStore] = None
+
+
+def get_token_list_store() -> TokenListStore:
+    """Return the process-wide token-list store."""
+    global _store
+    if _store is None:
+        _store = TokenListStore(shared=get_shared_indexes())
+    return _store
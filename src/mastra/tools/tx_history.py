@@ -0,0 +1,232 @@
+import os
+import time
+import zlib
+import asyncio
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from .solana_data_fetcher import APIError, ValidationError, helius_rpc
+from ..cache.tx_store import get_tx_store
+
+logger = logging.getLogger(__name__)
+
+LAMPORTS_PER_SOL = 1_000_000_000
+SIGNATURE_PAGE_SIZE = 1000  # getSignaturesForAddress maximum
+HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", "50"))  # getTransaction calls per batch
+HISTORY_PREFETCH = int(os.getenv("HISTORY_PREFETCH", "4"))  # batches in flight ahead of the consumer
+# Seconds the cluster's finalized slot is reused to decide which fetched transactions may be stored
+FINALIZED_SLOT_TTL = float(os.getenv("FINALIZED_SLOT_TTL", "5"))
+
+_finalized_slot: Tuple[float, int] = (0.0, 0)
+
+
+async def iter_signatures(
+    wallet_address: str,
+    before: Optional[str] = None,
+    until: Optional[str] = None,
+    page_size: int = SIGNATURE_PAGE_SIZE,
+    limit: Optional[int] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Page through ``getSignaturesForAddress`` newest-first.
+
+    Args:
+        wallet_address: Address whose history to walk
+        before: Start strictly before this signature (exclusive cursor)
+        until: Stop once this signature is reached (exclusive)
+        page_size: Signatures per page (1-1000)
+        limit: Optional cap on the total number of signatures yielded
+
+    Yields:
+        Raw signature info dicts (signature, slot, blockTime, err, memo, ...)
+    """
+    if not wallet_address or not isinstance(wallet_address, str):
+        raise ValidationError("Invalid wallet address provided")
+    page_size = max(1, min(SIGNATURE_PAGE_SIZE, int(page_size)))
+    cursor = before
+    yielded = 0
+    while True:
+        if limit is not None:
+            page_size = min(page_size, limit - yielded)
+            if page_size <= 0:
+                return
+        options: Dict[str, Any] = {"limit": page_size}
+        if cursor:
+            options["before"] = cursor
+        if until:
+            options["until"] = until
+        page = await helius_rpc("getSignaturesForAddress", [wallet_address, options])
+        if not isinstance(page, list):
+            raise APIError("Unexpected response format from Helius API")
+        for info in page:
+            yield info
+            yielded += 1
+        if len(page) < page_size:
+            return
+        cursor = page[-1]["signature"]
+
+
+def _account_keys(tx: Dict[str, Any]) -> List[str]:
+    keys = tx.get("transaction", {}).get("message", {}).get("accountKeys", [])
+    result = [k.get("pubkey") if isinstance(k, dict) else k for k in keys]
+    # Legacy encodings list address-table lookups separately
+    loaded = (tx.get("meta") or {}).get("loadedAddresses") or {}
+    if loaded and len(result) < len((tx.get("meta") or {}).get("preBalances", [])):
+        result += loaded.get("writable", []) + loaded.get("readonly", [])
+    return result
+
+
+def _token_amount(balance: Dict[str, Any]) -> float:
+    amount = balance.get("uiTokenAmount", {})
+    try:
+        return int(amount.get("amount", 0)) / (10 ** int(amount.get("decimals", 0)))
+    except (TypeError, ValueError):
+        return float(amount.get("uiAmount") or 0)
+
+
+def compute_balance_deltas(tx: Dict[str, Any], wallet_address: str) -> Tuple[float, Dict[str, float]]:
+    """
+    SOL and per-mint token balance changes for ``wallet_address`` in one parsed transaction.
+
+    Returns:
+        (sol_change, {mint: token_change}); negative values are outflows
+    """
+    meta = tx.get("meta") or {}
+    sol_change = 0.0
+    keys = _account_keys(tx)
+    pre, post = meta.get("preBalances", []), meta.get("postBalances", [])
+    for i, key in enumerate(keys):
+        if key == wallet_address and i < len(pre) and i < len(post):
+            sol_change += (post[i] - pre[i]) / LAMPORTS_PER_SOL
+
+    token_changes: Dict[str, float] = {}
+    for sign, balances in ((-1, meta.get("preTokenBalances") or []), (1, meta.get("postTokenBalances") or [])):
+        for balance in balances:
+            if balance.get("owner") != wallet_address:
+                continue
+            mint = balance.get("mint")
+            token_changes[mint] = token_changes.get(mint, 0.0) + sign * _token_amount(balance)
+    return sol_change, {mint: delta for mint, delta in token_changes.items() if delta}
+
+
+async def finalized_slot() -> Optional[int]:
+    """The cluster's latest finalized slot (briefly cached; it only moves forward), or None if unavailable."""
+    global _finalized_slot
+    fetched_at, slot = _finalized_slot
+    if time.monotonic() - fetched_at < FINALIZED_SLOT_TTL:
+        return slot
+    try:
+        slot = await helius_rpc("getSlot", [{"commitment": "finalized"}])
+    except APIError as e:
+        logger.warning(f"Failed to fetch the finalized slot: {str(e)}")
+        return None
+    if not isinstance(slot, int):
+        return None
+    _finalized_slot = (time.monotonic(), slot)
+    return slot
+
+
+async def fetch_transactions(signatures: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Fetch parsed transactions, reading finalized ones from the local transaction store first.
+
+    Only the misses go upstream (concurrent calls share one JSON-RPC batch) at
+    ``confirmed`` commitment. Those at or below the finalized slot can no
+    longer be rolled back and are appended to the store for every later pass.
+    """
+    options = {"encoding": "jsonParsed", "maxSupportedTransactionVersion": 0, "commitment": "confirmed"}
+    store = get_tx_store()
+    stored: Dict[str, Dict[str, Any]] = {}
+    if store is not None and signatures:
+        try:
+            stored = await asyncio.to_thread(store.get_many, signatures)
+        except (OSError, ValueError, zlib.error) as e:
+            logger.warning(f"Could not read transaction store: {str(e)}")
+
+    async def fetch(signature: str) -> Optional[Dict[str, Any]]:
+        try:
+            return await helius_rpc("getTransaction", [signature, options])
+        except APIError as e:
+            logger.warning(f"Failed to fetch transaction {signature}: {str(e)}")
+            return None
+
+    misses = [sig for sig in dict.fromkeys(signatures) if sig not in stored]
+    fetched = dict(zip(misses, await asyncio.gather(*(fetch(sig) for sig in misses))))
+    if store is not None:
+        new = {sig: tx for sig, tx in fetched.items() if isinstance(tx, dict)}
+        slot = await finalized_slot() if new else None
+        if slot is not None:
+            try:
+                await asyncio.to_thread(store.put_many, new, slot)
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning(f"Could not write transaction store: {str(e)}")
+    return [stored.get(sig) or fetched.get(sig) for sig in signatures]
+
+
+def _history_entry(info: Dict[str, Any], tx: Optional[Dict[str, Any]], wallet_address: str) -> Dict[str, Any]:
+    entry = {
+        "signature": info.get("signature"),
+        "slot": info.get("slot"),
+        "blockTime": info.get("blockTime"),
+        "memo": info.get("memo"),
+        "err": info.get("err"),
+    }
+    if tx is not None:
+        sol_change, token_changes = compute_balance_deltas(tx, wallet_address)
+        entry["change"] = sol_change
+        entry["token_changes"] = token_changes
+        entry["fee"] = (tx.get("meta") or {}).get("fee")
+    return entry
+
+
+async def iter_wallet_history(
+    wallet_address: str,
+    before: Optional[str] = None,
+    until: Optional[str] = None,
+    with_transactions: bool = True,
+    limit: Optional[int] = None,
+    batch_size: int = HISTORY_BATCH_SIZE,
+    prefetch: int = HISTORY_PREFETCH,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream a wallet's full history newest-first, one entry per transaction.
+
+    Signatures are paged with ``before``/``until`` cursors. With
+    ``with_transactions`` the parsed transactions are fetched in concurrent
+    batches (up to ``prefetch`` batches ahead of the consumer) and each
+    entry carries ``change`` (SOL) and ``token_changes`` (per mint). Memory
+    stays bounded by ``batch_size * prefetch`` regardless of history length.
+    """
+    signatures = iter_signatures(wallet_address, before=before, until=until, limit=limit)
+    if not with_transactions:
+        async for info in signatures:
+            yield _history_entry(info, None, wallet_address)
+        return
+
+    in_flight: Deque[Tuple[List[Dict[str, Any]], asyncio.Task]] = deque()
+
+    def submit(batch: List[Dict[str, Any]]) -> None:
+        task = asyncio.ensure_future(fetch_transactions([info["signature"] for info in batch]))
+        in_flight.append((batch, task))
+
+    try:
+        batch: List[Dict[str, Any]] = []
+        async for info in signatures:
+            batch.append(info)
+            if len(batch) >= batch_size:
+                submit(batch)
+                batch = []
+            while len(in_flight) >= max(1, prefetch):
+                infos, task = in_flight.popleft()
+                for info_, tx in zip(infos, await task):
+                    yield _history_entry(info_, tx, wallet_address)
+        if batch:
+            submit(batch)
+        while in_flight:
+            infos, task = in_flight.popleft()
+            for info_, tx in zip(infos, await task):
+                yield _history_entry(info_, tx, wallet_address)
+    finally:
+        for _, task in in_flight:
+            task.cancel()
@@ -0,0 +1,362 @@
+import os
+import json
+import random
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import aiohttp
+from fastapi import APIRouter, HTTPException, Request
+
+from .agents.coordinator_agent import coordinator_agent
+from .cache.result_cache import get_analysis_cache
+from .cache.wallet_state import get_wallet_state_store
+from .tools.http_client import get_upstream_client
+from .tools.solana_data_fetcher import HELIUS_TOKEN_BALANCE_ENDPOINT, SOLANA_RPC_URL
+from .ws_alerts import broadcast_alert
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Upstream Solana PubSub endpoint (defaults to the Helius RPC endpoint, or SOLANA_RPC_URL without a key, over wss)
+SOLANA_WS_URL = os.getenv("SOLANA_WS_URL", (HELIUS_TOKEN_BALANCE_ENDPOINT or SOLANA_RPC_URL).replace("https://", "wss://", 1))
+# Watched wallets are spread over this many upstream WebSocket connections
+WATCHER_CONNECTIONS = int(os.getenv("WATCHER_CONNECTIONS", "4"))
+WATCHER_MAX_WALLETS = int(os.getenv("WATCHER_MAX_WALLETS", "20000"))
+# "logs" (logsSubscribe mentions) or "account" (accountSubscribe on the wallet)
+WATCHER_SUBSCRIBE_METHOD = os.getenv("WATCHER_SUBSCRIBE_METHOD", "logs")
+WATCHER_COMMITMENT = os.getenv("WATCHER_COMMITMENT", "confirmed")
+# Notifications for a wallet arriving within this window trigger one re-analysis
+WATCHER_DEBOUNCE = float(os.getenv("WATCHER_DEBOUNCE", "2"))
+WATCHER_ANALYSIS_CONCURRENCY = int(os.getenv("WATCHER_ANALYSIS_CONCURRENCY", "4"))
+WATCHER_HEARTBEAT = float(os.getenv("WATCHER_HEARTBEAT", "30"))
+WATCHER_RECONNECT_MAX = float(os.getenv("WATCHER_RECONNECT_MAX", "30"))
+
+# subscribe method, unsubscribe method, notification method
+SUBSCRIBE_METHODS = {
+    "logs": ("logsSubscribe", "logsUnsubscribe", "logsNotification"),
+    "account": ("accountSubscribe", "accountUnsubscribe", "accountNotification"),
+}
+
+
+def subscribe_params(kind: str, wallet: str, commitment: str = WATCHER_COMMITMENT) -> List[Any]:
+    if kind == "account":
+        return [wallet, {"encoding": "jsonParsed", "commitment": commitment}]
+    return [{"mentions": [wallet]}, {"commitment": commitment}]
+
+
+class SubscriptionConnection:
+    """
+    One upstream PubSub WebSocket carrying subscriptions for many wallets.
+
+    On every (re)connect all assigned wallets are resubscribed; subscription
+    ids from the previous socket are discarded since the server forgets them.
+    Reconnects back off exponentially with jitter.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        kind: str,
+        on_notification: Callable[[str, Dict[str, Any]], None],
+        name: str = "0",
+    ) -> None:
+        self.url = url
+        self.kind = kind
+        self.name = name
+        self.on_notification = on_notification
+        self.wallets: Set[str] = set()
+        self._subs: Dict[int, str] = {}
+        self._wallet_subs: Dict[str, int] = {}
+        self._requests: Dict[int, Tuple[str, str]] = {}
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._task: Optional[asyncio.Task] = None
+        self._next_id = 0
+        self.connects = 0
+        self.notifications = 0
+        self.errors = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._ws is not None and not self._ws.closed
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def add(self, wallet: str) -> None:
+        self.wallets.add(wallet)
+        if self.connected:
+            await self._request("subscribe", wallet)
+        else:
+            self.start()
+
+    async def remove(self, wallet: str) -> None:
+        self.wallets.discard(wallet)
+        sub_id = self._wallet_subs.pop(wallet, None)
+        if sub_id is not None:
+            self._subs.pop(sub_id, None)
+            if self.connected:
+                await self._request("unsubscribe", wallet, sub_id)
+
+    async def _request(self, action: str, wallet: str, sub_id: Optional[int] = None) -> None:
+        subscribe, unsubscribe, _ = SUBSCRIBE_METHODS[self.kind]
+        self._next_id += 1
+        if action == "subscribe":
+            method, params = subscribe, subscribe_params(self.kind, wallet)
+        else:
+            method, params = unsubscribe, [sub_id]
+        self._requests[self._next_id] = (action, wallet)
+        await self._ws.send_str(json.dumps({"jsonrpc": "2.0", "id": self._next_id, "method": method, "params": params}))
+
+    def _handle(self, message: Dict[str, Any]) -> Optional[Tuple[str, int]]:
+        """Process one server message; returns ``(wallet, subscription)`` if it must be unsubscribed."""
+        if "id" in message:
+            action, wallet = self._requests.pop(message["id"], (None, None))
+            if "error" in message:
+                self.errors += 1
+                logger.warning(f"Watcher {action} failed for {wallet}: {message['error']}")
+            elif action == "subscribe":
+                sub_id = message.get("result")
+                # Unwatched while the subscribe was in flight, or subscribed twice around a reconnect
+                if wallet not in self.wallets or wallet in self._wallet_subs:
+                    return wallet, sub_id
+                self._subs[sub_id] = wallet
+                self._wallet_subs[wallet] = sub_id
+            return None
+        if message.get("method") == SUBSCRIBE_METHODS[self.kind][2]:
+            params = message.get("params") or {}
+            wallet = self._subs.get(params.get("subscription"))
+            if wallet is not None:
+                self.notifications += 1
+                self.on_notification(wallet, (params.get("result") or {}).get("value") or {})
+        return None
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                session = await get_upstream_client().session()
+                async with session.ws_connect(self.url, heartbeat=WATCHER_HEARTBEAT) as ws:
+                    self._ws = ws
+                    self.connects += 1
+                    backoff = 1.0
+                    for wallet in list(self.wallets):
+                        await self._request("subscribe", wallet)
+                    async for msg in ws:
+                        if msg.type != aiohttp.WSMsgType.TEXT:
+                            continue
+                        stale = self._handle(json.loads(msg.data))
+                        if stale is not None:
+                            await self._request("unsubscribe", *stale)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Watcher connection {self.name} failed: {str(e)}")
+            finally:
+                self._ws = None
+                self._subs.clear()
+                self._wallet_subs.clear()
+                self._requests.clear()
+            await asyncio.sleep(backoff * random.uniform(0.5, 1.0))
+            backoff = min(backoff * 2, WATCHER_RECONNECT_MAX)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "wallets": len(self.wallets),
+            "subscribed": len(self._wallet_subs),
+            "connected": self.connected,
+            "connects": self.connects,
+            "notifications": self.notifications,
+            "errors": self.errors,
+        }
+
+
+class WalletWatcher:
+    """
+    Real-time monitoring for a set of wallets.
+
+    Wallets are multiplexed over a few upstream PubSub connections. A
+    notification for a wallet schedules a debounced incremental re-analysis
+    (the coordinator only fetches transactions newer than the stored cursor),
+    refreshes the result cache and pushes the verdict to alert subscribers.
+    """
+
+    def __init__(
+        self,
+        url: str = SOLANA_WS_URL,
+        connections: int = WATCHER_CONNECTIONS,
+        kind: str = WATCHER_SUBSCRIBE_METHOD,
+        debounce: float = WATCHER_DEBOUNCE,
+        concurrency: int = WATCHER_ANALYSIS_CONCURRENCY,
+        analyze: Callable[[str], Awaitable[Dict[str, Any]]] = coordinator_agent,
+    ) -> None:
+        if kind not in SUBSCRIBE_METHODS:
+            raise ValueError(f"Unknown subscription method: {kind}")
+        self.debounce = debounce
+        self.concurrency = concurrency
+        self.analyze = analyze
+        self.connections = [
+            SubscriptionConnection(url, kind, self._on_notification, name=str(i)) for i in range(max(1, connections))
+        ]
+        self._assigned: Dict[str, SubscriptionConnection] = {}
+        self._dirty: Set[str] = set()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._limit: Optional[asyncio.Semaphore] = None
+        self.analyses = 0
+        self.alerts = 0
+
+    async def start(self) -> None:
+        """Resume watching the wallets persisted by a previous run."""
+        wallets = await get_wallet_state_store().watched_wallets()
+        if len(wallets) > WATCHER_MAX_WALLETS:
+            logger.warning(f"Resuming only {WATCHER_MAX_WALLETS} of {len(wallets)} persisted wallets (WATCHER_MAX_WALLETS)")
+            wallets = wallets[:WATCHER_MAX_WALLETS]
+        if wallets:
+            await self.watch(wallets, persist=False)
+
+    async def stop(self) -> None:
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        await asyncio.gather(*(conn.stop() for conn in self.connections))
+
+    async def watch(self, wallets: List[str], persist: bool = True) -> List[str]:
+        """
+        Start watching ``wallets``; returns the ones that were not watched yet.
+
+        A batch that would exceed WATCHER_MAX_WALLETS is rejected as a whole
+        (ValueError) before anything is subscribed.
+        """
+        added = [wallet for wallet in dict.fromkeys(wallets) if wallet not in self._assigned]
+        if len(self._assigned) + len(added) > WATCHER_MAX_WALLETS:
+            raise ValueError(
+                f"At most {WATCHER_MAX_WALLETS} wallets can be watched "
+                f"({len(self._assigned)} watched, {len(added)} requested)"
+            )
+        # Assign the whole batch before the first await, so concurrent calls see it in the limit check
+        batch = []
+        for wallet in added:
+            conn = min(self.connections, key=lambda c: len(c.wallets) + batch.count(c))
+            self._assigned[wallet] = conn
+            batch.append(conn)
+        for wallet, conn in zip(added, batch):
+            await conn.add(wallet)
+        if persist and added:
+            await get_wallet_state_store().set_watched(added, True)
+        return added
+
+    async def unwatch(self, wallet: str) -> bool:
+        conn = self._assigned.pop(wallet, None)
+        if conn is None:
+            return False
+        await conn.remove(wallet)
+        await get_wallet_state_store().set_watched([wallet], False)
+        return True
+
+    def _on_notification(self, wallet: str, value: Dict[str, Any]) -> None:
+        self._dirty.add(wallet)
+        if wallet not in self._refreshing:
+            self._refreshing[wallet] = asyncio.ensure_future(self._refresh(wallet))
+
+    async def _refresh(self, wallet: str) -> None:
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self.concurrency)
+        try:
+            # Notifications arriving while an analysis runs cause exactly one more pass
+            while wallet in self._dirty:
+                await asyncio.sleep(self.debounce)
+                self._dirty.discard(wallet)
+                async with self._limit:
+                    await self._analyze(wallet)
+        finally:
+            self._refreshing.pop(wallet, None)
+
+    async def _analyze(self, wallet: str) -> None:
+        try:
+            result = await self.analyze(wallet)
+        except Exception as e:
+            logger.warning(f"Watcher analysis failed for {wallet}: {str(e)}")
+            return
+        self.analyses += 1
+        get_analysis_cache().put(wallet, result)
+        detailed = result.get("detailed", {})
+        tx_monitor = detailed.get("transaction_monitor", {})
+        suspicious = bool(tx_monitor.get("suspicious"))
+        risk_rating = result.get("risk_rating", "UNKNOWN")
+        self.alerts += 1
+        await broadcast_alert({
+            "type": "wallet_activity",
+            "level": "alert" if suspicious or risk_rating == "HIGH" else "info",
+            "wallet": wallet,
+            "suspicious": suspicious,
+            "summary": tx_monitor.get("summary"),
+            "new_txs": tx_monitor.get("new_txs", 0),
+            "trust_score": result.get("trust_score"),
+            "risk_rating": risk_rating,
+        })
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "watched": len(self._assigned),
+            "pending_analyses": len(self._refreshing),
+            "analyses": self.analyses,
+            "alerts": self.alerts,
+            "connections": [conn.stats() for conn in self.connections],
+        }
+
+
+_watcher: Optional[WalletWatcher] = None
+
+
+def get_wallet_watcher() -> WalletWatcher:
+    """Return the process-wide wallet watcher."""
+    global _watcher
+    if _watcher is None:
+        _watcher = WalletWatcher()
+    return _watcher
+
+
+@router.post("/api/watch")
+async def watch_wallets(request: Request):
+    """Start real-time monitoring for ``{"wallets": [...]}`` (or ``{"wallet": ...}``)."""
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Invalid request", "details": "Request body must be valid JSON"}
+        )
+    if not isinstance(body, dict):
+        body = {}
+    wallets = body.get("wallets") or ([body["wallet"]] if body.get("wallet") else [])
+    if not wallets or not isinstance(wallets, list) or not all(isinstance(w, str) and len(w) >= 20 for w in wallets):
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Invalid wallet address", "details": "A list of valid wallet addresses is required"}
+        )
+    try:
+        added = await get_wallet_watcher().watch(wallets)
+    except ValueError as ve:
+        raise HTTPException(status_code=413, detail={"error": "Too many wallets", "details": str(ve)})
+    return {"added": added, "watched": get_wallet_watcher().stats()["watched"]}
+
+@router.delete("/api/watch/{wallet}")
+async def unwatch_wallet(wallet: str):
+    if not await get_wallet_watcher().unwatch(wallet):
+        raise HTTPException(status_code=404, detail={"error": "Not watched", "details": wallet})
+    return {"removed": wallet}
+
+@router.get("/api/watch")
+async def watcher_stats():
+    """Watched wallets per upstream connection, notification and analysis counters."""
+    return get_wallet_watcher().stats()
@@ -0,0 +1,157 @@
+import os
+import sys
+import time
+import asyncio
+from typing import Any, Awaitable, Dict, List, Optional
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from .agents.scoring import get_risk_scorer
+from .tools.http_client import get_upstream_client
+from .tools.token_list import get_token_list_store
+from .tools.raydium_pools import get_pool_index
+from .tools.solana_data_fetcher import RPC_ENDPOINTS
+from .tools.contract_scanner import SOLSCAN_API_URL
+from .tools.llm_client import get_llm_client
+
+router = APIRouter()
+
+# Upper bound on warm-up; after it the node reports ready (degraded) rather than staying out of rotation
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "30"))
+# Keep-alive connections opened per upstream host during warm-up
+WARMUP_CONNECTIONS_PER_HOST = int(os.getenv("WARMUP_CONNECTIONS_PER_HOST", "2"))
+
+# Set when this module is first imported, i.e. while main.py imports the app
+IMPORTED_AT = time.monotonic()
+
+
+def duplicate_modules() -> List[str]:
+    """Modules loaded under both ``mastra.`` and ``src.mastra.`` (each would hold its own singletons)."""
+    return sorted(name for name in list(sys.modules) if name.startswith("mastra.") and f"src.{name}" in sys.modules)
+
+
+class WarmUp:
+    """
+    Startup warm-up that gates /api/ready.
+
+    Opens pooled upstream connections and waits for the token-list and
+    Raydium pool indexes concurrently, all bounded by ``timeout``. Steps
+    still pending at the deadline are abandoned and the node reports ready
+    as degraded, so a slow upstream cannot keep it out of rotation.
+    """
+
+    def __init__(self, timeout: float = WARMUP_TIMEOUT, per_host: int = WARMUP_CONNECTIONS_PER_HOST) -> None:
+        self.timeout = timeout
+        self.per_host = per_host
+        self.process_started: Optional[float] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def degraded(self) -> bool:
+        return self.ready and not all(step.get("ok") for step in self.steps.values())
+
+    def start(self, process_started: Optional[float] = None) -> None:
+        """Run warm-up in the background; ``process_started`` (monotonic) anchors the cold-start time."""
+        if self._task is None:
+            self.process_started = process_started or IMPORTED_AT
+            self._task = asyncio.ensure_future(self.run())
+
+    async def wait(self) -> None:
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _open_connections(self) -> bool:
+        client = get_upstream_client()
+        await client.start()
+        urls = list(RPC_ENDPOINTS) + [SOLSCAN_API_URL]
+        if get_llm_client().enabled:
+            urls.append(get_llm_client().base_url)
+        return await client.prewarm(urls, per_host=self.per_host) > 0
+
+    async def _prepare_scoring(self) -> bool:
+        get_risk_scorer()
+        return True
+
+    async def _step(self, name: str, awaitable: Awaitable[bool]) -> None:
+        started = time.monotonic()
+        self.steps[name] = {"ok": False, "done": False}
+        try:
+            ok = bool(await awaitable)
+        except Exception as e:
+            print(f"[WARNING] Warm-up step {name} failed: {str(e)}")
+            ok = False
+        self.steps[name] = {"ok": ok, "done": True, "seconds": round(time.monotonic() - started, 3)}
+
+    async def run(self) -> None:
+        self.started_at = time.monotonic()
+        steps = {
+            "upstream_connections": self._open_connections(),
+            "token_list": get_token_list_store().ensure_loaded(self.timeout),
+            "raydium_pools": get_pool_index().ensure_loaded(self.timeout),
+            "risk_scorer": self._prepare_scoring(),
+        }
+        tasks = [asyncio.ensure_future(self._step(name, step)) for name, step in steps.items()]
+        try:
+            _, pending = await asyncio.wait(tasks, timeout=self.timeout)
+            for task in pending:
+                task.cancel()
+            for name, step in self.steps.items():
+                if not step["done"]:
+                    step.update(timed_out=True, seconds=round(self.timeout, 3))
+        finally:
+            for task in tasks:
+                task.cancel()
+        self.finished_at = time.monotonic()
+        duplicates = duplicate_modules()
+        if duplicates:
+            print(f"[WARNING] {len(duplicates)} modules are imported twice (mastra.* and src.mastra.*), e.g. {duplicates[0]}")
+        state = "degraded" if self.degraded else "ready"
+        print(f"[INFO] Backend {state} after {self.finished_at - self.process_started:.2f}s "
+              f"(warm-up {self.finished_at - self.started_at:.2f}s)")
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        started = self.started_at or now
+        return {
+            "ready": self.ready,
+            "degraded": self.degraded,
+            "import_seconds": round(started - self.process_started, 3) if self.process_started else None,
+            "warmup_seconds": round((self.finished_at or now) - started, 3),
+            "cold_start_seconds": round(self.finished_at - self.process_started, 3) if self.ready else None,
+            "steps": self.steps,
+            "duplicate_modules": len(duplicate_modules()),
+        }
+
+
+_warmup: Optional[WarmUp] = None
+
+
+def get_warmup() -> WarmUp:
+    """Return the process-wide warm-up tracker."""
+    global _warmup
+    if _warmup is None:
+        _warmup = WarmUp()
+    return _warmup
+
+
+@router.get("/api/ready")
+async def ready():
+    """Readiness probe: 503 until warm-up finished (or hit WARMUP_TIMEOUT), then 200 with cold-start timings."""
+    warmup = get_warmup()
+    return JSONResponse(warmup.stats(), status_code=200 if warmup.ready else 503)
@@ -1,25 +1,302 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import List
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-active_connections: List[WebSocket] = []
+# Topic that receives every alert (what clients without a wallet filter get)
+WILDCARD = "*"
+
+# Messages buffered per connection before the slow-consumer policy applies
+ALERT_QUEUE_SIZE = int(os.getenv("ALERT_QUEUE_SIZE", "256"))
+# "drop" discards the oldest queued alerts; "disconnect" closes the socket
+ALERT_SLOW_POLICY = os.getenv("ALERT_SLOW_POLICY", "drop")
+# With the drop policy, a connection that keeps overflowing is closed after this many drops
+ALERT_MAX_DROPS = int(os.getenv("ALERT_MAX_DROPS", "1000"))
+# Alerts queued while a send is in flight go out together, up to this many per frame
+ALERT_BATCH_MAX = int(os.getenv("ALERT_BATCH_MAX", "50"))
+ALERT_SEND_TIMEOUT = float(os.getenv("ALERT_SEND_TIMEOUT", "10"))
+ALERT_HEARTBEAT_INTERVAL = float(os.getenv("ALERT_HEARTBEAT_INTERVAL", "30"))
+# Connections with no client message and no successful send for longer than this are closed
+ALERT_HEARTBEAT_TIMEOUT = float(os.getenv("ALERT_HEARTBEAT_TIMEOUT", "90"))
+ALERT_MAX_TOPICS = int(os.getenv("ALERT_MAX_TOPICS", "1000"))
+
+
+class AlertConnection:
+    """One subscriber socket with its own bounded queue and sender task."""
+
+    __slots__ = ("websocket", "topics", "queue", "wakeup", "sender", "last_seen", "dropped", "sent", "closed")
+
+    def __init__(self, websocket: WebSocket) -> None:
+        self.websocket = websocket
+        self.topics: Set[str] = set()
+        self.queue: Deque[str] = deque()
+        self.wakeup = asyncio.Event()
+        self.sender: Optional[asyncio.Task] = None
+        self.last_seen = time.monotonic()
+        self.dropped = 0
+        self.sent = 0
+        self.closed = False
+
+    def touch(self) -> None:
+        self.last_seen = time.monotonic()
+
+
+class AlertHub:
+    """
+    Topic-based WebSocket fan-out.
+
+    Publishing serializes the alert once and appends it to the queue of each
+    subscriber of the alert's wallet topic (plus wildcard subscribers); it
+    never awaits a socket. Each connection drains its own queue in a sender
+    task, batching whatever accumulated during the previous send, so a slow
+    client only delays itself. When a queue is full the slow-consumer policy
+    either drops the oldest alerts or closes the connection.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = ALERT_QUEUE_SIZE,
+        slow_policy: str = ALERT_SLOW_POLICY,
+        max_drops: int = ALERT_MAX_DROPS,
+        batch_max: int = ALERT_BATCH_MAX,
+        send_timeout: float = ALERT_SEND_TIMEOUT,
+        heartbeat_interval: float = ALERT_HEARTBEAT_INTERVAL,
+        heartbeat_timeout: float = ALERT_HEARTBEAT_TIMEOUT,
+    ) -> None:
+        self.queue_size = queue_size
+        self.slow_policy = slow_policy
+        self.max_drops = max_drops
+        self.batch_max = max(1, batch_max)
+        self.send_timeout = send_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.topics: Dict[str, Set[AlertConnection]] = {}
+        self.connections: Set[AlertConnection] = set()
+        self._heartbeat: Optional[asyncio.Task] = None
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.slow_disconnects = 0
+        self.idle_disconnects = 0
+
+    # -- connection lifecycle ---------------------------------------------
+
+    def connect(self, websocket: WebSocket, topics: Iterable[str] = (WILDCARD,)) -> AlertConnection:
+        conn = AlertConnection(websocket)
+        self.connections.add(conn)
+        self.subscribe(conn, topics)
+        conn.sender = asyncio.ensure_future(self._send_loop(conn))
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.ensure_future(self._heartbeat_loop())
+        return conn
+
+    def disconnect(self, conn: AlertConnection, code: Optional[int] = None) -> None:
+        """Unregister a connection; with ``code`` the socket is also closed."""
+        if conn.closed:
+            return
+        conn.closed = True
+        self.connections.discard(conn)
+        self.unsubscribe(conn, list(conn.topics))
+        if conn.sender is not None and conn.sender is not asyncio.current_task():
+            conn.sender.cancel()
+        if code is not None:
+            asyncio.ensure_future(self._close_socket(conn.websocket, code))
+
+    async def _close_socket(self, websocket: WebSocket, code: int) -> None:
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
+
+    def subscribe(self, conn: AlertConnection, topics: Iterable[str]) -> None:
+        for topic in topics:
+            if not topic or not isinstance(topic, str) or topic in conn.topics:
+                continue
+            if len(conn.topics) >= ALERT_MAX_TOPICS:
+                break
+            conn.topics.add(topic)
+            self.topics.setdefault(topic, set()).add(conn)
+
+    def unsubscribe(self, conn: AlertConnection, topics: Iterable[str]) -> None:
+        for topic in topics:
+            conn.topics.discard(topic)
+            subscribers = self.topics.get(topic)
+            if subscribers is None:
+                continue
+            subscribers.discard(conn)
+            if not subscribers:
+                del self.topics[topic]
+
+    # -- publishing ---------------------------------------------------------
+
+    def _enqueue(self, conn: AlertConnection, message: str) -> bool:
+        if conn.closed:
+            return False
+        if len(conn.queue) >= self.queue_size:
+            if self.slow_policy == "disconnect" or conn.dropped >= self.max_drops:
+                self.slow_disconnects += 1
+                logger.warning(f"Closing slow alert subscriber after {conn.dropped} dropped alerts")
+                self.disconnect(conn, code=1013)
+                return False
+            conn.queue.popleft()
+            conn.dropped += 1
+            self.dropped += 1
+        conn.queue.append(message)
+        conn.wakeup.set()
+        return True
+
+    def publish(self, topic: str, message: Dict[str, Any]) -> int:
+        """Queue ``message`` for every subscriber of ``topic`` and of the wildcard; returns the count."""
+        self.published += 1
+        subscribers = list(self.topics.get(topic, ()))
+        if topic != WILDCARD:
+            direct = self.topics.get(topic, ())
+            subscribers.extend(conn for conn in self.topics.get(WILDCARD, ()) if conn not in direct)
+        if not subscribers:
+            return 0
+        text = json.dumps(message)
+        queued = sum(self._enqueue(conn, text) for conn in subscribers)
+        self.delivered += queued
+        return queued
+
+    def send_to(self, conn: AlertConnection, message: Dict[str, Any]) -> bool:
+        return self._enqueue(conn, json.dumps(message))
+
+    # -- per-connection sender and heartbeats -------------------------------
+
+    async def _send_loop(self, conn: AlertConnection) -> None:
+        try:
+            while not conn.closed:
+                await conn.wakeup.wait()
+                conn.wakeup.clear()
+                while conn.queue:
+                    count = min(len(conn.queue), self.batch_max)
+                    batch = [conn.queue.popleft() for _ in range(count)]
+                    if count == 1:
+                        frame = batch[0]
+                    else:
+                        frame = '{"type": "batch", "alerts": [' + ", ".join(batch) + "]}"
+                    await asyncio.wait_for(conn.websocket.send_text(frame), self.send_timeout)
+                    conn.sent += count
+                    # A delivered frame (heartbeat pings included) proves the socket is alive,
+                    # so passive subscribers that never write are not closed as idle
+                    conn.touch()
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self.slow_disconnects += 1
+            self.disconnect(conn, code=1013)
+        except Exception:
+            self.disconnect(conn)
+
+    async def _heartbeat_loop(self) -> None:
+        while self.connections:
+            await asyncio.sleep(self.heartbeat_interval)
+            now = time.monotonic()
+            ping = json.dumps({"type": "ping", "ts": int(time.time())})
+            for conn in list(self.connections):
+                if now - conn.last_seen > self.heartbeat_timeout:
+                    self.idle_disconnects += 1
+                    self.disconnect(conn, code=1001)
+                else:
+                    self._enqueue(conn, ping)
+
+    async def close(self) -> None:
+        """Close every connection and stop the heartbeat task (on shutdown)."""
+        for conn in list(self.connections):
+            self.disconnect(conn, code=1001)
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self.connections),
+            "topics": len(self.topics),
+            "wildcard_subscribers": len(self.topics.get(WILDCARD, ())),
+            "queued": sum(len(conn.queue) for conn in self.connections),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "slow_disconnects": self.slow_disconnects,
+            "idle_disconnects": self.idle_disconnects,
+            "slow_policy": self.slow_policy,
+        }
+
+
+_hub: Optional[AlertHub] = None
+
+
+def get_alert_hub() -> AlertHub:
+    """Return the process-wide alert hub."""
+    global _hub
+    if _hub is None:
+        _hub = AlertHub()
+    return _hub
+
+
+def _topics_from(value: Any) -> List[str]:
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list):
+        return []
+    return [t.strip() for t in value if isinstance(t, str) and t.strip()]
+
 
 @router.websocket("/api/subscribe_alerts")
 async def websocket_endpoint(websocket: WebSocket):
+    """
+    Alerts for the wallets in ``?wallets=a,b`` (every alert when omitted).
+
+    Clients may send ``{"action": "subscribe" | "unsubscribe", "wallets": [...]}``
+    to change topics (subscribing to specific wallets leaves the wildcard topic). The server sends
+    ``{"type": "ping"}`` every heartbeat interval; answering is optional, since a connection stays
+    alive as long as those frames can be delivered.
+    """
     await websocket.accept()
-    active_connections.append(websocket)
+    hub = get_alert_hub()
+    conn = hub.connect(websocket, _topics_from(websocket.query_params.get("wallets")) or [WILDCARD])
     try:
         while True:
             data = await websocket.receive_text()
-            # Echo or handle ping/pong if needed
+            conn.touch()
+            try:
+                message = json.loads(data)
+            except ValueError:
+                message = data
+            if not isinstance(message, dict):
+                if message == "ping":
+                    hub.send_to(conn, {"type": "pong"})
+                continue
+            action = message.get("action") or message.get("type")
+            if action == "ping":
+                hub.send_to(conn, {"type": "pong"})
+            elif action in ("subscribe", "unsubscribe"):
+                topics = _topics_from(message.get("wallets"))
+                if action == "subscribe":
+                    hub.unsubscribe(conn, [WILDCARD] if topics and WILDCARD not in topics else [])
+                    hub.subscribe(conn, topics)
+                else:
+                    hub.unsubscribe(conn, topics)
+                hub.send_to(conn, {"type": "subscribed", "wallets": sorted(conn.topics)})
     except WebSocketDisconnect:
-        active_connections.remove(websocket)
+        pass
+    finally:
+        hub.disconnect(conn)
 
-# Utility to broadcast alert to all clients
-async def broadcast_alert(alert: dict):
-    for ws in active_connections:
-        try:
-            await ws.send_json(alert)
-        except Exception:
-            pass
+@router.get("/api/alerts/stats")
+async def alert_stats():
+    """Subscriber, queue and slow-consumer counters for the alerts WebSocket."""
+    return get_alert_hub().stats()
+
+# Utility to broadcast alert to subscribers of the alert's wallet (and wildcard subscribers)
+async def broadcast_alert(alert: dict) -> int:
+    return get_alert_hub().publish(alert.get("wallet") or WILDCARD, alert)
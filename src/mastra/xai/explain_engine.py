@@ -1,4 +1,6 @@
-from typing import Dict
+from typing import Any, Dict, Iterable, Optional
+
+SPECIALTIES = ("transaction_monitor", "token_forensics", "risk_advisor")
 
 def generate_confidence(analysis_text: str) -> float:
     """
@@ -27,3 +29,33 @@ def make_trace(specialty: str, results: Dict) -> str:
     if specialty == "risk_advisor":
         return f"Overall risk score: {results.get('risk_score', '?')}. {results.get('risk_reason', '')}"
     return "No additional trace available."
+
+def explain(specialty: str, results: Dict) -> Dict[str, Any]:
+    """
+    Trace plus its confidence for one specialty card.
+    """
+    trace = make_trace(specialty, results)
+    return {"explanation": trace, "confidence": generate_confidence(trace)}
+
+def explain_analysis(result: Dict, specialties: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Explanations for every specialty of a full analysis result, as returned by /api/analyze_wallet.
+    Token forensics are explained per token address.
+    """
+    detailed = result.get("detailed", {})
+    explanations: Dict[str, Any] = {}
+    for specialty in specialties or SPECIALTIES:
+        if specialty == "token_forensics":
+            explanations[specialty] = {
+                addr: explain(specialty, token)
+                for addr, token in detailed.get("token_forensics", {}).items()
+            }
+        elif specialty == "risk_advisor":
+            # The advisor card is formatted as score/reason; make_trace reads the advisor's raw keys
+            advisor = detailed.get("risk_advisor", {})
+            explanations[specialty] = explain(
+                specialty, dict(advisor, risk_score=advisor.get("score", "?"), risk_reason=advisor.get("reason", ""))
+            )
+        else:
+            explanations[specialty] = explain(specialty, detailed.get(specialty, {}))
+    return explanations
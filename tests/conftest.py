@@ -0,0 +1,27 @@
+import os
+import sys
+import tempfile
+from typing import Tuple
+
+from aiohttp import web
+
+# Import the backend as the ``mastra`` package, as test_imports.py and the benchmarks do
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "src")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Caches and SQLite stores are configured at import time; keep them out of the working tree
+_scratch = tempfile.mkdtemp(prefix="mastra-tests-")
+os.environ.setdefault("MASTRA_CACHE_DIR", _scratch)
+os.environ.setdefault("WALLET_STATE_DB", os.path.join(_scratch, "wallet_state.sqlite3"))
+
+
+async def serve(app: web.Application, host: str = "127.0.0.1") -> Tuple[web.AppRunner, str]:
+    """Start ``app`` on a free local port; returns the runner (for cleanup) and its base URL."""
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{port}"
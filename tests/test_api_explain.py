@@ -0,0 +1,51 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from mastra import api_explain
+from mastra.cache.result_cache import fingerprint, get_analysis_id_cache, get_explanation_cache
+
+app = FastAPI()
+app.include_router(api_explain.router)
+client = TestClient(app)
+
+ANALYSIS = {
+    "wallet": "FksffEqnBRixYGR791Qw2MgdU7zNCpHVFYBL4Fa4qVuH",
+    "combined_summary": "Low activity wallet.",
+    "detailed": {
+        "token_forensics": {"So11111111111111111111111111111111111111112": {"symbol": "SOL", "risk_score": 0}},
+        "transaction_monitor": {"summary": "No suspicious transfers."},
+        "risk_advisor": {"summary": "Low risk."},
+    },
+    "trust_score": 90,
+    "risk_rating": "LOW",
+}
+
+
+def test_explanations_are_derived_on_first_lookup(monkeypatch):
+    calls = []
+    real = api_explain.explain_analysis
+    monkeypatch.setattr(api_explain, "explain_analysis", lambda result: calls.append(1) or real(result))
+    analysis_id = fingerprint(ANALYSIS)
+    get_analysis_id_cache().put(analysis_id, dict(ANALYSIS, analysis_id=analysis_id))
+    assert get_explanation_cache().get(analysis_id) is None
+
+    first = client.get("/api/explain/batch", params={"analysis_id": analysis_id})
+    assert first.status_code == 200
+    assert first.headers["X-Cache"] == "MISS"
+    assert set(first.json()["explanations"]) == set(api_explain.SPECIALTIES)
+
+    second = client.post("/api/explain/batch", json={"analysis_id": analysis_id, "specialties": ["risk_advisor"]})
+    assert second.headers["X-Cache"] == "HIT"
+    assert list(second.json()["explanations"]) == ["risk_advisor"]
+    assert calls == [1]
+
+
+def test_unknown_analysis_id_is_404():
+    response = client.get("/api/explain/batch", params={"analysis_id": "does-not-exist"})
+    assert response.status_code == 404
+
+
+def test_malformed_specialties_are_400():
+    for specialties in (5, {"risk_advisor": True}, [["risk_advisor"]], ["nope"]):
+        response = client.post("/api/explain/batch", json={"results": ANALYSIS, "specialties": specialties})
+        assert response.status_code == 400, specialties
@@ -0,0 +1,44 @@
+import time
+import asyncio
+
+from aiohttp import web
+
+from conftest import serve
+from mastra.tools import liquidity_checker, raydium_pools
+from mastra.tools.http_client import close_upstream_client
+
+MINT = "7xKXtg2CW87d97TXJSDpbD5jBkheTqA83TZRuJosgAsU"
+POOL = {"id": "pool-1", "baseMint": MINT, "quoteMint": "So11111111111111111111111111111111111111112", "liquidity": 2500.0}
+
+
+def test_cold_start_answers_without_waiting_for_the_pool_dump(monkeypatch):
+    release = None
+
+    async def dump(request):
+        await release.wait()
+        return web.json_response({"official": [POOL], "unOfficial": []})
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        app = web.Application()
+        app.router.add_get("/pools.json", dump)
+        runner, base = await serve(app)
+        index = raydium_pools.RaydiumPoolIndex(url=f"{base}/pools.json")
+        monkeypatch.setattr(raydium_pools, "_index", index)
+        try:
+            started = time.monotonic()
+            result = await liquidity_checker._lookup_liquidity(MINT)
+            assert time.monotonic() - started < 1
+            assert result["liquidity_usd"] == 0 and "loading" in result["error"]
+
+            # The background build fills the index for later lookups
+            release.set()
+            assert await index.ensure_loaded(5)
+            assert (await liquidity_checker._lookup_liquidity(MINT))["liquidity_usd"] == 2500.0
+        finally:
+            await index.stop()
+            await close_upstream_client()
+            await runner.cleanup()
+
+    asyncio.run(main())
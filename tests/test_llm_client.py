@@ -0,0 +1,91 @@
+import json
+import asyncio
+import os
+import tempfile
+from typing import List
+
+from aiohttp import web
+
+from conftest import serve
+from mastra.cache.llm_cache import LLMCache
+from mastra.tools.http_client import close_upstream_client
+from mastra.tools.llm_client import OllamaClient
+
+
+class FakeOllama:
+    """Streams ``/api/generate`` completions as NDJSON, optionally slower than the client's timeout."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.prompts: List[str] = []
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/generate", self.generate)
+        return app
+
+    async def generate(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self.prompts.append(body["prompt"])
+        resp = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await resp.prepare(request)
+        for word in ("<think>hmm</think>", "Low ", "risk ", "wallet."):
+            await asyncio.sleep(self.delay)
+            await resp.write(json.dumps({"response": word, "done": False}).encode() + b"\n")
+        await resp.write(json.dumps({"response": "", "done": True, "eval_count": 4}).encode() + b"\n")
+        return resp
+
+
+def run_with_client(scenario, delay: float = 0.0, timeout: float = 5.0) -> None:
+    async def run():
+        server = FakeOllama(delay)
+        runner, base_url = await serve(server.app())
+        client = OllamaClient(
+            base_url=f"{base_url}/api",
+            model="fake",
+            timeout=timeout,
+            cache=LLMCache(path=os.path.join(tempfile.mkdtemp(), "llm.sqlite3")),
+        )
+        try:
+            await scenario(server, client)
+        finally:
+            await client.close()
+            await close_upstream_client()
+            await runner.cleanup()
+
+    asyncio.run(run())
+
+
+def test_identical_prompts_share_one_generation_and_hit_the_cache():
+    async def scenario(server, client):
+        results = await asyncio.gather(*(client.generate("Summarize  this\nwallet", {"risk": 1}) for _ in range(3)))
+        assert results == ["Low risk wallet."] * 3
+        assert len(server.prompts) == 1
+        # Whitespace-only differences share the cached completion
+        assert await client.generate("Summarize this wallet", {"risk": 1}) == "Low risk wallet."
+        assert len(server.prompts) == 1
+        assert client.stats()["outcomes"] == {"miss": 1, "coalesced": 2, "hit": 1}
+
+    run_with_client(scenario)
+
+
+def test_timeout_falls_back_and_skips_the_model_while_it_is_down():
+    async def scenario(server, client):
+        assert await client.generate("Summarize this wallet") is None
+        assert client.stats()["outcomes"] == {"miss": 1, "timeout": 1}
+        assert client.stats()["backoff_seconds"] > 0
+        # While backing off, new prompts use the template without reaching the model
+        assert await client.generate("Another wallet") is None
+        assert server.prompts == ["Summarize this wallet"]
+        assert client.stats()["outcomes"]["skipped"] == 1
+
+    run_with_client(scenario, delay=0.2, timeout=0.1)
+
+
+def test_disabled_without_a_base_url():
+    async def scenario(server, client):
+        client.base_url = ""
+        assert await client.generate("Summarize this wallet") is None
+        assert client.stats()["outcomes"] == {"disabled": 1}
+
+    run_with_client(scenario)
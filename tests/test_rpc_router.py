@@ -0,0 +1,42 @@
+import asyncio
+
+from aiohttp import web
+
+from conftest import serve
+from mastra.tools import rpc_router
+from mastra.tools.http_client import close_upstream_client
+from mastra.tools.rpc_router import RpcRouter
+
+
+def test_failover_to_slow_backup_does_not_hedge_past_the_last_endpoint(monkeypatch):
+    # The primary is throttled, the only backup answers after the hedge delay
+    monkeypatch.setattr(rpc_router, "RPC_HEDGE_DEFAULT_MS", 20)
+    calls = {"primary": 0, "backup": 0}
+
+    async def primary(request: web.Request) -> web.Response:
+        calls["primary"] += 1
+        return web.Response(status=429, text="Too Many Requests")
+
+    async def backup(request: web.Request) -> web.Response:
+        calls["backup"] += 1
+        await asyncio.sleep(0.2)
+        return web.json_response({"jsonrpc": "2.0", "id": 1, "result": "ok"})
+
+    async def run():
+        app = web.Application()
+        app.router.add_post("/primary", primary)
+        app.router.add_post("/backup", backup)
+        runner, base_url = await serve(app)
+        try:
+            router = RpcRouter([f"{base_url}/primary", f"{base_url}/backup"])
+            reply = await router.send({"jsonrpc": "2.0", "id": 1, "method": "getHealth"}, timeout=5, methods=["getHealth"])
+            return reply, router.stats()
+        finally:
+            await close_upstream_client()
+            await runner.cleanup()
+
+    reply, stats = asyncio.run(run())
+    assert reply["result"] == "ok"
+    assert calls == {"primary": 1, "backup": 1}
+    assert stats["failovers"] == 1
+    assert stats["hedges"] == 0
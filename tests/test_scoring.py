@@ -0,0 +1,32 @@
+import random
+
+from mastra.agents.scoring import RiskScorer, ScoringConfig, TokenFeatures
+
+
+def random_rows(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [
+        (
+            rng.choice([0.0, 40.0, 40.5, rng.uniform(0, 100)]),
+            rng.choice([0.0, 999.99, 1000.0, rng.uniform(0, 1e6)]),
+            rng.random() < 0.5,
+            rng.random() < 0.5,
+            rng.random() < 0.3,
+        )
+        for _ in range(n)
+    ]
+
+
+def test_scalar_path_matches_vectorized_scores():
+    for config in (ScoringConfig(), ScoringConfig(max_score=60, flag_weight=35, top_holder_pct_above=20)):
+        scorer = RiskScorer(config)
+        rows = random_rows(5000)
+        assert [scorer.score_row(row) for row in rows] == scorer.score_tokens(TokenFeatures.from_rows(rows)).tolist()
+
+
+def test_wallet_rating_thresholds():
+    scorer = RiskScorer()
+    assert scorer.rate([]) == (0.0, "Low")
+    assert scorer.rate([40, 40]) == (40.0, "Low")
+    assert scorer.rate([41]) == (41.0, "Medium")
+    assert scorer.rate([70, 75]) == (72.5, "High")
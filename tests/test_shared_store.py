@@ -0,0 +1,33 @@
+import os
+import sqlite3
+import time
+
+from mastra.cache.result_cache import ResultCache
+from mastra.cache.shared_store import SharedResultStore
+
+
+def test_busy_shared_store_does_not_block(tmp_path):
+    path = os.path.join(tmp_path, "results.sqlite3")
+    worker_a = ResultCache(shared=SharedResultStore(path), namespace="analysis")
+    worker_b = ResultCache(shared=SharedResultStore(path), namespace="analysis")
+    worker_a.put("stored", {"risk": 1})
+
+    # A third process holds the write lock for longer than the busy timeout
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.monotonic()
+        worker_a.put("wallet", {"risk": 2})
+        assert time.monotonic() - started < 1
+        assert worker_a.shared_busy == 1
+        assert worker_a.get("wallet")[0] == {"risk": 2}  # still cached in this worker
+        # WAL readers are not blocked by the writer
+        assert worker_b.get("stored")[0] == {"risk": 1}
+        assert worker_b.get("wallet") is None
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+
+    worker_a.put("wallet", {"risk": 2})
+    assert worker_b.get("wallet")[0] == {"risk": 2}
+    assert worker_a.stats()["shared_busy"] == 1
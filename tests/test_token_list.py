@@ -0,0 +1,45 @@
+import os
+import time
+import asyncio
+
+from aiohttp import web
+
+from conftest import serve
+from mastra.tools import token_list
+from mastra.tools.http_client import close_upstream_client
+from mastra.tools.solana_data_fetcher import get_token_metadata
+
+MINT = "7xKXtg2CW87d97TXJSDpbD5jBkheTqA83TZRuJosgAsU"
+
+
+def test_cold_start_answers_without_waiting_for_the_download(tmp_path, monkeypatch):
+    release = None
+
+    async def token_list_json(request):
+        await release.wait()
+        return web.json_response({"tokens": [{"address": MINT, "name": "Samoyedcoin", "symbol": "SAMO", "logoURI": ""}]})
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        app = web.Application()
+        app.router.add_get("/tokens.json", token_list_json)
+        runner, base = await serve(app)
+        store = token_list.TokenListStore(url=f"{base}/tokens.json", snapshot_path=os.path.join(tmp_path, "tokenlist.tsv"))
+        monkeypatch.setattr(token_list, "_store", store)
+        try:
+            started = time.monotonic()
+            meta = await get_token_metadata(MINT)
+            assert time.monotonic() - started < 1
+            assert meta["meta"]["symbol"] == "UNKNOWN"
+
+            # The background refresh fills the index for later requests
+            release.set()
+            assert await store.ensure_loaded(5)
+            assert (await get_token_metadata(MINT))["meta"]["symbol"] == "SAMO"
+        finally:
+            await store.stop()
+            await close_upstream_client()
+            await runner.cleanup()
+
+    asyncio.run(main())
@@ -0,0 +1,37 @@
+import asyncio
+
+from mastra.agents.coordinator_agent import merge_transaction_verdict, next_cursor
+from mastra.agents.transaction_monitor import LARGE_TRANSFER_SOL, analyze_transaction_stream
+
+
+async def history(changes):
+    for i, change in enumerate(changes):
+        yield {"signature": f"sig-{i}", "change": change}
+
+
+def test_stop_at_finding_leaves_history_unfinished():
+    latest = asyncio.run(analyze_transaction_stream(history([0, -LARGE_TRANSFER_SOL - 1, 0, 0])))
+    assert latest["suspicious"] and latest["checked_txs"] == 2
+    assert not latest["complete"]
+    assert next_cursor("old", latest) == "old"
+
+
+def test_incremental_pass_checks_everything_and_keeps_the_first_finding():
+    big = -LARGE_TRANSFER_SOL - 1
+    latest = asyncio.run(analyze_transaction_stream(history([0, big, 0, big * 2]), stop_at_finding=False))
+    assert latest["checked_txs"] == 4 and latest["complete"]
+    assert "sig-1" in latest["summary"]
+    assert next_cursor("old", latest) == "sig-0"
+
+
+def test_cursor_rules():
+    assert next_cursor(None, {"newest_signature": "sig-0", "complete": False}) == "sig-0"  # first run: baseline
+    assert next_cursor("old", {"newest_signature": None, "complete": True}) == "old"  # nothing new
+
+
+def test_clean_pass_keeps_an_earlier_finding():
+    previous = {"suspicious": True, "summary": "Large outgoing transfer", "checked_txs": 100}
+    clean = {"suspicious": False, "summary": "No suspicious activity detected.", "checked_txs": 3, "complete": True}
+    merged = merge_transaction_verdict(previous, clean)
+    assert merged["suspicious"] and merged["summary"] == "Large outgoing transfer"
+    assert merged["checked_txs"] == 103 and merged["new_txs"] == 3
@@ -0,0 +1,69 @@
+import os
+
+from mastra.cache.tx_store import INDEX_SUFFIX, SEGMENT_SUFFIX, TransactionStore
+
+FINALIZED_SLOT = 1_000
+
+
+def transactions(n: int, slot: int = 900):
+    return {f"sig{i}": {"slot": slot, "meta": {"fee": 5000 + i}} for i in range(n)}
+
+
+def files(directory: str, suffix: str):
+    return sorted(name for name in os.listdir(directory) if name.endswith(suffix))
+
+
+def test_only_finalized_transactions_are_stored(tmp_path):
+    store = TransactionStore(str(tmp_path))
+    confirmed = {"recent": {"slot": FINALIZED_SLOT + 1}, "no_slot": {"meta": {}}}
+    assert store.put_many(dict(transactions(3), **confirmed), FINALIZED_SLOT) == 3
+    found = store.get_many(["sig0", "sig2", "recent", "no_slot", "missing"])
+    assert found == {"sig0": transactions(3)["sig0"], "sig2": transactions(3)["sig2"]}
+    assert store.put_many(transactions(3), FINALIZED_SLOT) == 0  # already stored
+    store.close()
+
+
+def test_restart_reopens_the_unsealed_segment(tmp_path):
+    for run in range(3):
+        store = TransactionStore(str(tmp_path))
+        assert len(store.get_many([f"sig{i}" for i in range(run * 10)])) == run * 10
+        batch = {f"sig{run * 10 + i}": {"slot": 1, "run": run} for i in range(10)}
+        assert store.put_many(batch, FINALIZED_SLOT) == 10
+        store.close()
+    # One segment appended to by every run, nothing sealed
+    assert len(files(str(tmp_path), SEGMENT_SUFFIX)) == 1
+    assert files(str(tmp_path), INDEX_SUFFIX) == []
+    store = TransactionStore(str(tmp_path))
+    assert store.get_many(["sig25"]) == {"sig25": {"slot": 1, "run": 2}}
+    store.close()
+
+
+def test_full_segments_are_sealed_and_mapped(tmp_path):
+    store = TransactionStore(str(tmp_path), segment_bytes=2048)
+    assert store.put_many(transactions(200), FINALIZED_SLOT) == 200
+    stats = store.stats()
+    assert stats["sealed_segments"] >= 2
+    assert stats["sealed_transactions"] + stats["active_transactions"] == 200
+    store.close()
+    reader = TransactionStore(str(tmp_path), segment_bytes=2048)
+    assert len(reader.get_many([f"sig{i}" for i in range(200)])) == 200
+    reader.close()
+
+
+def test_torn_tail_is_dropped_when_reopening(tmp_path):
+    store = TransactionStore(str(tmp_path))
+    store.put_many(transactions(5), FINALIZED_SLOT)
+    store.close()
+    (segment,) = files(str(tmp_path), SEGMENT_SUFFIX)
+    path = os.path.join(str(tmp_path), segment)
+    size = os.path.getsize(path)
+    with open(path, "ab") as fh:
+        fh.write(b"\x04\x00\xff\xff")  # an append interrupted mid-header
+    store = TransactionStore(str(tmp_path))
+    assert len(store.get_many([f"sig{i}" for i in range(5)])) == 5
+    assert os.path.getsize(path) == size
+    assert store.put_many({"sig5": {"slot": 1}}, FINALIZED_SLOT) == 1
+    store.close()
+    store = TransactionStore(str(tmp_path))
+    assert len(store.get_many([f"sig{i}" for i in range(6)])) == 6
+    store.close()
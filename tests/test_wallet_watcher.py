@@ -0,0 +1,185 @@
+import json
+import asyncio
+from typing import Any, Dict, List
+
+import aiohttp
+from aiohttp import web
+
+from conftest import serve
+from mastra.tools.http_client import close_upstream_client
+from mastra import wallet_watcher
+from mastra.cache.wallet_state import get_wallet_state_store
+from mastra.wallet_watcher import WalletWatcher
+
+WALLET = "Watched1111111111111111111111111111111111111"
+OTHER = "Watched2222222222222222222222222222222222222"
+
+
+class FakePubSub:
+    """Minimal Solana PubSub server: logsSubscribe/logsUnsubscribe and pushed notifications."""
+
+    def __init__(self) -> None:
+        self.sockets: List[web.WebSocketResponse] = []
+        self.subs: Dict[int, str] = {}
+        self.requests: List[Dict[str, Any]] = []
+        self.hold_subscribes = asyncio.Event()
+        self.hold_subscribes.set()
+        self._next_sub = 100
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/", self.handler)
+        return app
+
+    async def handler(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets.append(ws)
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                continue
+            req = json.loads(msg.data)
+            self.requests.append(req)
+            if req["method"] == "logsSubscribe":
+                await self.hold_subscribes.wait()
+                self._next_sub += 1
+                self.subs[self._next_sub] = req["params"][0]["mentions"][0]
+                await ws.send_json({"jsonrpc": "2.0", "id": req["id"], "result": self._next_sub})
+            elif req["method"] == "logsUnsubscribe":
+                found = self.subs.pop(req["params"][0], None) is not None
+                await ws.send_json({"jsonrpc": "2.0", "id": req["id"], "result": found})
+        return ws
+
+    async def notify(self, wallet: str) -> None:
+        for sub_id, subscribed in list(self.subs.items()):
+            if subscribed == wallet:
+                await self.sockets[-1].send_json({
+                    "jsonrpc": "2.0",
+                    "method": "logsNotification",
+                    "params": {"subscription": sub_id, "result": {"value": {"signature": "sig"}}},
+                })
+
+    async def drop_connections(self) -> None:
+        # The server forgets subscriptions with the socket, like a real node
+        self.subs.clear()
+        for ws in self.sockets:
+            await ws.close()
+
+    def methods(self) -> List[str]:
+        return [req["method"] for req in self.requests]
+
+
+async def wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached in time"
+        await asyncio.sleep(0.01)
+
+
+def run_with_watcher(scenario) -> None:
+    async def run():
+        server = FakePubSub()
+        runner, base_url = await serve(server.app())
+        analyzed: List[str] = []
+
+        async def analyze(wallet: str) -> Dict[str, Any]:
+            analyzed.append(wallet)
+            return {"risk_rating": "LOW", "trust_score": 90, "detailed": {}}
+
+        watcher = WalletWatcher(url=base_url.replace("http://", "ws://") + "/", connections=1, debounce=0.05, analyze=analyze)
+        try:
+            await scenario(server, watcher, analyzed)
+        finally:
+            await watcher.stop()
+            await close_upstream_client()
+            await runner.cleanup()
+
+    asyncio.run(run())
+
+
+def test_subscribe_and_debounced_reanalysis():
+    async def scenario(server, watcher, analyzed):
+        assert await watcher.watch([WALLET, WALLET]) == [WALLET]
+        await wait_for(lambda: watcher.stats()["connections"][0]["subscribed"] == 1)
+        assert list(server.subs.values()) == [WALLET]
+        # A burst of notifications inside the debounce window triggers one analysis
+        for _ in range(3):
+            await server.notify(WALLET)
+        await wait_for(lambda: analyzed)
+        await asyncio.sleep(0.2)
+        assert analyzed == [WALLET]
+        assert watcher.stats()["analyses"] == 1
+
+    run_with_watcher(scenario)
+
+
+def test_reconnect_resubscribes_every_wallet():
+    async def scenario(server, watcher, analyzed):
+        await watcher.watch([WALLET, OTHER])
+        await wait_for(lambda: len(server.subs) == 2)
+        await server.drop_connections()
+        await wait_for(lambda: watcher.connections[0].connects == 2 and len(server.subs) == 2)
+        assert sorted(server.subs.values()) == sorted([WALLET, OTHER])
+        await wait_for(lambda: watcher.stats()["connections"][0]["subscribed"] == 2)
+        # Notifications use the new subscription ids
+        await server.notify(OTHER)
+        await wait_for(lambda: analyzed == [OTHER])
+
+    run_with_watcher(scenario)
+
+
+def test_unwatch_unsubscribes():
+    async def scenario(server, watcher, analyzed):
+        await watcher.watch([WALLET])
+        await wait_for(lambda: watcher.stats()["connections"][0]["subscribed"] == 1)
+        assert await watcher.unwatch(WALLET)
+        assert not await watcher.unwatch(WALLET)
+        await wait_for(lambda: not server.subs)
+        assert server.methods() == ["logsSubscribe", "logsUnsubscribe"]
+        assert watcher.stats()["watched"] == 0
+
+    run_with_watcher(scenario)
+
+
+def test_unwatch_while_subscribe_in_flight_unsubscribes_on_reply():
+    async def scenario(server, watcher, analyzed):
+        server.hold_subscribes.clear()
+        await watcher.watch([WALLET])
+        await wait_for(lambda: server.methods() == ["logsSubscribe"])
+        # No subscription id yet, so nothing can be unsubscribed until the reply arrives
+        assert await watcher.unwatch(WALLET)
+        assert server.methods() == ["logsSubscribe"]
+        server.hold_subscribes.set()
+        await wait_for(lambda: server.methods() == ["logsSubscribe", "logsUnsubscribe"])
+        await wait_for(lambda: not server.subs)
+        assert watcher.stats()["connections"][0]["subscribed"] == 0
+        await server.notify(WALLET)
+        await asyncio.sleep(0.1)
+        assert analyzed == []
+
+    run_with_watcher(scenario)
+
+
+def test_over_limit_batch_is_rejected_whole(monkeypatch):
+    monkeypatch.setattr(wallet_watcher, "WATCHER_MAX_WALLETS", 2)
+    extra = ["Batch" + str(i) * 39 for i in range(1, 3)]
+
+    async def scenario(server, watcher, analyzed):
+        await watcher.watch([WALLET])
+        try:
+            await watcher.watch([WALLET] + extra)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("batch over WATCHER_MAX_WALLETS was accepted")
+        # Nothing from the rejected batch is subscribed, held or persisted
+        await asyncio.sleep(0.1)
+        assert list(server.subs.values()) == [WALLET]
+        assert server.methods() == ["logsSubscribe"]
+        assert watcher.stats()["watched"] == 1
+        persisted = await get_wallet_state_store().watched_wallets()
+        assert not set(extra) & set(persisted)
+        # A batch that fits is still accepted
+        assert await watcher.watch(extra[:1]) == extra[:1]
+
+    run_with_watcher(scenario)
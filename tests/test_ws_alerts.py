@@ -0,0 +1,37 @@
+import asyncio
+
+from mastra.ws_alerts import AlertHub
+
+
+class FakeSocket:
+    """Stands in for a Starlette WebSocket: records frames, optionally never finishes a send."""
+
+    def __init__(self, stalled=False):
+        self.stalled = stalled
+        self.frames = []
+        self.close_code = None
+
+    async def send_text(self, text):
+        if self.stalled:
+            await asyncio.sleep(3600)
+        self.frames.append(text)
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+def test_passive_subscriber_survives_heartbeat_timeout():
+    async def main():
+        hub = AlertHub(heartbeat_interval=0.05, heartbeat_timeout=0.15, send_timeout=0.1)
+        passive, stalled = FakeSocket(), FakeSocket(stalled=True)
+        hub.connect(passive)
+        hub.connect(stalled)
+        # Neither client ever writes; only the one whose pings get delivered stays connected
+        await asyncio.sleep(0.6)
+        assert sum('"ping"' in frame for frame in passive.frames) >= 5
+        assert passive.close_code is None
+        assert stalled.close_code is not None
+        assert len(hub.connections) == 1
+        await hub.close()
+
+    asyncio.run(main())